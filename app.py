@@ -1,12 +1,19 @@
-import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import pydeck as pdk
-import numpy as np
-import uuid
 import datetime
-import random
+import math
+import time
+
+import streamlit as st
+
+from kuali import estilo, perfil
+from kuali.series import FIN_TEMPORADA, INICIO_TEMPORADA, rango_fechas
+
+# Primer render del proceso = de aquí al final de la corrida (kuali.perfil)
+INICIO_SCRIPT = time.perf_counter()
+
+# Arranque en frío: el título, el CSS y la navegación se pintan antes de importar
+# nada pesado. Cada sección importa sus módulos (pandas, plotly.express, pydeck,
+# simulación, feeds...) al ejecutarse; un proceso nuevo solo paga los de la
+# página que abrió el usuario.
 
 # ==============================================================================
 # 1. CONFIGURACIÓN DE PÁGINA Y ESTILOS (DISEÑO PITCH PRO - ULTIMATE)
@@ -18,735 +25,388 @@ st.set_page_config(
 )
 
 # --- CSS MAESTRO: TARJETAS, FUENTES Y TOOLTIPS INTELIGENTES ---
-st.markdown("""
-    <style>
-    /* 1. FONDO GENERAL */
-    .stApp {
-        background-color: #F4F6F7;
-    }
-
-    /* 2. TIPOGRAFÍA GLOBAL (NEGRO POR DEFECTO) */
-    html, body, [class*="css"], .stMarkdown, .stText, p, li, span, div {
-        font-size: 24px !important;
-        color: #000000 !important;
-        font-family: 'Arial', sans-serif !important;
-    }
-
-    /* 3. TÍTULO PRINCIPAL */
-    .main-title {
-        font-size: 140px !important;
-        font-weight: 900 !important;
-        color: #0A3069 !important;
-        text-align: center;
-        text-transform: uppercase;
-        text-shadow: 5px 5px 0px #FFFFFF, 7px 7px 0px #BDC3C7;
-        margin-bottom: 0px !important;
-        line-height: 1 !important;
-        padding-top: 20px;
-    }
-
-    /* 4. SLOGAN */
-    .main-slogan {
-        font-size: 48px !important;
-        color: #154360 !important;
-        text-align: center;
-        font-weight: 700 !important;
-        font-style: italic;
-        margin-top: 10px !important;
-        margin-bottom: 40px !important;
-        border-bottom: 5px solid #E67E22;
-    }
-
-    /* 5. TÍTULOS DE SECCIONES */
-    h1, h2, h3 {
-        color: #154360 !important;
-        font-weight: 800 !important;
-        padding-top: 10px;
-    }
-
-    /* 6. TARJETAS BLANCAS */
-    div.block-container {
-        padding-top: 2rem;
-        padding-bottom: 5rem;
-    }
-
-    /* 7. ESTILO DE TABLA */
-    div[data-testid="stTable"] {
-        background-color: #FFFFFF !important;
-        border-radius: 10px;
-        overflow: hidden;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        border: 1px solid #BDC3C7;
-    }
-    table { width: 100% !important; border-collapse: collapse !important; }
-    thead tr th {
-        background-color: #FFFFFF !important;
-        color: #0A3069 !important;
-        font-size: 26px !important;
-        font-weight: 900 !important;
-        text-align: center !important;
-        padding: 15px !important;
-        border-bottom: 4px solid #0A3069 !important;
-    }
-    tbody tr td {
-        background-color: #FFFFFF !important;
-        color: #000000 !important;
-        font-size: 24px !important;
-        border-bottom: 2px solid #D5D8DC !important;
-        font-weight: 600 !important;
-        padding: 15px !important;
-    }
-
-    /* 8. PESTAÑAS */
-    button[data-baseweb="tab"] {
-        font-size: 28px !important;
-        background-color: #E5E8E8 !important;
-        color: #555555 !important;
-        margin-right: 5px;
-        border-radius: 10px 10px 0 0;
-    }
-    button[data-baseweb="tab"][aria-selected="true"] {
-        background-color: #FFFFFF !important;
-        color: #0A3069 !important;
-        border-top: 6px solid #0A3069 !important;
-    }
-
-    /* 9. ALERTAS */
-    .stAlert {
-        background-color: #FFFFFF !important;
-        border-left: 10px solid #E67E22 !important;
-        box-shadow: 0 2px 5px rgba(0,0,0,0.05);
-    }
-
-    /* 10. MÉTRICAS */
-    div[data-testid="metric-container"] {
-        background-color: #FFFFFF !important;
-        border: 1px solid #BDC3C7 !important;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        padding: 15px !important;
-        border-radius: 8px;
-    }
-    [data-testid="stMetricValue"] { color: #0A3069 !important; }
-
-    /* 11. TOOLTIPS DE PYDECK (SOLUCIÓN DEFINITIVA COLOR NARANJA) */
-    .deck-tooltip {
-        background-color: #0A3069 !important;
-        color: #FFA500 !important;
-        font-family: 'Arial', sans-serif !important;
-        font-size: 18px !important;
-        border-radius: 8px !important;
-        padding: 12px !important;
-        box-shadow: 0px 4px 10px rgba(0,0,0,0.3) !important;
-        border: 2px solid #FFA500 !important;
-        z-index: 9999 !important;
-    }
-    /* FUERZA BRUTA: CUALQUIER COSA DENTRO DEL TOOLTIP SERÁ NARANJA */
-    .deck-tooltip * {
-        color: #FFA500 !important;
-    }
-
-    /* 12. TARJETAS HTML DE PILARES */
-    .pilar-card {
-        background-color: white;
-        border-radius: 15px;
-        padding: 20px;
-        text-align: center;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.15);
-        border-bottom: 5px solid #0A3069;
-        height: 100%;
-        transition: transform 0.3s ease;
-    }
-    .pilar-card:hover {
-        transform: scale(1.05);
-        background-color: #FDFEFE;
-    }
-    .pilar-icon { font-size: 60px; margin-bottom: 10px; }
-    .pilar-title { font-size: 28px; font-weight: bold; color: #154360; margin-bottom: 5px; }
-    .pilar-value { font-size: 36px; font-weight: 900; color: #E67E22; }
-    .pilar-desc { font-size: 20px; color: #555; }
-    </style>
-    """, unsafe_allow_html=True)
+st.markdown(f"<style>{estilo.CSS}</style>", unsafe_allow_html=True)
 
 # ==============================================================================
-# 2. CONFIGURACIÓN GLOBAL DE GRÁFICAS
+# 2. INTERFAZ PRINCIPAL
 # ==============================================================================
 
-def hex_to_rgba(hex_code, opacity):
-    hex_code = hex_code.lstrip('#')
-    return f"rgba({int(hex_code[0:2], 16)}, {int(hex_code[2:4], 16)}, {int(hex_code[4:6], 16)}, {opacity})"
-
-def update_fig_layout(fig, height=None):
-    fig.update_layout(
-        template='plotly_white',
-        paper_bgcolor='#FFFFFF',
-        plot_bgcolor='#FFFFFF',
-        font=dict(color='#000000', size=20, family="Arial"),
-        margin=dict(l=20, r=20, t=60, b=20),
-        height=height if height else 450,
-        legend=dict(
-            font=dict(color="#000000", size=20),
-            bgcolor="rgba(255,255,255,0.9)",
-            bordercolor="#BDC3C7",
-            borderwidth=1
-        ),
-        # Tooltip Plotly Inteligente
-        hoverlabel=dict(
-            bgcolor="#0A3069",
-            font=dict(color="#FFFFFF", size=24),
-            bordercolor="#E67E22"
-        )
-    )
-    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#EBEDEF', showline=True, linewidth=2, linecolor='black', tickfont=dict(color='black', size=18))
-    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#EBEDEF', showline=True, linewidth=2, linecolor='black', tickfont=dict(color='black', size=18))
-    return fig
-
-# --- DATOS GLOBALES ---
-kpi_inversion_inicial = 1200000
-pe_paquetes_mensuales_c12 = 22
-
-# --- FUNCIONES GENERADORAS ---
-
-def crear_grafica_plataforma(nombre_plataforma, color_linea, volatilidad, nivel_precio):
-    fechas = []
-    precio_bajo = []
-    precio_alto = []
-    precio_prom = []
-    curr = datetime.date(2025, 10, 10)
-    end = datetime.date(2025, 11, 5)
-    while curr <= end:
-        fechas.append(curr)
-        base = 22000 * nivel_precio
-        factor = 1.0
-        if curr.weekday() >= 4: factor = 1.15
-        if curr.month == 11 and curr.day <= 2: factor = 1.85
-        p_prom = int(base * factor)
-        gap = int(p_prom * volatilidad)
-        noise = random.uniform(0.95, 1.05)
-        p_min = int((p_prom - gap) * noise)
-        p_max = int((p_prom + gap) * noise)
-        p_final = int(p_prom * noise)
-        precio_bajo.append(p_min)
-        precio_alto.append(p_max)
-        precio_prom.append(p_final)
-        curr += datetime.timedelta(days=1)
-
-    fill_color = hex_to_rgba(color_linea, 0.2)
-
-    # --- TOOLTIP COMPETENCIA ---
-    tooltip_template = (
-        "<b>PLATAFORMA: " + nombre_plataforma + "</b><br>" +
-        "📅 Fecha: %{x|%d %b}<br>" +
-        "💸 Precio: %{y:$,.0f}<br>" +
-        "<br>" +
-        "⚠️ <b>RIESGO:</b> El precio cambia por hora.<br>" +
-        "📉 <b>CAUSA:</b> Algoritmo de Especulación.<br>" +
-        "❌ <b>EFECTO:</b> Pagas más si hay mucha demanda.<extra></extra>"
-    )
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=fechas, y=precio_alto, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
-    fig.add_trace(go.Scatter(
-        x=fechas, y=precio_bajo, mode='lines', line=dict(width=0), fill='tonexty', fillcolor=fill_color, name=f'Volatilidad',
-        hoverinfo='skip'
-    ))
-    fig.add_trace(go.Scatter(
-        x=fechas, y=precio_prom, mode='lines+markers', line=dict(color=color_linea, width=4), marker=dict(size=8), name=f'Precio',
-        hovertemplate=tooltip_template
-    ))
-
-    fig.update_layout(
-        title=dict(text=f'<b>{nombre_plataforma}</b>', font=dict(size=24, color="#000000")),
-        yaxis=dict(tickformat="$,.0f"),
-        xaxis=dict(tickformat="%d %b"),
-        showlegend=False
-    )
-    return update_fig_layout(fig, height=350)
-
-def crear_grafica_kuali():
-    fechas = []
-    precio_bajo = []
-    precio_alto = []
-    precio_prom = []
-    curr = datetime.date(2025, 10, 10)
-    end = datetime.date(2025, 11, 5)
-    while curr <= end:
-        fechas.append(curr)
-        base = 21500
-        factor = 1.0
-        if curr.month == 11 and curr.day <= 2: factor = 1.10
-        elif curr.weekday() >= 4: factor = 1.05
-        p_prom = int(base * factor)
-        gap = 1500
-        noise = random.uniform(0.99, 1.01)
-        p_min = int((p_prom - gap) * noise)
-        p_max = int((p_prom + gap) * noise)
-        precio_bajo.append(p_min)
-        precio_alto.append(p_max)
-        precio_prom.append(p_prom)
-        curr += datetime.timedelta(days=1)
-
-    color_kuali = "#0A3069"
-    fill_kuali = hex_to_rgba(color_kuali, 0.15)
-
-    # --- TOOLTIP KUALI ---
-    tooltip_kuali = (
-        "<b>KUALI (NOSOTROS)</b><br>" +
-        "📅 Fecha: %{x|%d %b}<br>" +
-        "💰 Precio: %{y:$,.0f}<br>" +
-        "<br>" +
-        "✅ <b>GARANTÍA:</b> Precio Protegido y Fijo.<br>" +
-        "🤖 <b>TECNOLOGÍA:</b> IA Anti-Bias bloquea aumentos.<br>" +
-        "❤️ <b>BENEFICIO:</b> Tu presupuesto está seguro.<extra></extra>"
-    )
+st.markdown('<h1 class="main-title">KUALI</h1>', unsafe_allow_html=True)
+st.markdown('<p class="main-slogan">Transparencia que viaja contigo</p>', unsafe_allow_html=True)
 
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=fechas, y=precio_alto, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
-    fig.add_trace(go.Scatter(
-        x=fechas, y=precio_bajo, mode='lines', line=dict(width=0), fill='tonexty', fillcolor=fill_kuali, name='Volatilidad Mínima',
-        hoverinfo='skip'
-    ))
-    fig.add_trace(go.Scatter(
-        x=fechas, y=precio_prom, mode='lines+markers', line=dict(color=color_kuali, width=6), marker=dict(size=12, symbol='square'), name='Precio KUALI',
-        hovertemplate=tooltip_kuali
-    ))
-
-    fig.update_layout(
-        title=dict(text='<b>KUALI</b>: Estabilidad Garantizada', font=dict(size=28, color="#000000")),
-        yaxis=dict(title='Precio (MXN)', tickformat="$,.0f"),
-        xaxis=dict(title='Fechas', tickformat="%d %b"),
-        annotations=[
-            dict(
-                x='2025-11-01', y=precio_prom[22], xref="x", yref="y",
-                text="<b>Sin abusos en Día de Muertos</b>",
-                showarrow=True, arrowhead=2, ax=0, ay=-50,
-                font=dict(color="#E67E22", size=24)
-            )
-        ]
-    )
-    return update_fig_layout(fig, height=500)
-
-# --- DATAFRAMES ---
-df_inversion_inicial = pd.DataFrame({
-    'Concepto': ['Activos Fijos', 'Activos Intangibles (IA)', 'Trámites', 'Capital Trabajo (Reserva)'],
-    'Monto Total (MXN)': [140500, 695000, 56500, 308000],
-    'Justificación': ['Equipo IA', 'Algoritmo KUALI-Δ', 'Legal/Marca', 'Fondo Reserva Leasing']
-})
-df_proyeccion_ingresos = pd.DataFrame({
-    'Concepto': ['Margen Paquetes', 'Comisión Leasing', 'Servicios Tech'],
-    'Año 1': [9500000, 950000, 480000],
-    'Año 2': [12000000, 1200000, 720000],
-    'Año 3': [16200000, 1620000, 950000]
-})
-data_competencia_mercado = {
-    'Plataforma': ['KUALI', 'Despegar', 'PriceTravel', 'Booking.com', 'Expedia Group'],
-    'Paquetes Ofrecidos': [
-        'Vuelo + Hotel + Traslado + Leasing + Experiencias',
-        'Vuelo + Hotel + MSI',
-        'Vuelo + Hotel + Todo Incluido',
-        'Alojamiento + Desayuno',
-        'Vuelo + Hotel + Autos'
-    ],
-    'Comisión': ['Única (10-15%)', 'Markup', 'Margen + Comisión', '10-25%', '10-30%']
-}
-df_precios_competencia = pd.DataFrame(data_competencia_mercado)
+def preparar_datos():
+    from kuali import almacen, datos, instantanea
 
-# ==============================================================================
-# 3. INTERFAZ PRINCIPAL
-# ==============================================================================
+    # Tablas de datos: solo se vuelve a leer lo que cambió
+    datos.recargar()
+    # Con KUALI_CACHE_COMPARTIDA las figuras y series se comparten con los demás procesos
+    almacen.conectar()
+    # Con KUALI_INSTANTANEA las figuras iniciales llegan ya construidas (solo la primera corrida la lee)
+    instantanea.cargar()
 
-st.markdown('<h1 class="main-title">KUALI</h1>', unsafe_allow_html=True)
-st.markdown('<p class="main-slogan">Transparencia que viaja contigo</p>', unsafe_allow_html=True)
+def grafica(constructor, *args, **kwargs):
+    from kuali import construccion
 
-# PESTAÑAS
-tab1, tab2, tab3 = st.tabs([
-    "⚙️ Producto y Operación",
-    "📈 Estudio Financiero",
-    "🎯 Estudio de Mercado"
-])
+    # Cada gráfica es un bloque del perfil: construcción + envío al navegador
+    with perfil.actual().bloque(constructor.__name__.removeprefix("crear_")):
+        st.plotly_chart(construccion.figura(constructor, *args, **kwargs), use_container_width=True)
 
 # ==============================================================================
 # PESTAÑA 1: PRODUCTO
 # ==============================================================================
-with tab1:
+def seccion_producto():
+    with perfil.importando("producto"):
+        from kuali import construccion, datos, demanda, graficas, rutas
+    preparar_datos()
+
     # --- 1. MAPA (TOOLTIPS TOTALMENTE NARANJAS) ---
     st.markdown("### 1. Cobertura Operativa: Conectando a México")
     st.caption("Pasa el mouse sobre las rutas para ver el perfil familiar por región.")
-
-    rutas_data = [
-        {"origen": "Monterrey", "source": [-100.3161, 25.6866], "target": [-99.1332, 19.4326], "color": [255, 0, 128],
-         "alta": "+45% (Navidad/Verano)", "normal": "Compras & Ocio", "segmento": "20% Familias Norte (Ticket Alto)"},
-
-        {"origen": "Guadalajara", "source": [-103.3496, 20.6597], "target": [-99.1332, 19.4326], "color": [255, 165, 0],
-         "alta": "+40% (Semana Santa)", "normal": "Cultural", "segmento": "18% Familias Tradicionales"},
-
-        {"origen": "Mérida", "source": [-89.5926, 20.9674], "target": [-99.1332, 19.4326], "color": [0, 255, 0],
-         "alta": "+25% (Vacaciones)", "normal": "Visita Familiar", "segmento": "12% Familias Multigeneracionales"},
-
-        {"origen": "Cancún", "source": [-86.8515, 21.1619], "target": [-99.1332, 19.4326], "color": [0, 255, 255],
-         "alta": "+60% (Todo el año)", "normal": "Conexión", "segmento": "25% Familias en Retorno/Conexión"},
-
-        {"origen": "Puebla", "source": [-98.2063, 19.0414], "target": [-99.1332, 19.4326], "color": [138, 43, 226],
-         "alta": "+30% (Puentes)", "normal": "Fin de Semana", "segmento": "10% Escapada Familiar Express"},
-
-        {"origen": "Querétaro", "source": [-100.3899, 20.5888], "target": [-99.1332, 19.4326], "color": [255, 215, 0],
-         "alta": "+35% (Verano)", "normal": "Recreativo", "segmento": "15% Familias Jóvenes con Niños"},
-    ]
-    df_rutas = pd.DataFrame(rutas_data)
-
-    layer_arc = pdk.Layer(
-        "ArcLayer",
-        data=df_rutas,
-        get_source_position="source",
-        get_target_position="target",
-        get_source_color="color",
-        get_target_color=[14, 102, 85],
-        get_width=15,
-        get_tilt=15,
-        pickable=True,
-        auto_highlight=True,
-    )
-
-    # --- TOOLTIP NARANJA FORZADO CON !IMPORTANT EN CSS ---
-    deck_tooltip = {
-        "html": """
-        <div style='font-family: Arial; line-height: 1.4;'>
-            <b style='font-size: 1.3em;'>Ruta: {origen} ➡ CDMX</b><br/>
-            <div style='border-bottom: 2px solid #FFA500; margin: 5px 0;'></div>
-            <span>📈 T. Alta:</span> <b>{alta}</b><br/>
-            <span>📉 Motivo:</span> <b>{normal}</b><br/>
-            <span>👨‍👩‍👧‍👦 Target:</span> <b>{segmento}</b>
-        </div>
-        """,
-        "style": {
-            "backgroundColor": "#0A3069",
-            "color": "#FFA500", # ESTE COLOR ES REFORZADO POR EL CSS .deck-tooltip *
-            "fontSize": "18px",
-            "padding": "15px",
-            "borderRadius": "10px",
-            "border": "2px solid #E67E22",
-            "zIndex": "1000",
-            "boxShadow": "0px 4px 15px rgba(0,0,0,0.5)"
-        }
-    }
-
-    layer_text = pdk.Layer(
-        "TextLayer",
-        data=df_rutas,
-        get_position="source",
-        get_text="origen",
-        get_color=[0, 0, 0],
-        get_size=26,
-        get_alignment_baseline="'bottom'",
-        background=True,
-        get_background_color=[255, 255, 255, 240]
+    ventana = st.date_input(
+        "Ventana del pronóstico de demanda (grosor de cada ruta)",
+        value=(INICIO_TEMPORADA, FIN_TEMPORADA), key="ventana_pronostico"
     )
-
-    view_state = pdk.ViewState(latitude=23.5, longitude=-101.0, zoom=4.2, pitch=40)
-
-    r = pdk.Deck(
-        layers=[layer_arc, layer_text],
-        initial_view_state=view_state,
-        map_style=None,
-        height=850,
-        tooltip=deck_tooltip
-    )
-    st.pydeck_chart(r, use_container_width=True)
+    # Mientras se elige el rango el widget devuelve solo la primera fecha
+    inicio, fin = ventana if len(ventana) == 2 else (INICIO_TEMPORADA, FIN_TEMPORADA)
+
+    with perfil.actual().bloque("mapa_rutas"):
+        od = rutas.matriz_od()
+        if len(od.origen) <= rutas.UMBRAL_TOOLTIP_EN_LINEA:
+            st.pydeck_chart(graficas.crear_mapa_rutas(inicio=inicio, fin=fin), use_container_width=True)
+        else:
+            # Matriz OD completa: detalle por zoom y perfil solo del arco seleccionado
+            zoom = st.select_slider(
+                "Nivel de detalle del mapa", options=[4.2, 5.5, 7.0],
+                format_func={4.2: "País", 5.5: "Región", 7.0: "Ciudad"}.get
+            )
+            evento = st.pydeck_chart(
+                graficas.crear_mapa_rutas(zoom=zoom, inicio=inicio, fin=fin), use_container_width=True,
+                on_select="rerun", selection_mode="single-object", key="mapa_rutas"
+            )
+            seleccion = evento.selection.objects.get("arcos") if evento else None
+            if seleccion:
+                arco = rutas.detalle_arco(od, seleccion[0]["i"])
+                st.info(
+                    f"**Ruta: {arco['origen']} ➡ {arco['destino']}**  \n"
+                    f"📈 T. Alta: **{arco['alta']}** · 📉 Motivo: **{arco['normal']}** · "
+                    f"👨‍👩‍👧‍👦 Target: **{arco['segmento']}**"
+                )
+        pronostico = demanda.pronostico(inicio, fin)
+        por_segmento = demanda.total_por_segmento(pronostico)
+        principal = pronostico.segmentos[por_segmento.argmax()] if len(por_segmento) else "—"
+        st.caption(
+            f"Pronóstico {inicio:%d/%m} – {fin:%d/%m/%Y}: **{por_segmento.sum():,.0f} paquetes**; "
+            f"segmento principal: **{principal}**."
+        )
 
     st.divider()
 
     # --- RELLENO DE ESPACIO (TARJETAS HTML DE PILARES) ---
     st.markdown("### 💡 Pilares de Operación")
 
-    col_html1, col_html2, col_html3 = st.columns(3)
-
-    with col_html1:
-        st.markdown("""
-        <div class="pilar-card">
-            <div class="pilar-icon">📍</div>
-            <div class="pilar-title">Alcance</div>
-            <div class="pilar-value">6 Estados</div>
-            <div class="pilar-desc">Fase 1: Hubs Turísticos Clave</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col_html2:
-        st.markdown("""
-        <div class="pilar-card">
-            <div class="pilar-icon">🚗</div>
-            <div class="pilar-title">Transporte</div>
-            <div class="pilar-value">Privado</div>
-            <div class="pilar-desc">Aeropuerto - Hotel Garantizado</div>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col_html3:
-        st.markdown("""
-        <div class="pilar-card">
-            <div class="pilar-icon">🛡️</div>
-            <div class="pilar-title">Seguridad</div>
-            <div class="pilar-value">100%</div>
-            <div class="pilar-desc">Monitoreo Digital 24/7</div>
-        </div>
-        """, unsafe_allow_html=True)
+    with perfil.actual().bloque("pilares"):
+        for columna, pilar in zip(st.columns(len(datos.PILARES)), datos.PILARES):
+            with columna:
+                st.markdown(estilo.tarjeta_pilar(*pilar), unsafe_allow_html=True)
 
     st.divider()
 
     # --- 2. ECOSISTEMA ---
+    construccion.adelantar([
+        construccion.pedido(graficas.crear_grafica_valor_cliente),
+        construccion.pedido(graficas.crear_grafica_estructura),
+        construccion.pedido(graficas.crear_grafica_radar),
+        construccion.pedido(graficas.crear_grafica_tecnologia),
+    ])
     st.markdown("### 2. El Ecosistema KUALI")
     c1, c2 = st.columns(2)
 
     with c1:
         st.markdown("#### 2.1. Valor al Cliente")
-        fig_pie = go.Figure(data=[go.Pie(
-            labels=["Logística", "Hospedaje", "Tecnología", "Experiencias"],
-            values=[40, 30, 20, 10], hole=.4,
-            textinfo='label+percent',
-            textfont=dict(size=20, color="black"),
-            marker=dict(colors=["#2874A6", "#E67E22", "#2ECC71", "#F1C40F"], line=dict(color='#000000', width=2)),
-            hovertemplate='<b>%{label}</b><br>Aporte: %{percent}<extra></extra>'
-        )])
-        st.plotly_chart(update_fig_layout(fig_pie, 400), use_container_width=True)
+        grafica(graficas.crear_grafica_valor_cliente)
         st.info("El 40% del valor es la **solución logística (Leasing)** integrada.")
 
     with c2:
         st.markdown("#### 2.2. Estructura Operativa")
-        fig_sun = go.Figure(go.Sunburst(
-            labels=["KUALI", "Logística", "Hospedaje", "Tecnología", "Leasing", "Traslado", "Hotel", "Ruta", "IA", "Precio"],
-            parents=["", "KUALI", "KUALI", "KUALI", "Logística", "Logística", "Hospedaje", "Hospedaje", "Tecnología", "Tecnología"],
-            values=[100, 40, 30, 30, 20, 20, 15, 15, 15, 15],
-            branchvalues="total",
-            textinfo='label+percent root',
-            textfont=dict(size=18, color="black"),
-            marker=dict(colors=["#2ECC71", "#3498DB", "#E67E22", "#9B59B6", "#AED6F1", "#AED6F1", "#F5CBA7", "#F5CBA7", "#D2B4DE", "#D2B4DE"], line=dict(color='#000000', width=1)),
-            hovertemplate='<b>%{label}</b><br>Peso Total: %{percentRoot:.1%}<extra></extra>'
-        ))
-        st.plotly_chart(update_fig_layout(fig_sun, 400), use_container_width=True)
+        grafica(graficas.crear_grafica_estructura)
         st.info("Distribución porcentual del modelo de negocio total.")
 
     st.divider()
 
     # --- 3. RADAR ---
     st.markdown("### 3. Ventaja Competitiva")
-    fig_radar = go.Figure()
-    fig_radar.add_trace(go.Scatterpolar(r=[5, 5, 5, 5, 4], theta=['Transparencia', 'Precio', 'Logística', 'Ética', 'Servicio'], fill='toself', name='KUALI', line_color='#2ECC71', hovertemplate='<b>KUALI:</b> %{r}/5<extra></extra>'))
-    fig_radar.add_trace(go.Scatterpolar(r=[2, 2, 1, 1, 2], theta=['Transparencia', 'Precio', 'Logística', 'Ética', 'Servicio'], fill='toself', name='OTAs', line_color='#E74C3C', hovertemplate='<b>OTAs:</b> %{r}/5<extra></extra>'))
-    fig_radar.update_layout(
-        polar=dict(
-            radialaxis=dict(visible=True, range=[0, 5], tickfont=dict(size=16, color='black')),
-            angularaxis=dict(tickfont=dict(size=20, color='black'))
-        )
-    )
-    st.plotly_chart(update_fig_layout(fig_radar, 550), use_container_width=True)
+    grafica(graficas.crear_grafica_radar)
 
     st.divider()
 
     # --- 4. TECNOLOGÍA ---
     st.markdown("### 4. Motor Tecnológico")
 
-    fig_tech = px.bar(
-        x=[80, 100, 95, 100], y=['Automatización API', 'Algoritmo Antibias', 'Cloud', 'Seguridad'],
-        orientation='h', text=[80, 100, 95, 100],
-        title="Nivel de Madurez Tecnológica",
-        color_discrete_sequence=['#0A3069']
-    )
-    fig_tech.update_layout(xaxis_title="%", yaxis_title="", showlegend=False)
-    fig_tech.update_traces(
-        texttemplate='%{text}%',
-        textposition='outside',
-        textfont_size=24,
-        textfont_color="black",
-        marker_line_color='black',
-        marker_line_width=2,
-        hovertemplate='<b>%{y}</b>: %{x}% Completado<extra></extra>'
-    )
-    st.plotly_chart(update_fig_layout(fig_tech, 450), use_container_width=True)
+    grafica(graficas.crear_grafica_tecnologia)
 
 # ==============================================================================
 # PESTAÑA 2: FINANCIERO
 # ==============================================================================
-with tab2:
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto",
+         "septiembre", "octubre", "noviembre", "diciembre"]
+
+def seccion_financiero():
+    with perfil.importando("financiero"):
+        from kuali import construccion, escenarios, finanzas, graficas, montecarlo, sensibilidad  # noqa: F401
+    preparar_datos()
+
     st.header("📈 Análisis Financiero")
+    analisis_financiero()
+
+def panel_escenario():
+    from kuali import escenarios
+
+    # Widgets what-if; la ayuda de cada uno dice qué figuras recalcula
+    with st.expander("🧪 Escenario what-if", expanded=False):
+        columnas = st.columns(len(escenarios.ENTRADAS))
+        valores = {}
+        for columna, (clave, entrada) in zip(columnas, escenarios.ENTRADAS.items()):
+            # El valor inicial vive en session_state para que "Restablecer" pueda escribirlo
+            st.session_state.setdefault(f"escenario_{clave}", entrada.base)
+            valores[clave] = columna.slider(
+                entrada.etiqueta, entrada.minimo, entrada.maximo, step=entrada.paso,
+                format=entrada.formato, key=f"escenario_{clave}",
+                help="Recalcula: " + ", ".join(escenarios.afectadas(clave)),
+            )
+        st.button("Restablecer valores base", on_click=restablecer_escenario)
+    return escenarios.Escenario(**valores)
+
+def restablecer_escenario():
+    from kuali import escenarios
+
+    for clave, entrada in escenarios.ENTRADAS.items():
+        st.session_state[f"escenario_{clave}"] = entrada.base
+
+# Todas las figuras financieras dependen de algún widget what-if y la simulación
+# depende de los cuatro, así que forman un solo grupo del grafo: un fragmento.
+# Mover un widget vuelve a ejecutar solo este fragmento (ni el mapa ni el
+# mercado); dentro, cada figura recibe solo sus entradas (escenarios.argumentos)
+# y las que no dependen del widget movido salen de la caché sin recalcularse.
+@st.fragment
+def analisis_financiero():
+    # En un rerun del fragmento el perfil de la página ya se cerró: el fragmento mide con el suyo
+    with perfil.fragmento("financiero"):
+        contenido_financiero()
+
+def contenido_financiero():
+    from kuali import construccion, escenarios, finanzas, graficas, montecarlo
+
+    escenario = panel_escenario()
+    simulado = escenarios.o_base(escenario)
+    construccion.adelantar([
+        construccion.pedido(constructor, **escenarios.argumentos(nombre, escenario))
+        for nombre, constructor in (
+            ("inversion", graficas.crear_grafica_inversion),
+            ("financiamiento", graficas.crear_grafica_financiamiento),
+            ("proyeccion", graficas.crear_grafica_proyeccion),
+            ("eficiencia", graficas.crear_grafica_eficiencia),
+        )
+    ])
 
     # 1. INVERSION
-    st.subheader("1. Inversión Inicial: $1.2 M")
+    st.subheader(f"1. Inversión Inicial: ${escenario.inversion / 1e6:.1f} M")
     c_inv1, c_inv2 = st.columns(2)
     with c_inv1:
-        fig_pie_inv = px.pie(
-            df_inversion_inicial,
-            values='Monto Total (MXN)',
-            names='Concepto',
-            hole=0.4,
-            color_discrete_sequence=['#E74C3C', '#3498DB', '#F1C40F', '#2ECC71']
-        )
-        fig_pie_inv.update_traces(
-            textinfo='percent+label',
-            textfont_size=24,
-            textfont_color="black",
-            marker=dict(line=dict(color='#000000', width=2)),
-            hovertemplate='<b>%{label}</b><br>Monto: %{value:$,.0f}<extra></extra>'
-        )
-        st.plotly_chart(update_fig_layout(fig_pie_inv, height=700), use_container_width=True)
+        grafica(graficas.crear_grafica_inversion, **escenarios.argumentos("inversion", escenario))
 
     with c_inv2:
         st.markdown("#### Fuentes de Financiamiento")
-        labels_source = ['Capital Propio (Socios)', 'Financiamiento (Deuda)']
-        values_source = [900000, 300000]
-        colors_source = ['#FF6F61', '#48C9B0']
-
-        fig_source = go.Figure(data=[go.Pie(
-            labels=labels_source, values=values_source, hole=.6,
-            textinfo='label+percent',
-            textfont=dict(size=22, color="black"),
-            marker=dict(colors=colors_source, line=dict(color='#000000', width=2)),
-            hovertemplate='<b>%{label}</b>: %{value:$,.0f}<extra></extra>'
-        )])
-        fig_source.update_layout(
-            annotations=[dict(text='<b>$1.2M</b>', x=0.5, y=0.5, font_size=50, showarrow=False, font_color="black")],
-            showlegend=True,
-            legend=dict(font=dict(size=20))
-        )
-        st.plotly_chart(update_fig_layout(fig_source, height=550), use_container_width=True)
+        grafica(graficas.crear_grafica_financiamiento, **escenarios.argumentos("financiamiento", escenario))
 
     st.divider()
 
     # 2. PROYECCIÓN
     st.subheader("2. Proyección de Ingresos")
-    df_melt = df_proyeccion_ingresos.melt(id_vars=['Concepto'], var_name='Año', value_name='Monto')
-    fig_bar = px.bar(df_melt, x='Año', y='Monto', color='Concepto', text_auto='.2s', color_discrete_sequence=['#2ECC71', '#F39C12', '#3498DB'])
-    fig_bar.update_traces(textfont_size=20, textfont_color="black", marker_line_color='black', marker_line_width=1.5, hovertemplate='<b>%{x}</b><br>Monto: %{y:$,.0f}<extra></extra>')
-    st.plotly_chart(update_fig_layout(fig_bar, 500), use_container_width=True)
+    grafica(graficas.crear_grafica_proyeccion, **escenarios.argumentos("proyeccion", escenario))
 
     # --- REEMPLAZO: GRÁFICA COMBINADA DE ESCALABILIDAD ---
     st.markdown("#### Evolución de la Eficiencia Operativa")
 
-    anios = ['Año 1', 'Año 2', 'Año 3']
-    ingresos = [10930000, 13920000, 18770000]
-    costos_operativos_pct = [68, 62, 55] # Eficiencia mejora
-
-    fig_combo = go.Figure()
-    fig_combo.add_trace(go.Bar(
-        x=anios, y=ingresos, name='Ingresos Totales',
-        marker_color='#3498DB', text=ingresos, texttemplate='%{text:.2s}', textposition='inside',
-        hovertemplate='<b>Ingreso:</b> %{y:$,.0f}<extra></extra>'
-    ))
-    fig_combo.add_trace(go.Scatter(
-        x=anios, y=costos_operativos_pct, name='Costo Operativo (%)',
-        yaxis='y2', mode='lines+markers+text', text=[f"{v}%" for v in costos_operativos_pct], textposition='top center',
-        line=dict(color='#E74C3C', width=5), marker=dict(size=12, color='red'),
-        hovertemplate='<b>Costo:</b> %{y}%<extra></extra>'
-    ))
-
-    fig_combo.update_layout(
-        template='plotly_white',
-        paper_bgcolor='#FFFFFF', plot_bgcolor='#FFFFFF',
-        font=dict(color='black', size=18),
-        height=500,
-        yaxis=dict(title='Ingresos (MXN)', showgrid=True, gridcolor='#EAEDED'),
-        yaxis2=dict(title='Costo Operativo (%)', overlaying='y', side='right', range=[0, 100], showgrid=False),
-        legend=dict(x=0.1, y=1.1, orientation='h'),
-        hovermode='x unified',
-        hoverlabel=dict(bgcolor="#0A3069", font=dict(color="#FFFFFF", size=24), bordercolor="#E67E22")
+    grafica(graficas.crear_grafica_eficiencia, **escenarios.argumentos("eficiencia", escenario))
+    _, costos = escenarios.serie_eficiencia(costo_pp=escenario.costo_pp)
+    st.success(
+        f"📉 **Eficiencia:** Al escalar, nuestros costos operativos bajan del {costos[0]}% al {costos[-1]}%, "
+        "aumentando el margen neto."
+    )
+
+    # --- FLUJO MENSUAL Y PUNTO DE EQUILIBRIO (MODELO kuali.finanzas) ---
+    st.markdown("#### Flujo de Efectivo Mensual")
+    meses = st.select_slider("Horizonte (meses)", options=list(range(finanzas.MESES_MIN, finanzas.MESES_MAX + 1, 12)),
+                             value=60, key="horizonte_meses")
+    with perfil.actual().bloque("modelo_flujo"):
+        modelo = finanzas.resumen(simulado, meses)
+    c_f1, c_f2, c_f3, c_f4 = st.columns(4)
+    c_f1.metric("Punto de Equilibrio", f"{modelo['paquetes_equilibrio']:.1f} paquetes/mes",
+                f"{escenario.paquetes - modelo['paquetes_equilibrio']:+.1f} vs escenario")
+    c_f2.metric("Recuperación", f"{modelo['payback_meses']:.0f} meses" if math.isfinite(modelo['payback_meses']) else "No se recupera")
+    c_f3.metric("Caja Mínima", f"${modelo['caja_minima'] / 1e6:,.2f} M")
+    c_f4.metric(f"VPN a {meses} meses", f"${modelo['vpn'] / 1e6:,.1f} M")
+    grafica(graficas.crear_grafica_flujo, **escenarios.argumentos("flujo", escenario), meses=meses)
+    estacionalidad = finanzas.estructura().estacionalidad
+    st.caption(
+        "El margen por paquetes sigue la estacionalidad del pronóstico de demanda por ruta: "
+        f"pico en {MESES[estacionalidad.argmax()]} ({estacionalidad.max() - 1:+.0%}), "
+        f"mínimo en {MESES[estacionalidad.argmin()]} ({estacionalidad.min() - 1:+.0%})."
     )
-    st.plotly_chart(fig_combo, use_container_width=True)
-    st.success("📉 **Eficiencia:** Al escalar, nuestros costos operativos bajan del 68% al 55%, aumentando el margen neto.")
+    st.markdown("#### Punto de Equilibrio")
+    grafica(graficas.crear_grafica_equilibrio, **escenarios.argumentos("equilibrio", escenario))
 
     st.divider()
 
-    # 3. INDICADORES DINÁMICOS
+    # 3. INDICADORES DINÁMICOS (MEDIANA DE LA SIMULACIÓN MONTE CARLO)
     st.subheader("3. Salud Financiera (KPIs Dinámicos)")
+    with perfil.actual().bloque("simulacion_montecarlo"):
+        kpis = montecarlo.indicadores(escenario=simulado)
+        liquidez, endeudamiento, margen_neto = montecarlo.valores_gauges(escenario=simulado)
     c_k1, c_k2, c_k3 = st.columns(3)
 
     with c_k1:
-        fig_g1 = go.Figure(go.Indicator(
-            mode="gauge+number+delta", value=2.4,
-            title={'text': "Liquidez", 'font': {'color': 'black'}},
-            delta={'reference': 1.5, 'increasing': {'color': "green"}, 'position': "top"},
-            gauge={
-                'axis': {'range': [0, 5], 'tickfont': {'color': 'black', 'size': 18}},
-                'bar': {'color': "#2ECC71"},
-                'bordercolor': "black", 'borderwidth': 2,
-                'threshold': {'value': 1, 'line': {'color': "red", 'width': 4}}
-            },
-            number={'font': {'color': 'black'}}
-        ))
-        st.plotly_chart(update_fig_layout(fig_g1, 350), use_container_width=True)
+        grafica(graficas.crear_gauge_liquidez, liquidez)
         st.caption("Capacidad de Pago vs Ind. (1.5)")
-        st.progress(2.4/5)
+        st.progress(min(max(liquidez, 0)/5, 1.0))
 
     with c_k2:
-        fig_g2 = go.Figure(go.Indicator(
-            mode="gauge+number+delta", value=34,
-            title={'text': "Endeudamiento (%)", 'font': {'color': 'black'}},
-            delta={'reference': 50, 'decreasing': {'color': "green"}, 'increasing': {'color': "red"}},
-            gauge={
-                'axis': {'range': [0, 100], 'tickfont': {'color': 'black', 'size': 18}},
-                'bar': {'color': "#3498DB"},
-                'bordercolor': "black", 'borderwidth': 2
-            },
-            number={'font': {'color': 'black'}}
-        ))
-        st.plotly_chart(update_fig_layout(fig_g2, 350), use_container_width=True)
+        grafica(graficas.crear_gauge_endeudamiento, endeudamiento)
         st.caption("Autonomía vs Límite (50%)")
-        st.progress(34/100)
+        st.progress(min(max(endeudamiento, 0)/100, 1.0))
 
     with c_k3:
-        fig_mar = go.Figure(go.Indicator(
-            mode="gauge+number+delta", value=14,
-            title={'text': "Margen Neto (%)", 'font': {'color': 'black'}},
-            delta={'reference': 10, 'increasing': {'color': "green"}},
-            gauge={
-                'axis': {'range': [0, 25], 'tickfont': {'color': 'black', 'size': 18}},
-                'bar': {'color': "#F39C12"},
-                'threshold': {'value': 10, 'line': {'color': "gray", 'width': 4}}
-            },
-            number={'font': {'color': 'black'}}
-        ))
-        st.plotly_chart(update_fig_layout(fig_mar, 350), use_container_width=True)
+        grafica(graficas.crear_gauge_margen, margen_neto)
         st.caption("Rentabilidad vs Sector (10%)")
-        st.progress(14/25)
+        st.progress(min(max(margen_neto, 0)/25, 1.0))
+
+    st.divider()
+
+    # 4. VIABILIDAD (SIMULACIÓN MONTE CARLO)
+    st.subheader("4. Viabilidad: Simulación Monte Carlo")
+    c_v1, c_v2, c_v3, c_v4 = st.columns(4)
+    c_v1.metric("VPN (P50)", f"${kpis['vpn_p50']/1e6:,.1f} M")
+    c_v2.metric("TIR (P50)", f"{kpis['tir_p50']:.0%}")
+    c_v3.metric("Payback (P50)", f"{kpis['payback_p50']*12:.0f} meses")
+    c_v4.metric("P(VPN > 0)", f"{kpis['prob_vpn_positivo']:.1%}")
+    grafica(graficas.crear_grafica_vpn, escenario=simulado)
+    st.caption("Escenarios de ingresos por línea, costo operativo y mezcla de financiamiento (tasa de descuento 12%).")
+
+    st.divider()
+
+    # 5. SENSIBILIDAD (UNA EVALUACIÓN VECTORIZADA POR VISTA, CACHEADA POR REJILLA)
+    st.subheader("5. Sensibilidad del VPN")
+    rejilla = panel_rejilla(meses)
+    c_s1, c_s2 = st.columns([3, 2])
+    with c_s1:
+        if rejilla is None:
+            st.warning("Elige dos variables distintas para el mapa de calor.")
+        else:
+            grafica(graficas.crear_mapa_sensibilidad, rejilla, simulado)
+    with c_s2:
+        grafica(graficas.crear_grafica_tornado, simulado, meses)
+    st.caption("El tornado lleva cada variable a los extremos de su rango con las demás en el escenario actual.")
+
+def panel_rejilla(meses):
+    from kuali import sensibilidad
+
+    nombres = list(sensibilidad.VARIABLES)
+    etiqueta = lambda nombre: sensibilidad.VARIABLES[nombre].etiqueta  # noqa: E731
+    c_x, c_y = st.columns(2)
+    ejes = []
+    for columna, eje, defecto in ((c_x, "x", "ticket"), (c_y, "y", "paquetes")):
+        with columna:
+            nombre = st.selectbox(f"Eje {eje.upper()}", nombres, index=nombres.index(defecto),
+                                  format_func=etiqueta, key=f"sensibilidad_{eje}")
+            if ejes and ejes[0][0] == nombre:
+                return None
+            variable = sensibilidad.VARIABLES[nombre]
+            # Clave por variable: cada una tiene sus propios límites, tipo y paso
+            minimo, maximo = st.slider(
+                "Rango", variable.minimo, variable.maximo, (variable.minimo, variable.maximo), variable.paso,
+                format=variable.formato, key=f"sensibilidad_rango_{nombre}"
+            )
+            ejes.append((nombre, minimo, maximo))
+    (x, x_min, x_max), (y, y_min, y_max) = ejes
+    return sensibilidad.Rejilla(x, x_min, x_max, y, y_min, y_max, meses=meses)
 
 # ==============================================================================
 # PESTAÑA 3: MERCADO
 # ==============================================================================
-with tab3:
+
+# Históricos disponibles para las gráficas de volatilidad: (inicio, fin, frecuencia).
+# Cada serie se genera (o se lee) una vez por histórico completo; el rango de
+# fechas elegido se recorta sobre ella por búsqueda binaria.
+HISTORICOS = {
+    "Temporada Día de Muertos (diario)": (INICIO_TEMPORADA, FIN_TEMPORADA, "D"),
+    "Año 2025 completo (por hora)": (datetime.date(2025, 1, 1), datetime.date(2025, 12, 31), "h"),
+    "2023 a 2025 (por hora)": (datetime.date(2023, 1, 1), datetime.date(2025, 12, 31), "h"),
+}
+
+def ventana_de_rango(rango, inicio, fin):
+    # Días completos del slider -> ventana ISO; None si cubre todo el histórico
+    desde, hasta = rango
+    if (desde, hasta) == (inicio, fin):
+        return None
+    return (f"{desde}T00:00", f"{hasta}T23:59")
+
+def argumentos_volatilidad(clave, rango, *args):
+    from kuali import muestreo
+
+    # (clave del widget, kwargs del constructor, ¿admite selección por caja?)
+    # Tramos cortos: gráfica fija del rango. Tramos largos: la selección por caja
+    # vuelve a pedir la ventana elegida con más resolución (sin submuestrear de más).
+    inicio, fin, freq = args[-3:]
+    ventana = ventana_de_rango(rango, inicio, fin)
+    clave = f"{clave}_{freq}" if ventana is None else f"{clave}_{freq}_{rango[0]}_{rango[1]}"
+    if len(rango_fechas(rango[0], rango[1], freq)) <= muestreo.ANCHO_PX:
+        return clave, ({} if ventana is None else {"ventana": ventana}), False
+    seleccion = muestreo.ventana_desde_seleccion(st.session_state.get(clave))
+    return clave, {"ventana": seleccion or ventana}, True
+
+def grafica_volatilidad(constructor, clave, rango, *args):
+    from kuali import construccion
+
+    clave, kwargs, seleccionable = argumentos_volatilidad(clave, rango, *args)
+    with perfil.actual().bloque(clave):
+        fig = construccion.figura(constructor, *args, **kwargs)
+        if not seleccionable:
+            st.plotly_chart(fig, use_container_width=True)
+            return
+        st.plotly_chart(
+            fig, use_container_width=True,
+            on_select="rerun", selection_mode="box", key=clave
+        )
+
+def seccion_mercado():
+    with perfil.importando("mercado"):
+        from kuali import construccion, cotizaciones, datos, feeds, graficas, muestreo, volatilidad
+    preparar_datos()
+    # Volcados de cotizaciones: solo esta página grafica precios reales
+    cotizaciones.recargar()
+
     st.header("🎯 Estudio de Mercado")
+    construccion.adelantar([
+        construccion.pedido(graficas.crear_grafica_demanda),
+        construccion.pedido(graficas.crear_grafica_razones),
+    ])
 
     # 1. OPORTUNIDAD (GIGANTE)
     st.subheader("1. Oportunidad: 82% Demanda Insatisfecha")
     col_m1, col_m2 = st.columns([1, 1])
     with col_m1:
-        fig_don = go.Figure(data=[go.Pie(
-            labels=['Migraría a KUALI', 'Otros'],
-            values=[82, 18], hole=.6,
-            marker_colors=['#27AE60', '#D5D8DC'],
-            textinfo='none',
-            marker=dict(line=dict(color='#000000', width=3)),
-            hovertemplate='<b>%{label}:</b> %{percent}<extra></extra>'
-        )])
-        fig_don.update_layout(
-            annotations=[dict(text='<b>82%</b>', x=0.5, y=0.5, font_size=90, showarrow=False, font_color="#000000")]
-        )
-        st.plotly_chart(update_fig_layout(fig_don, 700), use_container_width=True)
+        grafica(graficas.crear_grafica_demanda)
     with col_m2:
         st.markdown("#### ¿Por qué KUALI?")
-        df_razones = pd.DataFrame({
-            'Motivo': ['Desconfianza Cargos Ocultos', 'Odio a Precios Dinámicos', 'Busca Transparencia'],
-            'Porcentaje': [87, 75, 82]
-        })
-        fig_raz = px.bar(
-            df_razones, x='Porcentaje', y='Motivo', orientation='h', text='Porcentaje',
-            color='Porcentaje', color_continuous_scale='Reds'
-        )
-        fig_raz.update_layout(yaxis=dict(autorange="reversed"), showlegend=False)
-        fig_raz.update_traces(texttemplate='%{text}%', textposition='inside', textfont_size=24, textfont_color="white", marker_line_color='black', marker_line_width=1.5, hovertemplate='<b>%{y}:</b> %{x}%<extra></extra>')
-        st.plotly_chart(update_fig_layout(fig_raz, 500), use_container_width=True)
+        grafica(graficas.crear_grafica_razones)
         st.info("El mercado actual está roto por la desconfianza.")
 
     st.divider()
 
     # 2. POSICIONAMIENTO
     st.subheader("2. Posicionamiento Competitivo")
-    st.table(df_precios_competencia)
+    with perfil.actual().bloque("tabla_competencia"):
+        st.table(datos.df_precios_competencia)
 
     st.divider()
 
@@ -754,16 +414,90 @@ with tab3:
     st.subheader("3. Estabilidad vs Volatilidad")
     st.markdown("Comparativa en temporada alta (Día de Muertos).")
 
-    st.plotly_chart(crear_grafica_kuali(), use_container_width=True)
+    historico = st.radio("Histórico de precios", list(HISTORICOS), horizontal=True)
+    inicio, fin, freq = HISTORICOS[historico]
+    col_rango, col_plataformas = st.columns([3, 2])
+    with col_rango:
+        rango = st.slider(
+            "Rango de fechas", min_value=inicio, max_value=fin, value=(inicio, fin),
+            format="DD MMM YYYY", key=f"rango_{historico}"
+        )
+    with col_plataformas:
+        nombres = [p[0] for p in datos.PLATAFORMAS]
+        elegidas = st.multiselect("Plataformas", nombres, default=nombres, key="plataformas_volatilidad")
+    plataformas = [p for p in datos.PLATAFORMAS if p[0] in elegidas]
+
+    volatiles = [(graficas.crear_grafica_kuali, "volatilidad_kuali", ())] + [
+        (graficas.crear_grafica_plataforma, f"volatilidad_{p[0]}", tuple(p)) for p in plataformas
+    ]
+    construccion.adelantar([
+        construccion.pedido(constructor, *args, inicio, fin, freq, **argumentos_volatilidad(clave, rango, inicio, fin, freq)[1])
+        for constructor, clave, args in volatiles
+    ])
+    if len(rango_fechas(rango[0], rango[1], freq)) > muestreo.ANCHO_PX:
+        st.caption("🔍 Selecciona un rango con la caja para ver más detalle; doble clic para regresar.")
+
+    grafica_volatilidad(graficas.crear_grafica_kuali, "volatilidad_kuali", rango, inicio, fin, freq)
 
     st.markdown("#### Competencia (Precios Inestables)")
-    cg1, cg2 = st.columns(2)
-    with cg1:
-        st.plotly_chart(crear_grafica_plataforma("DESPEGAR", "#8E44AD", 0.25, 1.0), use_container_width=True)
-        st.plotly_chart(crear_grafica_plataforma("BOOKING", "#2E86C1", 0.40, 1.02), use_container_width=True)
-    with cg2:
-        st.plotly_chart(crear_grafica_plataforma("EXPEDIA", "#F39C12", 0.20, 1.05), use_container_width=True)
-        st.plotly_chart(crear_grafica_plataforma("PRICETRAVEL", "#3498DB", 0.30, 0.92), use_container_width=True)
+    if feeds.activo() and plataformas:
+        # Los feeds se piden a la vez antes de graficar (cada gráfica toma su instantánea)
+        with perfil.actual().bloque("feeds_precios"):
+            feeds.cargar([p[0] for p in plataformas], inicio, fin, freq)
+    columnas_competencia = st.columns(2)
+    for i, plataforma in enumerate(plataformas):
+        with columnas_competencia[i * 2 // len(plataformas)]:
+            grafica_volatilidad(
+                graficas.crear_grafica_plataforma, f"volatilidad_{plataforma[0]}", rango, *plataforma, inicio, fin, freq
+            )
+            movil = cotizaciones.estadisticas_moviles(plataforma[0])
+            if movil:
+                st.caption(
+                    f"Últimos 7 días: {movil['n']:,} cotizaciones · ${movil['minimo']:,.0f} – ${movil['maximo']:,.0f}"
+                    f" · σ {movil['desviacion'] / movil['media']:.1%} del precio medio"
+                )
+
+    st.markdown("#### Ranking de Volatilidad")
+    with perfil.actual().bloque("ranking_volatilidad"):
+        st.dataframe(
+            graficas.tabla_volatilidad(tuple(plataformas), inicio, fin, freq, ventana_de_rango(rango, inicio, fin)),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "σ móvil (%)": st.column_config.NumberColumn(format="%.1f"),
+                "Pico-valle (%)": st.column_config.NumberColumn(format="%.0f"),
+                "Alza festiva (x)": st.column_config.NumberColumn(format="%.2f"),
+            },
+        )
+    st.caption(
+        f"σ móvil: mediana del coeficiente de variación en ventanas de {volatilidad.VENTANA_DIAS} días · "
+        "Alza festiva: precio medio en Día de Muertos / días normales (lunes a jueves)"
+    )
 
     # --- CIERRE ESTRATÉGICO ---
     st.success("✅ **Conclusión:** KUALI entra en un Océano Azul donde la confianza es la moneda de cambio.")
+
+# ==============================================================================
+# NAVEGACIÓN: SOLO SE EJECUTA LA SECCIÓN ACTIVA
+# ==============================================================================
+# Cada sección es una página con URL propia (/producto, /financiero, /mercado),
+# así los enlaces directos siguen funcionando y un rerun no paga las otras dos.
+pagina = st.navigation([
+    st.Page(seccion_producto, title="Producto y Operación", icon="⚙️", url_path="producto", default=True),
+    st.Page(seccion_financiero, title="Estudio Financiero", icon="📈", url_path="financiero"),
+    st.Page(seccion_mercado, title="Estudio de Mercado", icon="🎯", url_path="mercado"),
+], position="top")
+
+# --- PERFIL DE DESARROLLO (?perfil=1): tiempo y bytes por bloque de la página ---
+if "perfil" in st.query_params:
+    st.session_state["perfil"] = st.query_params["perfil"] == "1"  # se conserva al cambiar de sección
+perfil_ejecucion = perfil.Perfil(
+    pagina.url_path or "producto", perfil.esta_activo(st.session_state), inicio=INICIO_SCRIPT
+).iniciar()
+try:
+    pagina.run()
+finally:
+    perfil_ejecucion.finalizar()
+
+if perfil_ejecucion.activo:
+    perfil.mostrar_panel(perfil_ejecucion)
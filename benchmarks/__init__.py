@@ -0,0 +1 @@
+# Suite de benchmarks del dashboard KUALI (python -m benchmarks).
@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.casos import CASOS, Caso, limpiar_caches
+
+# ==============================================================================
+# EJECUTOR DE BENCHMARKS: python -m benchmarks [--tiempos] [--solo PATRÓN]
+# ==============================================================================
+# Mide tiempo (mediana de N repeticiones), memoria pico (tracemalloc, corrida
+# aparte para no inflar el tiempo) y bytes serializados de cada caso.
+# - Los bytes no dependen de la máquina: se comparan siempre contra
+#   benchmarks/baseline.json (versionada, se regenera con --guardar).
+# - Tiempo y memoria sí dependen de la máquina: solo se comparan con --tiempos,
+#   contra una baseline local sin versionar. La primera corrida la crea y
+#   --actualizar la reescribe.
+# Una regresión termina con código 1.
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BASELINE_LOCAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.local.json")
+
+# Holguras antes de declarar regresión (fracción sobre la baseline)
+TOLERANCIA_TIEMPO = 0.50
+TOLERANCIA_MEMORIA = 0.25
+TOLERANCIA_PAYLOAD = 0.05
+
+# Tiempos por debajo de este valor son ruido de medición
+PISO_TIEMPO_S = 0.005
+
+
+def bytes_payload(resultado):
+    if isinstance(resultado, (int, float)):
+        return int(resultado)
+    if isinstance(resultado, (list, tuple)):
+        return sum(bytes_payload(r) for r in resultado)
+    return len(resultado.to_json().encode("utf-8"))
+
+
+def _ejecutar(caso):
+    limpiar_caches()
+    estado = caso.preparar() if caso.preparar else None
+    inicio = time.perf_counter()
+    resultado = caso.medir(estado) if caso.preparar else caso.medir()
+    return time.perf_counter() - inicio, resultado
+
+
+def medir(caso, repeticiones):
+    if not isinstance(caso, Caso):
+        caso = Caso(caso)
+    tiempos = []
+    for _ in range(repeticiones):
+        tiempo, resultado = _ejecutar(caso)
+        tiempos.append(tiempo)
+
+    tracemalloc.start()
+    try:
+        limpiar_caches()
+        estado = caso.preparar() if caso.preparar else None
+        tracemalloc.reset_peak()
+        caso.medir(estado) if caso.preparar else caso.medir()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "tiempo_s": round(statistics.median(tiempos), 4),
+        "memoria_pico_b": pico,
+        "payload_b": bytes_payload(resultado),
+    }
+
+
+def comparar(nombre, actual, base, local=None):
+    problemas = []
+    limite = base["payload_b"] * (1 + TOLERANCIA_PAYLOAD)
+    if actual["payload_b"] > limite:
+        problemas.append(f"payload {actual['payload_b']:,} B > {limite:,.0f} B")
+    if local:
+        limite = max(local["tiempo_s"], PISO_TIEMPO_S) * (1 + TOLERANCIA_TIEMPO)
+        if actual["tiempo_s"] > limite:
+            problemas.append(f"tiempo {actual['tiempo_s']:.4f}s > {limite:.4f}s")
+        limite = local["memoria_pico_b"] * (1 + TOLERANCIA_MEMORIA)
+        if actual["memoria_pico_b"] > limite:
+            problemas.append(f"memoria {actual['memoria_pico_b']:,} B > {limite:,.0f} B")
+    return [f"{nombre}: {p}" for p in problemas]
+
+
+def _leer(ruta):
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except OSError:
+        return {}
+
+
+def _escribir(ruta, contenido):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(contenido, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de constructores y reruns del dashboard KUALI.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--solo", default="", help="Solo casos cuyo nombre contenga este texto")
+    parser.add_argument("--guardar", action="store_true", help="Escribe los bytes de esta corrida como nueva baseline")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tiempos", action="store_true",
+                        help="Compara también tiempo y memoria contra la baseline local de esta máquina")
+    parser.add_argument("--actualizar", action="store_true",
+                        help="Reescribe la baseline local de tiempo y memoria con esta corrida")
+    parser.add_argument("--baseline-local", default=BASELINE_LOCAL)
+    parser.add_argument("--json", help="Escribe los resultados de esta corrida en un archivo")
+    args = parser.parse_args(argv)
+
+    baseline = _leer(args.baseline)
+    tiempos = args.tiempos or args.actualizar
+    local = _leer(args.baseline_local) if tiempos and not args.actualizar else {}
+
+    resultados = {}
+    regresiones = []
+    print(f"{'caso':<32}{'tiempo':>12}{'memoria pico':>16}{'payload':>14}   vs baseline")
+    for nombre, caso in CASOS.items():
+        if args.solo not in nombre:
+            continue
+        # Un rerun completo es caro: menos repeticiones, pero nunca una sola
+        repeticiones = min(args.repeticiones, 3) if nombre.startswith("app_") else args.repeticiones
+        actual = medir(caso, repeticiones)
+        resultados[nombre] = actual
+        base = baseline.get(nombre)
+        if base:
+            problemas = comparar(nombre, actual, base, local.get(nombre))
+            regresiones += problemas
+            relativo = f"{actual['payload_b'] / max(base['payload_b'], 1):5.2f}x B"
+            if nombre in local:
+                relativo += f"  {actual['tiempo_s'] / max(local[nombre]['tiempo_s'], 1e-9):5.2f}x s"
+            relativo += "  ❌" if problemas else ""
+        else:
+            relativo = "  (nuevo)"
+        print(f"{nombre:<32}{actual['tiempo_s']:>11.4f}s{actual['memoria_pico_b']:>15,}B"
+              f"{actual['payload_b']:>13,}B   {relativo}")
+
+    if args.json:
+        _escribir(args.json, resultados)
+    if tiempos:
+        # Casos sin baseline local (o todos con --actualizar) quedan registrados para la próxima corrida
+        nuevos = {n: {"tiempo_s": r["tiempo_s"], "memoria_pico_b": r["memoria_pico_b"]}
+                  for n, r in resultados.items() if args.actualizar or n not in local}
+        if nuevos:
+            _escribir(args.baseline_local, {**_leer(args.baseline_local), **nuevos})
+            print(f"Baseline local ({len(nuevos)} casos): {args.baseline_local}")
+    if args.guardar:
+        baseline.update({n: {"payload_b": r["payload_b"]} for n, r in resultados.items()})
+        _escribir(args.baseline, baseline)
+        print(f"Baseline actualizada: {args.baseline}")
+        return 0
+    if regresiones:
+        print("\n❌ REGRESIONES DE RENDIMIENTO:", file=sys.stderr)
+        for regresion in regresiones:
+            print(f"   {regresion}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import NamedTuple
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+# ==============================================================================
+# PRUEBA DE CARGA: python -m benchmarks.carga --sesiones 10,50,100
+# ==============================================================================
+# Levanta `streamlit run app.py` en un puerto libre y abre N sesiones headless
+# concurrentes por WebSocket, con el mismo protocolo que el navegador (BackMsg /
+# ForwardMsg). Cada sesión carga la app y recorre los pasos (cambios de página
+# por su ruta en la URL, "/" es la página por defecto, y "rerun" para repetir
+# la actual), con una pausa aleatoria entre pasos como un espectador real.
+# - Latencia de un rerun: desde que se manda hasta que llega script_finished.
+# - CPU y RSS del servidor: de /proc, sumando el árbol de procesos (incluye el
+#   pool de figuras). El RSS por sesión es (pico - base) / N.
+# - Como el navegador, cada sesión avisa qué mensajes ya tiene (cached_message_hashes).
+# Con varias cantidades de sesiones se corre un escalón por cada una contra el
+# mismo servidor; la capacidad es el mayor escalón que cumple el p95 objetivo.
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+PASOS = "rerun,financiero,rerun,mercado,rerun,/"
+PAUSA_S = 1.0               # pausa media entre pasos de una sesión (±50%)
+RAMPA_S = 5.0               # las sesiones de un escalón se abren repartidas en este lapso
+OBJETIVO_P95_S = 2.0
+TIEMPO_LIMITE_S = 120       # un rerun más lento cuenta como error
+ARRANQUE_S = 60             # espera máxima a que el servidor responda /_stcore/health
+MUESTREO_S = 0.25           # periodo de muestreo de RSS
+
+
+class Medicion(NamedTuple):
+    paso: str
+    segundos: float
+    bytes: int
+    ok: bool
+
+
+class Resultado(NamedTuple):
+    sesiones: int
+    reruns: int
+    errores: int
+    p50_s: float
+    p95_s: float
+    p99_s: float
+    reruns_por_s: float
+    kb_por_rerun: float
+    cpu_pct: float              # 100 = un núcleo ocupado todo el escalón
+    cpu_ms_por_rerun: float
+    rss_base_mb: float
+    rss_pico_mb: float
+    rss_por_sesion_mb: float
+    duracion_s: float
+
+
+# ==============================================================================
+# SERVIDOR Y MÉTRICAS DEL PROCESO (/proc)
+# ==============================================================================
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(app, puerto, log):
+    comando = [
+        sys.executable, "-m", "streamlit", "run", app,
+        "--server.headless", "true", "--server.port", str(puerto), "--server.address", "127.0.0.1",
+        "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+    ]
+    servidor = subprocess.Popen(comando, stdout=subprocess.DEVNULL, stderr=log)
+    limite = time.monotonic() + ARRANQUE_S
+    while time.monotonic() < limite:
+        if servidor.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al arrancar (código {servidor.returncode})")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return servidor
+        except OSError:
+            time.sleep(0.2)
+    servidor.terminate()
+    raise RuntimeError(f"El servidor no respondió en {ARRANQUE_S} s")
+
+
+def _arbol(pid):
+    # pid y todos sus descendientes (el pool de construccion, el forkserver...)
+    hijos = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as f:
+                campos = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        hijos.setdefault(int(campos[1]), []).append(int(entrada))
+    pendientes, arbol = [pid], []
+    while pendientes:
+        actual = pendientes.pop()
+        arbol.append(actual)
+        pendientes += hijos.get(actual, [])
+    return arbol
+
+
+def cpu_s(pid):
+    total = 0
+    for p in _arbol(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                campos = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += int(campos[11]) + int(campos[12])      # utime + stime
+    return total / os.sysconf("SC_CLK_TCK")
+
+
+def rss_mb(pid):
+    total = 0
+    for p in _arbol(pid):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                total += next(int(linea.split()[1]) for linea in f if linea.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            continue
+    return total / 1024
+
+
+# ==============================================================================
+# SESIÓN HEADLESS (PROTOCOLO DEL NAVEGADOR)
+# ==============================================================================
+
+class Sesion:
+    def __init__(self, ws):
+        self.ws = ws
+        self.paginas = {}       # ruta de la URL -> page_script_hash ("/" = página por defecto)
+        self.pagina = ""        # "" = página por defecto
+        self.cacheados = set()
+
+    async def correr(self, paso):
+        # "inicio" es la carga de la página por defecto; "rerun" repite la actual
+        if paso not in ("inicio", "rerun"):
+            self.pagina = self.paginas[paso]
+        mensaje = BackMsg()
+        mensaje.rerun_script.query_string = ""
+        mensaje.rerun_script.page_script_hash = self.pagina
+        mensaje.rerun_script.cached_message_hashes.extend(sorted(self.cacheados))
+        inicio = time.perf_counter()
+        await self.ws.send(mensaje.SerializeToString())
+        recibidos, ok = 0, True
+        while True:
+            crudo = await asyncio.wait_for(self.ws.recv(), TIEMPO_LIMITE_S)
+            recibidos += len(crudo)
+            f = ForwardMsg()
+            f.ParseFromString(crudo)
+            tipo = f.WhichOneof("type")
+            if f.metadata.cacheable:
+                self.cacheados.add(f.hash)
+            if tipo == "navigation":
+                self.paginas = {p.url_pathname or "/": p.page_script_hash for p in f.navigation.app_pages}
+                self.pagina = f.navigation.page_script_hash
+            elif tipo == "delta" and f.delta.WhichOneof("type") == "new_element":
+                ok &= f.delta.new_element.WhichOneof("type") != "exception"
+            elif tipo == "script_finished":
+                if f.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    break
+                if f.script_finished != ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY:
+                    ok = False
+                    break
+        return Medicion(paso, time.perf_counter() - inicio, recibidos, ok)
+
+
+async def _sesion(url, pasos, pausa, retraso, rng, mediciones):
+    await asyncio.sleep(retraso)
+    try:
+        async with websockets.connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=TIEMPO_LIMITE_S) as ws:
+            sesion = Sesion(ws)
+            for paso in ["inicio"] + pasos:
+                mediciones.append(await sesion.correr(paso))
+                await asyncio.sleep(pausa * rng.uniform(0.5, 1.5))
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException, KeyError) as e:
+        mediciones.append(Medicion(f"error:{type(e).__name__}", TIEMPO_LIMITE_S, 0, False))
+
+
+async def _muestrear_rss(pid, picos, fin):
+    while not fin.is_set():
+        picos.append(rss_mb(pid))
+        await asyncio.sleep(MUESTREO_S)
+
+
+async def escalon(url, sesiones, pasos, pausa, rampa, pid=None, semilla=0):
+    rng = random.Random(semilla)
+    mediciones = []
+    base = rss_mb(pid) if pid else float("nan")
+    cpu_inicial = cpu_s(pid) if pid else float("nan")
+    picos, fin = [base], asyncio.Event()
+    muestreo = asyncio.create_task(_muestrear_rss(pid, picos, fin)) if pid else None
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _sesion(url, pasos, pausa, rampa * i / sesiones, random.Random(rng.random()), mediciones)
+        for i in range(sesiones)
+    ))
+    duracion = time.perf_counter() - inicio
+    fin.set()
+    if muestreo is not None:
+        await muestreo
+    cpu = (cpu_s(pid) - cpu_inicial) if pid else float("nan")
+
+    buenas = [m for m in mediciones if m.ok]
+    segundos = np.array([m.segundos for m in buenas]) if buenas else np.array([np.nan])
+    p50, p95, p99 = np.percentile(segundos, [50, 95, 99])
+    pico = max(picos)
+    return Resultado(
+        sesiones=sesiones,
+        reruns=len(buenas),
+        errores=len(mediciones) - len(buenas),
+        p50_s=float(p50), p95_s=float(p95), p99_s=float(p99),
+        reruns_por_s=len(buenas) / duracion,
+        kb_por_rerun=sum(m.bytes for m in buenas) / max(len(buenas), 1) / 1024,
+        cpu_pct=100 * cpu / duracion,
+        cpu_ms_por_rerun=1000 * cpu / max(len(buenas), 1),
+        rss_base_mb=base,
+        rss_pico_mb=pico,
+        rss_por_sesion_mb=(pico - base) / sesiones,
+        duracion_s=duracion,
+    ), mediciones
+
+
+def por_paso(mediciones):
+    pasos = {}
+    for m in mediciones:
+        if m.ok:
+            pasos.setdefault(m.paso, []).append(m.segundos)
+    return {paso: np.percentile(s, [50, 95]).tolist() + [len(s)] for paso, s in pasos.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del dashboard KUALI con sesiones headless concurrentes.")
+    parser.add_argument("--sesiones", default="10", help="Sesiones concurrentes; varias separadas por coma = un escalón cada una")
+    parser.add_argument("--pasos", default=PASOS, help=f"Recorrido de cada sesión después de cargar (default: {PASOS})")
+    parser.add_argument("--pausa", type=float, default=PAUSA_S, help="Pausa media entre pasos, en segundos")
+    parser.add_argument("--rampa", type=float, default=RAMPA_S, help="Lapso en el que se abren las sesiones de un escalón")
+    parser.add_argument("--objetivo-p95", type=float, default=OBJETIVO_P95_S, help="p95 máximo aceptable para la capacidad")
+    parser.add_argument("--app", default=APP)
+    parser.add_argument("--url", help="ws://.../_stcore/stream de un servidor ya corriendo (sin CPU/RSS salvo con --pid)")
+    parser.add_argument("--pid", type=int, help="PID del servidor de --url, para medir su CPU y RSS")
+    parser.add_argument("--log-servidor", default=os.devnull, help="Archivo para el stderr del servidor")
+    parser.add_argument("--json", help="Escribe los resultados en un archivo")
+    args = parser.parse_args(argv)
+    niveles = [int(n) for n in args.sesiones.split(",")]
+    pasos = [p for p in args.pasos.split(",") if p]
+
+    servidor = None
+    with open(args.log_servidor, "w") as log:
+        if args.url:
+            url, pid = args.url, args.pid
+        else:
+            puerto = puerto_libre()
+            servidor = iniciar_servidor(args.app, puerto, log)
+            url, pid = f"ws://127.0.0.1:{puerto}/_stcore/stream", servidor.pid
+        try:
+            # Una sesión de calentamiento: la primera corrida paga importaciones y cachés frías
+            calentamiento, _ = asyncio.run(escalon(url, 1, pasos, 0, 0, pid))
+            print(f"calentamiento: {calentamiento.reruns} reruns, p50 {calentamiento.p50_s:.3f} s, "
+                  f"RSS {calentamiento.rss_pico_mb:,.0f} MB")
+            print(f"{'sesiones':>8}{'reruns':>8}{'errores':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'reruns/s':>10}"
+                  f"{'KB/rerun':>10}{'CPU %':>8}{'CPU ms/rerun':>14}{'RSS pico':>10}{'MB/sesión':>11}")
+            resultados = []
+            for i, n in enumerate(niveles):
+                resultado, mediciones = asyncio.run(escalon(url, n, pasos, args.pausa, args.rampa, pid, semilla=i))
+                resultados.append({**resultado._asdict(), "por_paso": por_paso(mediciones)})
+                print(f"{n:>8}{resultado.reruns:>8}{resultado.errores:>8}{resultado.p50_s:>8.3f}s{resultado.p95_s:>8.3f}s"
+                      f"{resultado.p99_s:>8.3f}s{resultado.reruns_por_s:>10.2f}{resultado.kb_por_rerun:>10.1f}"
+                      f"{resultado.cpu_pct:>8.0f}{resultado.cpu_ms_por_rerun:>14.0f}{resultado.rss_pico_mb:>9,.0f}M"
+                      f"{resultado.rss_por_sesion_mb:>11.2f}")
+        finally:
+            if servidor is not None:
+                servidor.terminate()
+                servidor.wait(timeout=30)
+
+    cumplen = [r["sesiones"] for r in resultados if r["errores"] == 0 and r["p95_s"] <= args.objetivo_p95]
+    if cumplen:
+        print(f"\nCapacidad estimada: {max(cumplen)} sesiones con p95 ≤ {args.objetivo_p95:.1f} s "
+              f"({os.cpu_count()} CPUs)")
+    else:
+        print(f"\nNingún escalón cumple p95 ≤ {args.objetivo_p95:.1f} s sin errores")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"pasos": pasos, "pausa_s": args.pausa, "cpus": os.cpu_count(), "escalones": resultados},
+                      f, indent=2)
+    return 0 if cumplen else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
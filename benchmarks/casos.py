@@ -0,0 +1,328 @@
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from kuali import almacen, api, apptest, catalogo, datos, demanda, feeds, finanzas, graficas, instantanea, montecarlo, rutas, sensibilidad
+from kuali.cache import cache_figuras, cache_series
+from kuali.series import generar_bandas, rango_fechas
+
+# ==============================================================================
+# CASOS DE BENCHMARK
+# ==============================================================================
+# Cada caso es una función sin argumentos que construye algo en frío (cachés
+# vacías) y devuelve el objeto cuyo payload serializado se mide: una figura de
+# Plotly, un Deck de pydeck, una lista de figuras o directamente un número de bytes.
+# Un `Caso` separa además una preparación que no entra en el tiempo medido.
+
+
+class Caso(NamedTuple):
+    medir: Callable[..., Any]
+    preparar: Optional[Callable[[], Any]] = None
+
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+UN_MES = dict(inicio=datetime.date(2025, 10, 10), fin=datetime.date(2025, 11, 5), freq="D")
+UN_ANIO_DIARIO = dict(inicio=datetime.date(2025, 1, 1), fin=datetime.date(2025, 12, 31), freq="D")
+UN_ANIO_HORARIO = dict(inicio=datetime.date(2025, 1, 1), fin=datetime.date(2025, 12, 31), freq="h")
+TRES_ANIOS_HORARIO = dict(inicio=datetime.date(2023, 1, 1), fin=datetime.date(2025, 12, 31), freq="h")
+
+N_PLATAFORMAS = 50
+N_ARCOS_OD = 30_000
+
+
+def limpiar_caches():
+    cache_figuras.limpiar()
+    cache_series.limpiar()
+    rutas.matriz_od.cache_clear()
+    demanda.pronostico.cache_clear()
+    demanda.estacionalidad.cache_clear()
+    finanzas.estructura.cache_clear()
+    montecarlo.simulacion.cache_clear()
+    montecarlo.indicadores.cache_clear()
+    finanzas.resumen.cache_clear()
+    sensibilidad.mapa_calor.cache_clear()
+    sensibilidad.tornado.cache_clear()
+    api.respuestas.limpiar()
+    instantanea.descargar()
+    almacen.desconectar()
+
+
+def _plataforma(rango):
+    def caso():
+        return graficas.crear_grafica_plataforma("DESPEGAR", "#8E44AD", 0.25, 1.0, **rango)
+    return caso
+
+
+def _kuali(rango):
+    def caso():
+        return graficas.crear_grafica_kuali(**rango)
+    return caso
+
+
+def _rango_kuali_3anios():
+    # Mover el slider de fechas: la serie de 3 años ya está en caché y solo se
+    # recorta (búsqueda binaria) y se grafica el tramo de 4 meses
+    def preparar():
+        graficas.bandas_kuali_rango(**TRES_ANIOS_HORARIO)
+
+    def medir(_):
+        return graficas.crear_grafica_kuali(**TRES_ANIOS_HORARIO, ventana=("2024-09-01T00:00", "2024-12-31T23:59"))
+
+    return Caso(medir, preparar)
+
+
+def _plataformas_50():
+    volatilidades = np.linspace(0.10, 0.45, N_PLATAFORMAS)
+    niveles = np.linspace(0.90, 1.10, N_PLATAFORMAS)
+    return [
+        graficas.crear_grafica_plataforma(f"OTA-{i:02d}", "#8E44AD", float(v), float(n), **UN_ANIO_DIARIO)
+        for i, (v, n) in enumerate(zip(volatilidades, niveles))
+    ]
+
+
+def _motor_series_50_horario():
+    bandas = generar_bandas(
+        np.linspace(0.10, 0.45, N_PLATAFORMAS), np.linspace(0.90, 1.10, N_PLATAFORMAS),
+        fechas=rango_fechas(**UN_ANIO_HORARIO), rng=np.random.default_rng(0)
+    )
+    return bandas.precio_prom.nbytes * 3
+
+
+def _volatilidad_50_horario():
+    # Matriz 51 x 8,760 (KUALI + 50 plataformas) y sus cuatro indicadores
+    plataformas = tuple(
+        (f"OTA-{i:02d}", "#8E44AD", float(v), float(n))
+        for i, (v, n) in enumerate(zip(np.linspace(0.10, 0.45, N_PLATAFORMAS), np.linspace(0.90, 1.10, N_PLATAFORMAS)))
+    )
+    return graficas.tabla_volatilidad(plataformas, **UN_ANIO_HORARIO)
+
+
+def _api_bandas_horario():
+    # Serie + JSON + gzip + ETag de una respuesta; el payload es lo que viaja comprimido
+    consulta = {"plataforma": "DESPEGAR", "freq": "h", "inicio": "2025-01-01", "fin": "2025-12-31"}
+    return len(api.resolver("/api/bandas", consulta).comprimido)
+
+
+# Feed de precios simulado: responde como /api/bandas después de LATENCIA_FEED_S
+LATENCIA_FEED_S = 0.2
+_SIMULADOR_FEEDS = None
+
+
+class _FeedSimulado(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        consulta = dict(parse_qsl(urlsplit(self.path).query))
+        time.sleep(LATENCIA_FEED_S)
+        fechas = rango_fechas(
+            datetime.date.fromisoformat(consulta["inicio"]), datetime.date.fromisoformat(consulta["fin"]), consulta["freq"]
+        )
+        bandas = generar_bandas(0.3, 1.0, fechas=fechas, rng=np.random.default_rng(0))
+        cuerpo = json.dumps({
+            "fechas": np.datetime_as_string(fechas).tolist(),
+            **{c: getattr(bandas, c)[0].tolist() for c in ("precio_bajo", "precio_prom", "precio_alto")},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def url_feeds_simulados():
+    # Un servidor por proceso (hilo daemon); devuelve la plantilla para KUALI_FEEDS
+    global _SIMULADOR_FEEDS
+    if _SIMULADOR_FEEDS is None:
+        _SIMULADOR_FEEDS = ThreadingHTTPServer(("127.0.0.1", 0), _FeedSimulado)
+        threading.Thread(target=_SIMULADOR_FEEDS.serve_forever, daemon=True).start()
+    puerto = _SIMULADOR_FEEDS.server_address[1]
+    return f"http://127.0.0.1:{puerto}/feed?plataforma={{plataforma}}&inicio={{inicio}}&fin={{fin}}&freq={{freq}}"
+
+
+def _feeds_4_plataformas():
+    # Cuatro feeds con LATENCIA_FEED_S cada uno, sin instantáneas: en serie serían 4x
+    def preparar():
+        feeds.URL_FEEDS = url_feeds_simulados()
+        feeds.RUTA_ESTADO = os.path.join(tempfile.mkdtemp(prefix="kuali-feeds-"), "feeds.pkl")
+        feeds.olvidar()
+
+    def medir(_):
+        resultado = feeds.cargar([p[0] for p in datos.PLATAFORMAS], **UN_ANIO_HORARIO)
+        return sum(b.precio_prom.nbytes * 3 for b in resultado.values())
+
+    return Caso(medir, preparar)
+
+
+def _almacen_kuali_horario():
+    # Otro proceso ya construyó la figura: este la toma del almacén compartido
+    # con sus cachés en memoria vacías (comparar con kuali_1anio_horario)
+    def preparar():
+        almacen.conectar(os.path.join(tempfile.mkdtemp(prefix="kuali-almacen-"), "cache.sqlite"))
+        graficas.crear_grafica_kuali(**UN_ANIO_HORARIO)
+        cache_figuras.limpiar()
+        cache_series.limpiar()
+
+    def medir(_):
+        return graficas.crear_grafica_kuali(**UN_ANIO_HORARIO)
+
+    return Caso(medir, preparar)
+
+
+def _update_fig_layout():
+    fig = go.Figure(go.Scatter(x=[1, 2, 3], y=[3, 1, 2]))
+    return graficas.update_fig_layout(fig, 350)
+
+
+def _catalogo_plotly():
+    # Todas las gráficas de Plotly de las tres páginas: lo que manda un recorrido completo
+    return [f.construir() for f in catalogo.figuras() if f.id != "mapa_rutas"]
+
+
+def _mapa_rutas():
+    return graficas.crear_mapa_rutas()
+
+
+_OD_SINTETICA = None
+
+
+def archivo_od_sintetico():
+    # Matriz OD reproducible para medir el mapa a escala (se genera una vez)
+    global _OD_SINTETICA
+    if _OD_SINTETICA is None:
+        rng = np.random.default_rng(7)
+        n = N_ARCOS_OD
+        df = pd.DataFrame({
+            "origen": [f"Origen {i % 800}" for i in range(n)],
+            "destino": rng.choice(["CDMX", "Cancún", "Guadalajara", "Monterrey"], n),
+            "lon_origen": rng.uniform(-117, -87, n), "lat_origen": rng.uniform(15, 32, n),
+            "lon_destino": rng.uniform(-117, -87, n), "lat_destino": rng.uniform(15, 32, n),
+            "volumen": (rng.pareto(1.5, n) * 100).round(),
+            "alta": "+45% (Navidad/Verano)", "normal": "Compras & Ocio", "segmento": "20% Familias Norte",
+        })
+        _OD_SINTETICA = os.path.join(tempfile.mkdtemp(prefix="kuali_bench_"), "od.csv")
+        df.to_csv(_OD_SINTETICA, index=False)
+    return _OD_SINTETICA
+
+
+def _mapa_od():
+    return graficas.crear_mapa_rutas(archivo_od_sintetico(), 4.2)
+
+
+def _montecarlo_100k():
+    resultados = montecarlo.simular(100_000, semilla=0, procesos=1)
+    return resultados.vpn.nbytes * len(resultados)
+
+
+# Rejilla de 200 x 200 (40,000 juegos); con tasa y crecimiento variables se
+# toma la ruta de descuento por fila, la más cara de finanzas.vpn
+REJILLA_PRECIO_VOLUMEN = sensibilidad.Rejilla("ticket", 12_000, 40_000, "paquetes", 5, 60, meses=120)
+REJILLA_TASAS = sensibilidad.Rejilla("tasa_descuento", 0.05, 0.30, "crecimiento", -0.10, 0.20, meses=120)
+
+
+def _sensibilidad(rejilla):
+    def caso():
+        return sensibilidad.mapa_calor(rejilla).vpn.nbytes
+    return caso
+
+
+def _tornado():
+    return graficas.crear_grafica_tornado(None, 120)
+
+
+def _tamano_arbol(nodo):
+    total = nodo.proto.ByteSize() if getattr(nodo, "proto", None) is not None else 0
+    hijos = getattr(nodo, "children", None) or {}
+    for hijo in (hijos.values() if isinstance(hijos, dict) else hijos):
+        total += _tamano_arbol(hijo)
+    return total
+
+
+def _rerun_app(seccion, tibio):
+    # Se mide un solo rerun de la sección; arrancar AppTest y navegar a la
+    # página va en la preparación (fuera del tiempo medido)
+    def preparar():
+        from streamlit.testing.v1 import AppTest
+
+        at = AppTest.from_file(APP, default_timeout=120)
+        if seccion or tibio:
+            at.run()
+        if seccion:
+            apptest.ir_a(at, seccion)
+            if tibio:
+                at.run()
+            else:
+                limpiar_caches()
+        return at
+
+    def medir(at):
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"La app falló en '{seccion or 'producto'}': {at.exception[0].value}")
+        return _tamano_arbol(apptest.arbol(at))
+    return Caso(medir, preparar)
+
+
+_INSTANTANEA = None
+
+
+def _rerun_app_instantanea(seccion):
+    # Primera corrida de un proceso que arrancó con KUALI_INSTANTANEA (comparar con app_<seccion>_frio)
+    base = _rerun_app(seccion, tibio=False)
+
+    def preparar():
+        global _INSTANTANEA
+        if _INSTANTANEA is None:
+            _INSTANTANEA = os.path.join(tempfile.mkdtemp(prefix="kuali-instantanea-"), "instantanea.pkl")
+            instantanea.escribir(_INSTANTANEA, APP, log=lambda *_: None)
+        at = base.preparar()
+        limpiar_caches()
+        instantanea.cargar(_INSTANTANEA)
+        return at
+
+    return Caso(base.medir, preparar)
+
+
+CASOS = {
+    "plataforma_1mes": _plataforma(UN_MES),
+    "plataforma_1anio_diario": _plataforma(UN_ANIO_DIARIO),
+    "plataforma_1anio_horario": _plataforma(UN_ANIO_HORARIO),
+    "kuali_1mes": _kuali(UN_MES),
+    "kuali_1anio_horario": _kuali(UN_ANIO_HORARIO),
+    "rango_kuali_3anios_horario": _rango_kuali_3anios(),
+    "plataformas_50_1anio_diario": _plataformas_50,
+    "motor_series_50x1anio_horario": _motor_series_50_horario,
+    "volatilidad_50x1anio_horario": _volatilidad_50_horario,
+    "api_bandas_1anio_horario": _api_bandas_horario,
+    "feeds_4_plataformas_1anio_horario": _feeds_4_plataformas(),
+    "almacen_kuali_1anio_horario": _almacen_kuali_horario(),
+    "update_fig_layout": _update_fig_layout,
+    "catalogo_plotly": _catalogo_plotly,
+    "mapa_rutas": _mapa_rutas,
+    "mapa_od_30k": _mapa_od,
+    "montecarlo_100k": _montecarlo_100k,
+    "sensibilidad_40k_precio_volumen": _sensibilidad(REJILLA_PRECIO_VOLUMEN),
+    "sensibilidad_40k_tasas": _sensibilidad(REJILLA_TASAS),
+    "tornado": _tornado,
+    "app_producto_frio": _rerun_app("", tibio=False),
+    "app_producto_tibio": _rerun_app("", tibio=True),
+    "app_financiero_frio": _rerun_app("financiero", tibio=False),
+    "app_financiero_tibio": _rerun_app("financiero", tibio=True),
+    "app_mercado_frio": _rerun_app("mercado", tibio=False),
+    "app_mercado_tibio": _rerun_app("mercado", tibio=True),
+    "app_producto_instantanea": _rerun_app_instantanea(""),
+    "app_financiero_instantanea": _rerun_app_instantanea("financiero"),
+}
@@ -0,0 +1 @@
+# Motores de cálculo del dashboard KUALI (sin dependencia de Streamlit).
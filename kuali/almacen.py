@@ -0,0 +1,282 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+
+import plotly
+import plotly.graph_objects as go
+
+from kuali import cotizaciones, datos, feeds, rutas
+from kuali.cache import cache_figuras, cache_series
+
+# ==============================================================================
+# CACHÉ COMPARTIDA ENTRE PROCESOS (SQLITE EN DISCO LOCAL)
+# ==============================================================================
+# Con varios servidores de Streamlit detrás de un balanceador, cada proceso
+# tiene sus propias cache_figuras / cache_series y arranca en frío. Con
+# KUALI_CACHE_COMPARTIDA las dos cachés tienen un segundo nivel en un archivo
+# SQLite que leen y escriben todos los procesos: lo que construyó uno lo sirve
+# cualquier otro (y sobrevive a reinicios).
+# - Figuras de Plotly se guardan como su JSON (se arman sin volver a validar);
+#   lo demás (series, tablas, el Deck del mapa) con pickle.
+# - La clave combina la de la caché en memoria con una huella del código del
+#   paquete, las tablas de datos y la versión de Plotly: si algo cambia, las
+#   entradas viejas dejan de encontrarse y salen por LRU.
+# - Tamaño acotado (KUALI_CACHE_COMPARTIDA_MB): al pasarse se borran las
+#   entradas usadas hace más tiempo.
+# - Con precios en vivo (KUALI_FEEDS / KUALI_COTIZACIONES) las series y
+#   gráficas de plataformas no se comparten: dependen de la memoria del proceso.
+# - Un error de SQLite nunca rompe la página: se avisa y se construye normal.
+
+RUTA_CACHE = os.environ.get("KUALI_CACHE_COMPARTIDA")
+MAXIMO_BYTES = int(float(os.environ.get("KUALI_CACHE_COMPARTIDA_MB", 512)) * 2**20)
+TIEMPO_ESPERA_S = 5     # espera por el lock de escritura de otro proceso
+REFRESCO_USO_S = 60     # un acierto actualiza `usado` como mucho una vez por minuto
+
+# Dependen de bandas_plataforma (feeds / volcados de cotizaciones del proceso)
+USAN_PRECIOS_REALES = {"bandas_plataforma", "matriz_precios", "tabla_volatilidad", "crear_grafica_plataforma"}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    clave TEXT PRIMARY KEY,
+    nivel TEXT NOT NULL,
+    formato TEXT NOT NULL,
+    valor BLOB NOT NULL,
+    bytes INTEGER NOT NULL,
+    usado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entradas_usado ON entradas (usado);
+"""
+
+
+def huella():
+    """Código del paquete + tablas de datos + matriz OD + Plotly: cambia con cualquiera de ellos."""
+    h = hashlib.blake2b(digest_size=16)
+    paquete = os.path.dirname(os.path.abspath(__file__))
+    for nombre in sorted(os.listdir(paquete)):
+        if nombre.endswith(".py"):
+            with open(os.path.join(paquete, nombre), "rb") as f:
+                h.update(nombre.encode("utf-8") + f.read())
+    h.update(repr(datos.firmas()).encode("utf-8"))
+    if rutas.RUTA_OD:
+        estado = os.stat(rutas.RUTA_OD)
+        h.update(f"{rutas.RUTA_OD}:{estado.st_mtime_ns}:{estado.st_size}".encode("utf-8"))
+    h.update(plotly.__version__.encode("utf-8"))
+    return h.hexdigest()
+
+
+def serializar(valor):
+    if isinstance(valor, go.Figure):
+        return "figura", valor.to_json().encode("utf-8")
+    return "pickle", pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def deserializar(formato, contenido):
+    if formato == "figura":
+        return go.Figure(json.loads(contenido), _validate=False)
+    return pickle.loads(contenido)
+
+
+class Almacen:
+    """Un archivo SQLite (modo WAL) con tope de bytes y desalojo por último uso."""
+
+    def __init__(self, ruta, maximo_bytes=MAXIMO_BYTES):
+        self.ruta = ruta
+        self.maximo_bytes = maximo_bytes
+        self._local = threading.local()     # una conexión por hilo
+        self._huella = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.errores = 0
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        with self._conexion() as conexion:
+            conexion.executescript(_ESQUEMA)
+
+    def _conexion(self):
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=TIEMPO_ESPERA_S, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+        return conexion
+
+    def olvidar_huella(self):
+        # Los datos cambiaron: la siguiente lectura recalcula la huella
+        with self._lock:
+            self._huella = None
+
+    def _clave(self, clave):
+        with self._lock:
+            if self._huella is None:
+                self._huella = huella()
+            prefijo = self._huella
+        texto = repr(clave)
+        if " at 0x" in texto:
+            return None     # el repr lleva una dirección de memoria: no es estable entre procesos
+        return prefijo + ":" + hashlib.blake2b(texto.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _error(self, accion, e):
+        self.errores += 1
+        print(f"[almacen] {accion}: {type(e).__name__}: {e}; se sigue sin caché compartida", file=sys.stderr)
+
+    def leer(self, clave):
+        if not compartible(clave):
+            return None
+        llave = self._clave(clave)
+        if llave is None:
+            return None
+        try:
+            conexion = self._conexion()
+            fila = conexion.execute(
+                "SELECT formato, valor, usado FROM entradas WHERE clave = ?", (llave,)
+            ).fetchone()
+            if fila is None:
+                self.fallos += 1
+                return None
+            formato, contenido, usado = fila
+            ahora = time.time()
+            if ahora - usado > REFRESCO_USO_S:
+                conexion.execute("UPDATE entradas SET usado = ? WHERE clave = ?", (ahora, llave))
+            valor = deserializar(formato, contenido)
+        except Exception as e:
+            self._error("leer", e)
+            return None
+        self.aciertos += 1
+        return valor
+
+    def escribir(self, clave, valor, nivel=""):
+        if not compartible(clave):
+            return
+        llave = self._clave(clave)
+        if llave is None:
+            return
+        try:
+            formato, contenido = serializar(valor)
+            if len(contenido) > self.maximo_bytes:
+                return
+            conexion = self._conexion()
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                conexion.execute(
+                    "INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?, ?, ?)",
+                    (llave, nivel, formato, contenido, len(contenido), time.time()),
+                )
+                self._desalojar(conexion)
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            self._error("escribir", e)
+
+    def _desalojar(self, conexion):
+        total, = conexion.execute("SELECT COALESCE(SUM(bytes), 0) FROM entradas").fetchone()
+        if total <= self.maximo_bytes:
+            return
+        sobrante = total - self.maximo_bytes
+        for llave, tamano in conexion.execute("SELECT clave, bytes FROM entradas ORDER BY usado").fetchall():
+            if sobrante <= 0:
+                break
+            conexion.execute("DELETE FROM entradas WHERE clave = ?", (llave,))
+            sobrante -= tamano
+
+    def resumen(self):
+        conexion = self._conexion()
+        filas = conexion.execute(
+            "SELECT nivel, formato, COUNT(*), SUM(bytes) FROM entradas GROUP BY nivel, formato ORDER BY nivel, formato"
+        ).fetchall()
+        return {
+            "ruta": self.ruta,
+            "maximo_bytes": self.maximo_bytes,
+            "entradas": [{"nivel": n, "formato": f, "n": c, "bytes": b} for n, f, c, b in filas],
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "errores": self.errores,
+        }
+
+    def vaciar(self):
+        self._conexion().execute("DELETE FROM entradas")
+
+
+class Respaldo:
+    # Lo que CacheLRU ve como `respaldo`: un nivel (figuras / series) del almacén
+    def __init__(self, almacen, nivel):
+        self.almacen = almacen
+        self.nivel = nivel
+
+    def leer(self, clave):
+        return self.almacen.leer(clave)
+
+    def escribir(self, clave, valor):
+        self.almacen.escribir(clave, valor, self.nivel)
+
+
+def compartible(clave):
+    if clave[0] in USAN_PRECIOS_REALES and (feeds.activo() or cotizaciones.RUTA_COTIZACIONES):
+        return False
+    return True
+
+
+_lock = threading.Lock()
+_almacen = None
+
+
+def conectar(ruta=None):
+    """Pone el almacén como segundo nivel de cache_figuras y cache_series (sin ruta ni KUALI_CACHE_COMPARTIDA no hace nada)."""
+    global _almacen
+    ruta = ruta or RUTA_CACHE
+    if not ruta:
+        return None
+    with _lock:
+        if _almacen is None or _almacen.ruta != ruta:
+            try:
+                _almacen = Almacen(os.path.expanduser(ruta))
+            except (OSError, sqlite3.Error) as e:
+                print(f"[almacen] {ruta}: {e}; se sigue sin caché compartida", file=sys.stderr)
+                return None
+            cache_figuras.respaldo = Respaldo(_almacen, "figuras")
+            cache_series.respaldo = Respaldo(_almacen, "series")
+        return _almacen
+
+
+def desconectar():
+    global _almacen
+    with _lock:
+        _almacen = None
+        cache_figuras.respaldo = None
+        cache_series.respaldo = None
+
+
+def _olvidar_huella():
+    if _almacen is not None:
+        _almacen.olvidar_huella()
+
+
+datos.al_cambiar(_olvidar_huella)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Caché de figuras y series compartida entre procesos.")
+    parser.add_argument("ruta", nargs="?", default=RUTA_CACHE, help="Archivo SQLite (default: KUALI_CACHE_COMPARTIDA)")
+    parser.add_argument("--vaciar", action="store_true", help="Borra todas las entradas")
+    args = parser.parse_args(argv)
+    if not args.ruta:
+        print("Define KUALI_CACHE_COMPARTIDA o pasa la ruta del archivo", file=sys.stderr)
+        return 2
+    almacen = Almacen(os.path.expanduser(args.ruta))
+    if args.vaciar:
+        almacen.vaciar()
+    print(json.dumps(almacen.resumen(), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,452 @@
+import argparse
+import asyncio
+import contextlib
+import datetime
+import gzip
+import hashlib
+import http
+import json
+import math
+import sys
+import traceback
+from typing import Any, Callable, NamedTuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from kuali import almacen, cotizaciones, datos, escenarios, feeds, finanzas, graficas, montecarlo
+from kuali.cache import CacheLRU
+from kuali.series import FIN_TEMPORADA, INICIO_TEMPORADA
+
+# ==============================================================================
+# API JSON SIN STREAMLIT (python -m kuali.api)
+# ==============================================================================
+# Expone las bandas de precio, la inversión, la proyección y los KPIs con los
+# mismos constructores y cachés que app.py, sin abrir una sesión por consulta.
+# Servidor HTTP/1.1 mínimo sobre asyncio (solo biblioteca estándar):
+# - Cada respuesta se serializa UNA vez y se guarda con su gzip y su ETag; las
+#   siguientes consultas iguales solo copian bytes, y con If-None-Match
+#   responden 304 sin cuerpo.
+# - El cálculo (NumPy, Monte Carlo) corre en hilos: el event loop sigue
+#   atendiendo aciertos y 304 mientras tanto, y varias consultas iguales que
+#   llegan juntas esperan un solo cálculo.
+# - Cada INTERVALO_RECARGA_S se revisan las tablas, los volcados de
+#   cotizaciones y los feeds (como un rerun de la app); si algo cambió se
+#   vacía la caché.
+
+HOST = "127.0.0.1"
+PUERTO = 8502
+INTERVALO_RECARGA_S = 5.0
+ESPERA_MAXIMA_S = 30.0        # conexión inactiva o cabeceras incompletas
+MAX_CABECERAS = 16 * 1024
+MAX_INSTANTES = 50_000        # puntos por serie de /api/bandas (~5 años por hora)
+MIN_GZIP = 1024               # por debajo de esto comprimir no compensa
+
+
+class Respuesta(NamedTuple):
+    estado: int
+    cuerpo: bytes
+    comprimido: bytes         # gzip del cuerpo; b"" si no conviene
+    etag: str
+
+
+class Endpoint(NamedTuple):
+    descripcion: str
+    parametros: dict                      # nombre -> descripción (para el índice)
+    argumentos: Callable[[dict], dict]    # consulta -> kwargs validados (ValueError = 400)
+    construir: Callable[..., Any]         # kwargs -> objeto JSON
+
+
+# Respuestas serializadas por (ruta, argumentos validados)
+respuestas = CacheLRU(maxsize=256)
+datos.al_cambiar(respuestas.limpiar)
+feeds.al_cambiar(respuestas.limpiar)
+
+_en_curso = {}   # clave -> Future del cálculo (solo desde el event loop)
+
+
+# ==============================================================================
+# PARÁMETROS DE LA CONSULTA
+# ==============================================================================
+
+def _numero(consulta, nombre, minimo, maximo):
+    texto = consulta.get(nombre)
+    if texto is None or texto == "":
+        return None
+    try:
+        valor = float(texto)
+    except ValueError:
+        raise ValueError(f"'{nombre}' debe ser numérico (recibido: {texto!r})") from None
+    if not minimo <= valor <= maximo:
+        raise ValueError(f"'{nombre}' debe estar entre {minimo:g} y {maximo:g} (recibido: {valor:g})")
+    return valor
+
+
+def _fecha(consulta, nombre, por_defecto):
+    texto = consulta.get(nombre)
+    if not texto:
+        return por_defecto
+    try:
+        return datetime.date.fromisoformat(texto)
+    except ValueError:
+        raise ValueError(f"'{nombre}' debe tener formato AAAA-MM-DD (recibido: {texto!r})") from None
+
+
+def _escenario(consulta):
+    valores = {}
+    for nombre, entrada in escenarios.ENTRADAS.items():
+        valor = _numero(consulta, nombre, entrada.minimo, entrada.maximo)
+        if valor is not None:
+            valores[nombre] = valor
+    # Los valores base comparten caché con la app (escenario None)
+    return escenarios.o_base(escenarios.Escenario(**valores))
+
+
+def _meses(consulta):
+    meses = _numero(consulta, "meses", finanzas.MESES_MIN, finanzas.MESES_MAX)
+    return 60 if meses is None else int(meses)
+
+
+def _args_bandas(consulta):
+    plataforma = consulta.get("plataforma", "KUALI").upper()
+    nombres = ["KUALI"] + [p[0] for p in datos.PLATAFORMAS]
+    if plataforma not in nombres:
+        raise ValueError(f"'plataforma' debe ser una de {nombres} (recibido: {plataforma!r})")
+    inicio = _fecha(consulta, "inicio", INICIO_TEMPORADA)
+    fin = _fecha(consulta, "fin", FIN_TEMPORADA)
+    freq = consulta.get("freq", "D")
+    if freq not in ("D", "h"):
+        raise ValueError(f"'freq' debe ser 'D' o 'h' (recibido: {freq!r})")
+    if fin < inicio:
+        raise ValueError("'fin' no puede ser anterior a 'inicio'")
+    instantes = ((fin - inicio).days + 1) * (24 if freq == "h" else 1)
+    if instantes > MAX_INSTANTES:
+        raise ValueError(f"El rango pide {instantes:,} puntos; el máximo es {MAX_INSTANTES:,}")
+    return dict(plataforma=plataforma, inicio=inicio, fin=fin, freq=freq)
+
+
+def _args_inversion(consulta):
+    entrada = escenarios.ENTRADAS["inversion"]
+    return dict(inversion=_numero(consulta, "inversion", entrada.minimo, entrada.maximo))
+
+
+def _args_escenario(consulta):
+    return dict(escenario=_escenario(consulta), meses=_meses(consulta))
+
+
+# ==============================================================================
+# CONSTRUCTORES (LOS MISMOS DATOS QUE LAS GRÁFICAS)
+# ==============================================================================
+
+def _finitos(valores):
+    # JSON no tiene NaN ni infinito (TIR inexistente, recuperación fuera del horizonte)
+    return {n: (v if math.isfinite(v) else None) for n, v in valores.items()}
+
+
+def bandas(plataforma, inicio, fin, freq):
+    if plataforma == "KUALI":
+        b = graficas.bandas_kuali_rango(inicio, fin, freq)
+    else:
+        nombre, _, volatilidad, nivel_precio = next(p for p in datos.PLATAFORMAS if p[0] == plataforma)
+        b = graficas.bandas_plataforma(nombre, volatilidad, nivel_precio, inicio, fin, freq)
+    return {
+        "plataforma": plataforma,
+        "freq": freq,
+        "fechas": np.datetime_as_string(b.fechas).tolist(),
+        "precio_bajo": b.precio_bajo[0].tolist(),
+        "precio_prom": b.precio_prom[0].tolist(),
+        "precio_alto": b.precio_alto[0].tolist(),
+    }
+
+
+def inversion(inversion=None):
+    tabla = escenarios.tabla_inversion(inversion)
+    return {
+        "total": int(tabla['Monto Total (MXN)'].sum()),
+        "conceptos": [
+            {"concepto": concepto, "monto": int(monto), "justificacion": justificacion}
+            for concepto, monto, justificacion in zip(tabla['Concepto'], tabla['Monto Total (MXN)'], tabla['Justificación'])
+        ],
+        "financiamiento": [
+            {"fuente": fuente, "monto": int(monto)}
+            for fuente, monto in zip(datos.labels_source, escenarios.fuentes_financiamiento(inversion))
+        ],
+    }
+
+
+def proyeccion(escenario=None, meses=60):
+    e = escenario or escenarios.Escenario()
+    anual = escenarios.tabla_proyeccion(e.paquetes, e.ticket).set_index('Concepto')
+    proy = finanzas.proyectar(finanzas.desde_escenarios([e]), meses)
+    return {
+        "escenario": e._asdict(),
+        "anual": {anio: {c: int(v) for c, v in anual[anio].items()} for anio in anual.columns},
+        "mensual": {
+            "mes": list(range(1, meses + 1)),
+            "ingresos": proy.ingresos[0].round(2).tolist(),
+            "costos": proy.costos[0].round(2).tolist(),
+            "utilidad_neta": proy.utilidad_neta[0].round(2).tolist(),
+            "flujo": proy.flujos[0, 1:].round(2).tolist(),
+            "caja": proy.caja[0].round(2).tolist(),
+        },
+    }
+
+
+def kpis(escenario=None, meses=60):
+    return {
+        "escenario": (escenario or escenarios.Escenario())._asdict(),
+        "meses": meses,
+        "modelo": _finitos(finanzas.resumen(escenario, meses)),
+        "montecarlo": _finitos(montecarlo.indicadores(escenario=escenario)),
+    }
+
+
+_PARAMETROS_ESCENARIO = {
+    **{nombre: f"{e.etiqueta} ({e.minimo:g} a {e.maximo:g}; base {e.base:g})" for nombre, e in escenarios.ENTRADAS.items()},
+    "meses": f"Horizonte del modelo mensual ({finanzas.MESES_MIN} a {finanzas.MESES_MAX}; base 60)",
+}
+
+ENDPOINTS = {
+    "/api/bandas": Endpoint(
+        "Bandas de precio mínimo / promedio / máximo de KUALI o de una plataforma",
+        {"plataforma": "KUALI o " + ", ".join(p[0] for p in datos.PLATAFORMAS), "inicio": "AAAA-MM-DD",
+         "fin": "AAAA-MM-DD", "freq": "D (diario) u h (por hora)"},
+        _args_bandas, bandas,
+    ),
+    "/api/inversion": Endpoint(
+        "Desglose de la inversión inicial y fuentes de financiamiento",
+        {"inversion": _PARAMETROS_ESCENARIO["inversion"]},
+        _args_inversion, inversion,
+    ),
+    "/api/proyeccion": Endpoint(
+        "Proyección de ingresos anual (tabla del pitch) y mensual (modelo de flujo)",
+        _PARAMETROS_ESCENARIO, _args_escenario, proyeccion,
+    ),
+    "/api/kpis": Endpoint(
+        "Indicadores del modelo mensual y de la simulación Monte Carlo",
+        _PARAMETROS_ESCENARIO, _args_escenario, kpis,
+    ),
+}
+
+
+def indice():
+    return {ruta: {"descripcion": e.descripcion, "parametros": e.parametros} for ruta, e in ENDPOINTS.items()}
+
+
+# ==============================================================================
+# RESPUESTAS (SERIALIZADAS, COMPRIMIDAS Y CON ETAG)
+# ==============================================================================
+
+def empaquetar(estado, objeto):
+    cuerpo = json.dumps(objeto, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+    comprimido = b""
+    if len(cuerpo) >= MIN_GZIP:
+        comprimido = gzip.compress(cuerpo, compresslevel=6, mtime=0)
+        if len(comprimido) >= len(cuerpo):
+            comprimido = b""
+    etag = '"' + hashlib.blake2b(cuerpo, digest_size=12).hexdigest() + '"'
+    return Respuesta(estado, cuerpo, comprimido, etag)
+
+
+def _error(estado, mensaje):
+    return empaquetar(estado, {"error": mensaje})
+
+
+def _clave(ruta, argumentos):
+    return (ruta,) + tuple(sorted(argumentos.items()))
+
+
+def resolver(ruta, consulta):
+    """Respuesta a GET `ruta` con los parámetros `consulta` (versión síncrona, sin servidor)."""
+    if ruta in ("/", "/api"):
+        return respuestas.obtener(("/api",), lambda: empaquetar(200, indice()))
+    endpoint = ENDPOINTS.get(ruta)
+    if endpoint is None:
+        return _error(404, f"No existe {ruta}; ver /api")
+    try:
+        argumentos = endpoint.argumentos(consulta)
+    except ValueError as e:
+        return _error(400, str(e))
+    return respuestas.obtener(_clave(ruta, argumentos), lambda: empaquetar(200, endpoint.construir(**argumentos)))
+
+
+async def resolver_async(ruta, consulta):
+    # Aciertos sin salir del event loop; el cálculo va a un hilo y se comparte
+    endpoint = ENDPOINTS.get(ruta)
+    if endpoint is not None:
+        try:
+            argumentos = endpoint.argumentos(consulta)
+        except ValueError as e:
+            return _error(400, str(e))
+        clave = _clave(ruta, argumentos)
+    else:
+        clave = ("/api",) if ruta in ("/", "/api") else None
+    if clave is None:
+        return _error(404, f"No existe {ruta}; ver /api")
+
+    guardada = respuestas.buscar(clave)
+    if guardada is not None:
+        return guardada
+    futuro = _en_curso.get(clave)
+    if futuro is None:
+        futuro = asyncio.get_running_loop().run_in_executor(None, resolver, ruta, consulta)
+        _en_curso[clave] = futuro
+        futuro.add_done_callback(lambda _: _en_curso.pop(clave, None))
+    try:
+        return await asyncio.shield(futuro)
+    except Exception:
+        traceback.print_exc()
+        return _error(500, "Error interno al calcular la respuesta")
+
+
+def recargar():
+    """Tablas y volcados de cotizaciones: lo mismo que hace app.py en cada rerun."""
+    datos.recargar()   # si cambió algo, al_cambiar vacía `respuestas`
+    if cotizaciones.recargar():
+        respuestas.limpiar()
+    feeds.revalidar()  # en segundo plano; al llegar precios nuevos también vacía `respuestas`
+
+
+# ==============================================================================
+# HTTP/1.1 (GET y HEAD, keep-alive)
+# ==============================================================================
+
+def _acepta_gzip(valor):
+    for parte in valor.split(","):
+        nombre, _, parametros = parte.partition(";")
+        if nombre.strip().lower() in ("gzip", "*"):
+            q = parametros.strip().lower()
+            return q not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def _coincide(etag, if_none_match):
+    etiquetas = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in etiquetas or etag in etiquetas
+
+
+def _cabeceras_http(respuesta, cabeceras, mantener):
+    """(estado, cabeceras de respuesta, cuerpo) según If-None-Match y Accept-Encoding."""
+    salida = {"Content-Type": "application/json; charset=utf-8"}
+    if respuesta.estado != 200:
+        salida["Cache-Control"] = "no-store"
+        estado, cuerpo = respuesta.estado, respuesta.cuerpo
+    else:
+        # no-cache: el cliente guarda la respuesta pero revalida (304 si no cambió)
+        salida.update({"ETag": respuesta.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+        if _coincide(respuesta.etag, cabeceras.get("if-none-match", "")):
+            estado, cuerpo = 304, b""
+        elif respuesta.comprimido and _acepta_gzip(cabeceras.get("accept-encoding", "")):
+            estado, cuerpo = 200, respuesta.comprimido
+            salida["Content-Encoding"] = "gzip"
+        else:
+            estado, cuerpo = 200, respuesta.cuerpo
+    if respuesta.estado == 405:
+        salida["Allow"] = "GET, HEAD"
+    if estado != 304:
+        salida["Content-Length"] = str(len(cuerpo))
+    salida["Connection"] = "keep-alive" if mantener else "close"
+    return estado, salida, cuerpo
+
+
+async def _enviar(escritor, respuesta, cabeceras, solo_cabeceras, mantener):
+    estado, salida, cuerpo = _cabeceras_http(respuesta, cabeceras, mantener)
+    lineas = [f"HTTP/1.1 {estado} {http.HTTPStatus(estado).phrase}"]
+    lineas += [f"{n}: {v}" for n, v in salida.items()]
+    escritor.write(("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1"))
+    if cuerpo and not solo_cabeceras:
+        escritor.write(cuerpo)
+    await escritor.drain()
+
+
+async def _atender(lector, escritor):
+    try:
+        while True:
+            try:
+                bloque = await asyncio.wait_for(lector.readuntil(b"\r\n\r\n"), ESPERA_MAXIMA_S)
+            except asyncio.LimitOverrunError:
+                await _enviar(escritor, _error(431, "Cabeceras demasiado grandes"), {}, False, False)
+                break
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                break
+
+            linea, *resto = bloque.decode("latin-1").split("\r\n")
+            cabeceras = {}
+            for campo in resto:
+                nombre, separador, valor = campo.partition(":")
+                if separador:
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+            try:
+                metodo, objetivo, version = linea.split(" ")
+                largo = int(cabeceras.get("content-length") or 0)
+                if largo < 0:
+                    raise ValueError(f"Content-Length negativo: {largo}")
+            except ValueError:
+                await _enviar(escritor, _error(400, "Solicitud HTTP mal formada"), {}, False, False)
+                break
+            if largo:
+                # GET y HEAD no llevan cuerpo: se descarta para no desalinear la conexión
+                await lector.readexactly(largo)
+            mantener = version == "HTTP/1.1" and cabeceras.get("connection", "").lower() != "close"
+
+            if metodo in ("GET", "HEAD"):
+                partes = urlsplit(objetivo)
+                ruta = partes.path.rstrip("/") or "/"
+                respuesta = await resolver_async(ruta, dict(parse_qsl(partes.query)))
+            else:
+                respuesta = _error(405, f"Método {metodo} no permitido")
+            await _enviar(escritor, respuesta, cabeceras, metodo == "HEAD", mantener)
+            if not mantener:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        escritor.close()
+        with contextlib.suppress(ConnectionError):
+            await escritor.wait_closed()
+
+
+async def _recargar_periodicamente(intervalo):
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            await loop.run_in_executor(None, recargar)
+        except Exception:
+            traceback.print_exc()
+
+
+async def iniciar(host=HOST, puerto=PUERTO):
+    """Servidor asyncio ya escuchando (puerto=0 elige uno libre)."""
+    await asyncio.get_running_loop().run_in_executor(None, recargar)
+    return await asyncio.start_server(_atender, host, puerto, limit=MAX_CABECERAS, backlog=1024)
+
+
+async def servir(host=HOST, puerto=PUERTO, intervalo_recarga=INTERVALO_RECARGA_S):
+    servidor = await iniciar(host, puerto)
+    recarga = asyncio.create_task(_recargar_periodicamente(intervalo_recarga)) if intervalo_recarga > 0 else None
+    host_real, puerto_real = servidor.sockets[0].getsockname()[:2]
+    print(f"API de KUALI en http://{host_real}:{puerto_real}/api")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        if recarga is not None:
+            recarga.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API JSON de las series y KPIs del dashboard KUALI.")
+    parser.add_argument("--host", default=HOST, help=f"Interfaz de escucha (default: {HOST})")
+    parser.add_argument("--puerto", type=int, default=PUERTO, help=f"Puerto (default: {PUERTO})")
+    parser.add_argument("--recarga", type=float, default=INTERVALO_RECARGA_S,
+                        help="Segundos entre revisiones de las tablas y cotizaciones; 0 la desactiva")
+    args = parser.parse_args(argv)
+    almacen.conectar()
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(servir(args.host, args.puerto, args.recarga))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
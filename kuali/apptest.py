@@ -0,0 +1,49 @@
+# ==============================================================================
+# NAVEGACIÓN DE APPTEST ENTRE PÁGINAS DE st.navigation
+# ==============================================================================
+# AppTest.switch_page solo acepta archivos y las páginas de la app son funciones
+# con url_path, así que la única forma de cambiar de página es fijar el hash de
+# la página destino en atributos privados de AppTest (_page_hash,
+# _registered_pages) y leer el árbol de elementos de _tree. Todo ese acceso
+# queda aquí: fuera del rango de versiones verificado, o si los atributos ya no
+# existen, se levanta NoSoportado y quien llama decide qué hacer.
+
+# Versiones de Streamlit (mayor, menor) en las que se verificaron los atributos
+VERSION_MINIMA = (1, 46)
+VERSION_MAXIMA = (1, 66)
+
+PRIVADOS = ("_page_hash", "_registered_pages", "_tree")
+
+
+class NoSoportado(RuntimeError):
+    pass
+
+
+def verificar(at):
+    """Levanta NoSoportado si esta versión de AppTest no tiene los atributos verificados."""
+    import streamlit
+
+    version = tuple(int(p) for p in streamlit.__version__.split(".")[:2] if p.isdigit())
+    if not VERSION_MINIMA <= version <= VERSION_MAXIMA:
+        raise NoSoportado(f"Streamlit {streamlit.__version__} fuera del rango verificado "
+                          f"{'.'.join(map(str, VERSION_MINIMA))}-{'.'.join(map(str, VERSION_MAXIMA))}")
+    faltan = [a for a in PRIVADOS if not hasattr(at, a)]
+    if faltan:
+        raise NoSoportado(f"AppTest sin {', '.join(faltan)} en Streamlit {streamlit.__version__}")
+
+
+def ir_a(at, url_path):
+    """Hace que el siguiente at.run() ejecute la página con ese url_path ("" = la de inicio)."""
+    verificar(at)
+    paginas = at._registered_pages
+    destino = next((h for h, p in paginas.items() if p.get("url_pathname") == url_path), None)
+    if destino is None:
+        raise NoSoportado(f"AppTest no registró la página '{url_path}' (¿falta un at.run() previo?)")
+    at._page_hash = destino
+    return at
+
+
+def arbol(at):
+    # Raíz del árbol de elementos de la última corrida
+    verificar(at)
+    return at._tree
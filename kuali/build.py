@@ -0,0 +1,193 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import shutil
+import sys
+import time
+
+import plotly
+
+from kuali import almacen, catalogo, cotizaciones, datos, estilo, feeds
+
+# ==============================================================================
+# BUILD ESTÁTICO DEL DASHBOARD (python -m kuali.build)
+# ==============================================================================
+# Ejecuta los constructores una vez y escribe un sitio que cualquier servidor
+# de archivos puede publicar: index.html + plotly.min.js compartido + un JSON
+# por figura + estilo.css. Solo se vuelven a generar las figuras cuya huella
+# (código del paquete, argumentos, datos y volcados de cotizaciones) cambió
+# desde el último build. Con feeds en vivo las gráficas de plataformas se
+# regeneran siempre: su instantánea cambia sin dejar rastro en disco.
+
+SALIDA = "dist"
+MANIFIESTO = "manifest.json"
+
+# Ajustes para la página estática (las secciones se muestran de una en una)
+CSS_ESTATICO = """
+    body { margin: 0; }
+    .block-container { max-width: 1800px; margin: 0 auto; padding: 2rem 2rem 5rem; }
+    nav.kuali-nav { display: flex; gap: 5px; margin-bottom: 30px; }
+    nav.kuali-nav a {
+        font-size: 28px !important; background-color: #E5E8E8; color: #555555 !important;
+        padding: 10px 20px; border-radius: 10px 10px 0 0; text-decoration: none;
+    }
+    nav.kuali-nav a.activa { background-color: #FFFFFF; color: #0A3069 !important; border-top: 6px solid #0A3069; }
+    section.seccion { display: none; }
+    section.seccion.activa { display: block; }
+    .fila { display: flex; gap: 20px; flex-wrap: wrap; }
+    .fila > .bloque { flex: 1 1 45%; min-width: 400px; }
+    .figura { background: #FFFFFF; margin-bottom: 20px; }
+    iframe.mapa { width: 100%; height: 850px; border: 0; }
+"""
+
+# Carga diferida: solo se piden los JSON de la sección visible
+JS_CARGADOR = """
+function mostrar() {
+  const id = (location.hash || '#producto').slice(1);
+  document.querySelectorAll('section.seccion').forEach(s => s.classList.toggle('activa', s.id === id));
+  document.querySelectorAll('nav.kuali-nav a').forEach(a => a.classList.toggle('activa', a.hash === '#' + id));
+  document.querySelectorAll('#' + id + ' .figura[data-src]').forEach(div => {
+    const src = div.dataset.src;
+    div.removeAttribute('data-src');
+    fetch(src).then(r => r.json()).then(f => Plotly.newPlot(div, f.data, f.layout, {responsive: true}));
+  });
+}
+window.addEventListener('hashchange', mostrar);
+window.addEventListener('DOMContentLoaded', mostrar);
+"""
+
+
+def huella_datos():
+    # Código de todo el paquete (ayudantes, estilo, plantilla), tablas, matriz OD y Plotly
+    h = hashlib.blake2b(almacen.huella().encode("utf-8"), digest_size=16)
+    for ruta in cotizaciones.archivos():
+        estado = os.stat(ruta)
+        h.update(f"{ruta}:{estado.st_mtime_ns}:{estado.st_size}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def huella(figura, datos_actuales):
+    constructor = getattr(figura.constructor, "sin_cache", figura.constructor)
+    contenido = "\n".join([constructor.__qualname__, repr(figura.args), datos_actuales])
+    return hashlib.blake2b(contenido.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def reutilizable(figura):
+    # Precios de feeds en vivo: la figura no se puede reconocer por su huella
+    constructor = getattr(figura.constructor, "sin_cache", figura.constructor)
+    return not (feeds.activo() and constructor.__name__ in almacen.USAN_PRECIOS_REALES)
+
+
+def _escribir(ruta, contenido):
+    # Escritura atómica: un servidor nunca entrega un archivo a medias
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+
+
+def _cargar_manifiesto(salida):
+    try:
+        with open(os.path.join(salida, MANIFIESTO), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _copiar_plotly(salida):
+    origen = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+    destino = os.path.join(salida, "plotly.min.js")
+    if not os.path.exists(destino) or os.path.getsize(destino) != os.path.getsize(origen):
+        shutil.copyfile(origen, destino)
+
+
+def _bloque_figura(figura, archivo):
+    titulo = f"<h3>{html.escape(figura.titulo)}</h3>" if figura.titulo else ""
+    if figura.id == "mapa_rutas":
+        return f'{titulo}<iframe class="mapa" src="{archivo}" loading="lazy"></iframe>'
+    return f'{titulo}<div class="figura" data-src="{archivo}"></div>'
+
+
+def _html_seccion(seccion, bloques):
+    partes = []
+    for figura, bloque in bloques:
+        partes.append(bloque)
+        if figura.id == "mapa_rutas":
+            tarjetas = "".join(f'<div class="bloque">{estilo.tarjeta_pilar(*p)}</div>' for p in datos.PILARES)
+            partes.append(f'<h3>💡 Pilares de Operación</h3><div class="fila">{tarjetas}</div>')
+        if figura.id == "razones":
+            tabla = datos.df_precios_competencia.to_html(index=False, border=0)
+            partes.append(f'<h3>2. Posicionamiento Competitivo</h3><div data-testid="stTable">{tabla}</div>')
+    return f'<section id="{seccion}" class="seccion">{"".join(partes)}</section>'
+
+
+def construir_sitio(salida=SALIDA, forzar=False, log=print):
+    os.makedirs(os.path.join(salida, "figuras"), exist_ok=True)
+    manifiesto = {} if forzar else _cargar_manifiesto(salida)
+    datos_actuales = huella_datos()
+    nuevo_manifiesto = {}
+    secciones = {s: [] for s in catalogo.SECCIONES}
+    generadas = 0
+
+    for figura in catalogo.figuras():
+        extension = "html" if figura.id == "mapa_rutas" else "json"
+        archivo = f"figuras/{figura.id}.{extension}"
+        firma = huella(figura, datos_actuales)
+        ruta = os.path.join(salida, archivo)
+        vigente = manifiesto.get(figura.id, {}).get("huella") == firma and os.path.exists(ruta)
+        if not (vigente and reutilizable(figura)):
+            t0 = time.perf_counter()
+            objeto = figura.construir()
+            if extension == "html":
+                contenido = objeto.to_html(as_string=True, notebook_display=False)
+            else:
+                contenido = objeto.to_json()
+            _escribir(ruta, contenido)
+            generadas += 1
+            log(f"  ✓ {figura.id:<24} {len(contenido):>10,} B  {time.perf_counter() - t0:6.3f} s")
+        nuevo_manifiesto[figura.id] = {"huella": firma, "archivo": archivo}
+        secciones[figura.seccion].append((figura, _bloque_figura(figura, archivo)))
+
+    nav = "".join(f'<a href="#{s}">{html.escape(t)}</a>' for s, t in catalogo.SECCIONES.items())
+    cuerpo = "".join(_html_seccion(s, bloques) for s, bloques in secciones.items())
+    pagina = f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>KUALI</title>
+<link rel="stylesheet" href="estilo.css">
+<script src="plotly.min.js"></script>
+<script>{JS_CARGADOR}</script>
+</head>
+<body class="stApp">
+<div class="block-container">
+<h1 class="main-title">KUALI</h1>
+<p class="main-slogan">Transparencia que viaja contigo</p>
+<nav class="kuali-nav">{nav}</nav>
+{cuerpo}
+</div>
+</body>
+</html>
+"""
+    _escribir(os.path.join(salida, "estilo.css"), estilo.CSS + CSS_ESTATICO)
+    _escribir(os.path.join(salida, "index.html"), pagina)
+    _copiar_plotly(salida)
+    _escribir(os.path.join(salida, MANIFIESTO), json.dumps(nuevo_manifiesto, indent=2, sort_keys=True))
+    log(f"{generadas} de {len(nuevo_manifiesto)} figuras regeneradas en {salida}/")
+    return generadas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera el sitio estático del dashboard KUALI.")
+    parser.add_argument("--salida", default=SALIDA, help="Directorio de salida (default: dist)")
+    parser.add_argument("--forzar", action="store_true", help="Regenera todas las figuras")
+    args = parser.parse_args(argv)
+    construir_sitio(args.salida, args.forzar)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
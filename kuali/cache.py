@@ -0,0 +1,150 @@
+import functools
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ==============================================================================
+# CACHÉ DE FIGURAS POR PARÁMETROS (LRU ACOTADA, COMPARTIDA ENTRE SESIONES)
+# ==============================================================================
+# Las figuras viven a nivel de proceso: todas las sesiones de Streamlit reciben
+# el mismo objeto, así que se tratan como INMUTABLES (nunca llamar update_* sobre
+# una figura devuelta por la caché).
+
+
+def semilla_para(clave):
+    # hash() de Python cambia entre procesos; blake2b es estable
+    digest = hashlib.blake2b(repr(clave).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class CacheLRU:
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        # Sube en cada limpiar(): un resultado calculado antes ya no vale
+        self.generacion = 0
+        # Segundo nivel opcional compartido entre procesos (kuali.almacen)
+        self.respaldo = None
+
+    def obtener(self, clave, construir):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            generacion = self.generacion
+        valor = self._del_respaldo(clave, generacion)
+        if valor is not None:
+            return valor
+        # Se construye fuera del lock: dos sesiones pueden construir la misma
+        # clave a la vez, pero el resultado es determinista y gana el primero.
+        return self.publicar(clave, construir(), generacion)
+
+    def recuperar(self, clave):
+        """El valor si ya está calculado (en esta caché o en el respaldo); None si no."""
+        generacion = self.generacion
+        valor = self.buscar(clave)
+        return valor if valor is not None else self._del_respaldo(clave, generacion)
+
+    def _del_respaldo(self, clave, generacion):
+        if self.respaldo is None:
+            return None
+        valor = self.respaldo.leer(clave)
+        return None if valor is None else self.guardar(clave, valor, generacion)
+
+    def buscar(self, clave, defecto=None):
+        # Solo aciertos: para quien no puede bloquearse construyendo (event loop)
+        with self._lock:
+            if clave not in self._datos:
+                return defecto
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return self._datos[clave]
+
+    def guardar(self, clave, valor, generacion=None):
+        """Guarda un valor calculado afuera; se descarta si la caché se vació desde `generacion`."""
+        with self._lock:
+            if generacion is not None and generacion != self.generacion:
+                return valor
+            valor = self._datos.setdefault(clave, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+        return valor
+
+    def publicar(self, clave, valor, generacion):
+        # guardar() + copia en el respaldo, salvo que los datos hayan cambiado mientras se calculaba
+        valor = self.guardar(clave, valor, generacion)
+        if self.respaldo is not None and generacion == self.generacion:
+            self.respaldo.escribir(clave, valor)
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self.generacion += 1
+            self._datos.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+    def elementos(self):
+        # Copia de (clave, valor), de la menos a la más usada
+        with self._lock:
+            return list(self._datos.items())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
+
+    def __contains__(self, clave):
+        with self._lock:
+            return clave in self._datos
+
+
+# Cachés globales del proceso: figuras terminadas y series de datos de las que
+# se derivan (una serie larga se comparte entre varias ventanas de zoom)
+cache_figuras = CacheLRU(maxsize=128)
+cache_series = CacheLRU(maxsize=32)
+
+
+def clave_de(func, args, kwargs):
+    return (func.__qualname__,) + tuple(args) + tuple(sorted(kwargs.items()))
+
+
+def _memoizar(cache, func):
+    usa_rng = "rng" in inspect.signature(func).parameters
+
+    @functools.wraps(func)
+    def envoltura(*args, **kwargs):
+        clave = clave_de(func, args, kwargs)
+
+        def construir():
+            if usa_rng:
+                return func(*args, rng=np.random.default_rng(semilla_para(clave)), **kwargs)
+            return func(*args, **kwargs)
+
+        return cache.obtener(clave, construir)
+
+    envoltura.sin_cache = func
+    return envoltura
+
+
+def figura_cacheada(func):
+    """
+    Memoriza un constructor de figuras por sus argumentos.
+
+    Si el constructor acepta `rng`, recibe un generador sembrado con la clave:
+    la misma llamada produce siempre la misma figura, en cualquier proceso.
+    """
+    return _memoizar(cache_figuras, func)
+
+
+def serie_cacheada(func):
+    # Igual que figura_cacheada, para series numéricas (solo lectura)
+    return _memoizar(cache_series, func)
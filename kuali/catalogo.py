@@ -0,0 +1,61 @@
+from typing import Any, Callable, NamedTuple
+
+from kuali import datos, graficas, montecarlo, sensibilidad
+
+# ==============================================================================
+# CATÁLOGO DE FIGURAS DEL DASHBOARD
+# ==============================================================================
+# Lista única de (sección, figura, constructor, argumentos). La usan los procesos
+# que necesitan "todas las figuras" sin ejecutar la app de Streamlit.
+
+SECCIONES = {
+    "producto": "⚙️ Producto y Operación",
+    "financiero": "📈 Estudio Financiero",
+    "mercado": "🎯 Estudio de Mercado",
+}
+
+
+class Figura(NamedTuple):
+    id: str
+    seccion: str
+    titulo: str
+    constructor: Callable[..., Any]
+    args: tuple = ()
+
+    def construir(self):
+        return self.constructor(*self.args)
+
+
+def figuras(seccion=None):
+    liquidez, endeudamiento, margen_neto = montecarlo.valores_gauges()
+    catalogo = [
+        Figura("mapa_rutas", "producto", "1. Cobertura Operativa: Conectando a México", graficas.crear_mapa_rutas),
+        Figura("valor_cliente", "producto", "2.1. Valor al Cliente", graficas.crear_grafica_valor_cliente),
+        Figura("estructura", "producto", "2.2. Estructura Operativa", graficas.crear_grafica_estructura),
+        Figura("radar", "producto", "3. Ventaja Competitiva", graficas.crear_grafica_radar),
+        Figura("tecnologia", "producto", "4. Motor Tecnológico", graficas.crear_grafica_tecnologia),
+        Figura("inversion", "financiero", "1. Inversión Inicial: $1.2 M", graficas.crear_grafica_inversion),
+        Figura("financiamiento", "financiero", "Fuentes de Financiamiento", graficas.crear_grafica_financiamiento),
+        Figura("proyeccion", "financiero", "2. Proyección de Ingresos", graficas.crear_grafica_proyeccion),
+        Figura("eficiencia", "financiero", "Evolución de la Eficiencia Operativa", graficas.crear_grafica_eficiencia),
+        Figura("flujo", "financiero", "Flujo de Efectivo Mensual", graficas.crear_grafica_flujo),
+        Figura("equilibrio", "financiero", "Punto de Equilibrio", graficas.crear_grafica_equilibrio),
+        Figura("gauge_liquidez", "financiero", "3. Salud Financiera (KPIs Dinámicos)", graficas.crear_gauge_liquidez, (liquidez,)),
+        Figura("gauge_endeudamiento", "financiero", "", graficas.crear_gauge_endeudamiento, (endeudamiento,)),
+        Figura("gauge_margen", "financiero", "", graficas.crear_gauge_margen, (margen_neto,)),
+        Figura("vpn", "financiero", "4. Viabilidad: Simulación Monte Carlo", graficas.crear_grafica_vpn),
+        Figura("sensibilidad", "financiero", "5. Sensibilidad del VPN", graficas.crear_mapa_sensibilidad,
+               (sensibilidad.rejilla_completa(),)),
+        Figura("tornado", "financiero", "", graficas.crear_grafica_tornado, (None, 60)),
+        Figura("demanda", "mercado", "1. Oportunidad: 82% Demanda Insatisfecha", graficas.crear_grafica_demanda),
+        Figura("razones", "mercado", "¿Por qué KUALI?", graficas.crear_grafica_razones),
+        Figura("volatilidad_kuali", "mercado", "3. Estabilidad vs Volatilidad", graficas.crear_grafica_kuali),
+    ]
+    catalogo += [
+        Figura(f"volatilidad_{p[0].lower()}", "mercado", "Competencia (Precios Inestables)" if i == 0 else "",
+               graficas.crear_grafica_plataforma, p)
+        for i, p in enumerate(datos.PLATAFORMAS)
+    ]
+    if seccion is not None:
+        catalogo = [f for f in catalogo if f.seccion == seccion]
+    return catalogo
@@ -0,0 +1,231 @@
+import base64
+import datetime
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from kuali import estilo
+
+# ==============================================================================
+# PAYLOAD COMPACTO DE LAS FIGURAS (PLANTILLA DE LA CASA + ARREGLOS BINARIOS)
+# ==============================================================================
+# Cada st.plotly_chart manda la especificación completa de la figura en cada
+# rerun, y una especificación de Plotly no puede apuntar a una plantilla por
+# nombre: la plantilla viaja dentro de cada figura. Con plotly_white eran
+# ~6.5 KB de 7-11 KB por gráfica, repetidos en todas. Para achicar lo enviado:
+# - Plantilla "kuali": plotly_white sin lo que el dashboard no usa (3D,
+#   ternarias, mapas, escalas de color por defecto, trazas que no se grafican)
+#   más el estilo de la casa (estilo.LAYOUT_GRAFICAS / EJES_GRAFICAS).
+# - `compactar` quita de la figura cada valor que ya da la plantilla o que es
+#   el default de plotly.js; la figura se ve igual.
+# - Fechas: un eje regular viaja como x0 + dx (un número por traza) y uno
+#   irregular (series submuestreadas) como milisegundos en binario.
+# - Flotantes que son enteros se mandan como enteros (Plotly elige i1/i2/i4);
+#   flotantes que caben sin pérdida en float32 van en float32.
+# KUALI_PAYLOAD_COMPACTO=0 vuelve a plotly_white sin compactar (para comparar).
+
+ACTIVO = os.environ.get("KUALI_PAYLOAD_COMPACTO", "1") != "0"
+PLANTILLA = "kuali"
+PLANTILLA_BLANCA = "kuali_blanco"   # plotly_white recortada, sin el estilo de la casa
+
+# Tipos de traza que grafica el dashboard: la plantilla solo lleva los suyos
+TRAZAS = ("scatter", "scattergl", "bar", "pie", "heatmap", "scatterpolar", "histogram")
+# Partes de plotly_white que ninguna figura usa (las escalas de color se dan explícitas)
+SIN_USO = ("scene", "ternary", "geo", "colorscale")
+
+# Defaults de plotly.js que plotly.py / plotly.express escriben igual en cada figura
+DEFECTOS_TRAZA = {
+    "xaxis": "x", "yaxis": "y", "showlegend": True, "legendgroup": "", "textposition": "auto",
+    "marker": {"pattern": {"shape": ""}},
+}
+DEFECTOS_EJE = {"domain": [0.0, 1.0]}
+ANCLA_EJE = {"xaxis": "y", "yaxis": "x"}
+# Trazas que dibujan sobre ejes x / y (pie, indicator, sunburst y polares no tienen)
+CARTESIANAS = {"scatter", "scattergl", "bar", "heatmap", "histogram"}
+
+_FALTA = object()
+
+
+def _plantilla_blanca():
+    blanca = pio.templates["plotly_white"].to_plotly_json()
+    layout = {k: v for k, v in blanca["layout"].items() if k not in SIN_USO}
+    data = {}
+    for tipo in TRAZAS:
+        data[tipo] = [{k: v for k, v in d.items() if k != "colorscale"} for d in blanca["data"].get(tipo, [])]
+    return go.layout.Template(data=data, layout=layout)
+
+
+def registrar():
+    """Registra las plantillas "kuali_blanco" y "kuali" en plotly.io.templates."""
+    blanca = _plantilla_blanca()
+    pio.templates[PLANTILLA_BLANCA] = blanca
+    casa = go.layout.Template(blanca)
+    casa.layout.update(estilo.LAYOUT_GRAFICAS)
+    casa.layout.xaxis.update(estilo.EJES_GRAFICAS)
+    casa.layout.yaxis.update(estilo.EJES_GRAFICAS)
+    pio.templates[PLANTILLA] = casa
+
+
+def plantilla(casa=True):
+    # Nombre de la plantilla para update_layout(template=...)
+    if not ACTIVO:
+        return "plotly_white"
+    return PLANTILLA if casa else PLANTILLA_BLANCA
+
+
+# --- ARREGLOS ---
+
+def _como_fechas(valor):
+    # datetime64 (o lista de date/datetime) -> datetime64[ms]; None si no son fechas
+    if isinstance(valor, np.ndarray):
+        return valor.astype("datetime64[ms]") if valor.dtype.kind == "M" else None
+    if isinstance(valor, (list, tuple)) and valor and isinstance(valor[0], datetime.date):
+        try:
+            return np.array(valor, dtype="datetime64[ms]")
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _numeros(valor):
+    # Sin pérdida: enteros como enteros, lo que cabe exacto en float32 como float32
+    if isinstance(valor, dict) and valor.get("dtype") == "f8" and "bdata" in valor:
+        # Plotly ya lo dejó como arreglo binario de float64
+        original = valor
+        valor = np.frombuffer(base64.b64decode(valor["bdata"]), dtype="<f8")
+        if "shape" in original:
+            valor = valor.reshape([int(n) for n in str(original["shape"]).split(",")])
+    if not isinstance(valor, np.ndarray) or valor.dtype != np.float64 or not valor.size:
+        return valor
+    finitos = np.isfinite(valor)
+    if finitos.all() and np.abs(valor).max() < 2**31 and (valor == np.round(valor)).all():
+        return valor.astype(np.int64)
+    reducido = valor.astype(np.float32)
+    if np.array_equal(reducido[finitos].astype(np.float64), valor[finitos]):
+        return reducido
+    return valor
+
+
+def _compactar_fechas(traza, letra, layout):
+    fechas = _como_fechas(traza.get(letra))
+    if fechas is None or not len(fechas) or np.isnat(fechas).any():
+        return
+    ms = fechas.astype(np.int64)
+    paso = ms[1] - ms[0] if len(ms) > 1 else 0
+    if paso > 0 and (np.diff(ms) == paso).all():
+        # Eje regular: primer instante y paso en milisegundos
+        del traza[letra]
+        traza[letra + "0"] = np.datetime_as_string(fechas[0], unit="s")
+        traza["d" + letra] = int(paso)
+    else:
+        traza[letra] = ms.astype(np.float64)
+    # Con números en lugar de textos el eje ya no se detecta como fecha solo
+    eje = letra + "axis" + traza.get(letra + "axis", letra)[1:]
+    layout.setdefault(eje, {}).setdefault("type", "date")
+
+
+# --- VALORES REPETIDOS ---
+
+def _igual(a, b):
+    if isinstance(a, (np.ndarray, dict)) or isinstance(b, (np.ndarray, dict)):
+        return False
+    if isinstance(a, bool) or isinstance(b, bool):
+        return a is b
+    try:
+        return bool(a == b)
+    except ValueError:
+        return False
+
+
+def _quitar_repetidos(valor, base):
+    # Borra de `valor` (in situ) lo que `base` ya tiene con el mismo valor
+    for llave in list(valor):
+        v, b = valor[llave], base.get(llave, _FALTA)
+        if isinstance(v, dict) and isinstance(b, dict):
+            _quitar_repetidos(v, b)
+            if not v:
+                del valor[llave]
+        elif b is not _FALTA and _igual(v, b):
+            del valor[llave]
+
+
+def _combinar(defectos, plantilla):
+    # Valor efectivo de cada atributo: el de la plantilla si lo da, si no el de plotly.js
+    resultado = dict(defectos)
+    for llave, valor in plantilla.items():
+        if isinstance(valor, dict) and isinstance(resultado.get(llave), dict):
+            resultado[llave] = _combinar(resultado[llave], valor)
+        else:
+            resultado[llave] = valor
+    return resultado
+
+
+def _base_layout(llave, plantilla_layout):
+    nombre = llave.rstrip("0123456789")
+    base = plantilla_layout.get(nombre, {})
+    if nombre in ANCLA_EJE:
+        defectos = dict(DEFECTOS_EJE)
+        if nombre == llave:
+            defectos["anchor"] = ANCLA_EJE[nombre]
+        base = _combinar(defectos, base)
+    return base
+
+
+def _recortar_plantilla(de_plantilla, tipos, layout):
+    # La copia de la plantilla que viaja con la figura solo lleva lo que la figura usa
+    de_plantilla["data"] = {t: v for t, v in de_plantilla.get("data", {}).items() if t in tipos}
+    cartesiana = not tipos or any(t in CARTESIANAS for t in tipos)
+    usa = {
+        "xaxis": cartesiana or "xaxis" in layout,
+        "yaxis": cartesiana or "yaxis" in layout,
+        "polar": "polar" in layout or any(t.endswith("polar") or t.endswith("polargl") for t in tipos),
+        "coloraxis": "coloraxis" in layout,
+        "annotationdefaults": "annotations" in layout,
+        "shapedefaults": "shapes" in layout,
+    }
+    plantilla_layout = de_plantilla.get("layout", {})
+    for llave, se_usa in usa.items():
+        if not se_usa:
+            plantilla_layout.pop(llave, None)
+
+
+def compactar(fig):
+    """La misma figura sin lo que ya dan su plantilla y plotly.js, con arreglos compactos."""
+    if not ACTIVO:
+        return fig
+    spec = fig.to_plotly_json()
+    layout = spec.get("layout", {})
+    de_plantilla = layout.get("template") or {}
+    plantilla_layout = de_plantilla.get("layout", {})
+    plantilla_data = de_plantilla.get("data", {})
+    vistos = {}
+    for traza in spec.get("data", []):
+        for letra in ("x", "y"):
+            _compactar_fechas(traza, letra, layout)
+        for llave, valor in traza.items():
+            traza[llave] = _numeros(valor)
+        # La plantilla asigna sus entradas por tipo en ciclo, en orden de aparición
+        tipo = traza.get("type", "scatter")
+        opciones = plantilla_data.get(tipo) or [{}]
+        base = opciones[vistos.get(tipo, 0) % len(opciones)]
+        vistos[tipo] = vistos.get(tipo, 0) + 1
+        _quitar_repetidos(traza, _combinar(DEFECTOS_TRAZA, {k: v for k, v in base.items() if k != "type"}))
+    for llave in list(layout):
+        if llave == "template":
+            continue
+        if not isinstance(layout[llave], dict):
+            if _igual(layout[llave], plantilla_layout.get(llave, _FALTA)):
+                del layout[llave]
+            continue
+        _quitar_repetidos(layout[llave], _base_layout(llave, plantilla_layout))
+        if not layout[llave]:
+            del layout[llave]
+    if de_plantilla:
+        _recortar_plantilla(de_plantilla, vistos, layout)
+    # La especificación ya se validó al construirse
+    return go.Figure(spec, _validate=False)
+
+
+registrar()
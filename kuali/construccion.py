@@ -0,0 +1,133 @@
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple
+
+import plotly.graph_objects as go
+
+from kuali import cotizaciones, datos, feeds
+from kuali.cache import cache_figuras, clave_de
+
+# ==============================================================================
+# ETAPA DE CONSTRUCCIÓN DE FIGURAS EN PARALELO
+# ==============================================================================
+# Construir una figura de Plotly (validación de cada propiedad, px, layout) es
+# Python puro: con hilos no se gana nada por el GIL. Al entrar a una sección,
+# `adelantar` manda TODAS sus figuras que no estén en caché a un pool de
+# procesos; cada proceso construye la figura y la codifica a JSON. El script
+# solo recoge la especificación terminada y arma una Figure sin volver a
+# validarla, así que la sección tarda lo que la figura más lenta y no la suma.
+# - Procesos con forkserver: se crean desde un proceso limpio (sin los hilos
+#   del servidor de Streamlit) que ya importó kuali.graficas.
+# - La figura recogida entra a cache_figuras con la misma clave que usaría el
+#   constructor: los reruns siguientes no pasan por el pool.
+# - Si las cachés se vaciaron mientras el proceso trabajaba (cambiaron los
+#   datos) el resultado se descarta y la figura se construye aquí.
+# - Con precios reales (KUALI_FEEDS / KUALI_COTIZACIONES) las gráficas de
+#   plataformas se construyen en este proceso: sus datos viven en su memoria.
+
+PROCESOS = int(os.environ.get("KUALI_PROCESOS_FIGURAS", min(os.cpu_count() or 1, 4)))
+
+# Constructores que leen precios en vivo (feeds o volcados) a través de bandas_plataforma
+USAN_PRECIOS_REALES = {"crear_grafica_plataforma"}
+
+
+class Pedido(NamedTuple):
+    constructor: object     # constructor decorado con figura_cacheada
+    args: tuple = ()
+    kwargs: tuple = ()      # pares (nombre, valor) ordenados
+
+
+def pedido(constructor, *args, **kwargs):
+    return Pedido(constructor, args, tuple(sorted(kwargs.items())))
+
+
+_lock = threading.Lock()
+_pool = None
+_pendientes = {}    # clave de caché -> (Future, generación de cache_figuras al enviar)
+
+
+def _pool_procesos():
+    global _pool
+    with _lock:
+        if _pool is None:
+            contexto = multiprocessing.get_context("forkserver")
+            contexto.set_forkserver_preload(["kuali.graficas"])
+            _pool = ProcessPoolExecutor(max_workers=PROCESOS, mp_context=contexto)
+        return _pool
+
+
+def _construir_spec(constructor, args, kwargs):
+    # En el proceso del pool: mismas tablas que el proceso principal, figura -> JSON
+    datos.recargar()
+    return constructor(*args, **dict(kwargs)).to_json()
+
+
+def _en_pool(constructor):
+    if PROCESOS <= 1:
+        return False
+    if constructor.__name__ in USAN_PRECIOS_REALES and (feeds.activo() or cotizaciones.RUTA_COTIZACIONES):
+        return False
+    return True
+
+
+def adelantar(pedidos):
+    """Manda al pool las figuras de `pedidos` que no estén en caché ni en camino; no espera."""
+    for p in pedidos:
+        if not _en_pool(p.constructor):
+            continue
+        clave = clave_de(p.constructor, p.args, dict(p.kwargs))
+        with _lock:
+            if clave in _pendientes:
+                continue
+        if cache_figuras.recuperar(clave) is not None:
+            continue
+        generacion = cache_figuras.generacion
+        try:
+            futuro = _pool_procesos().submit(_construir_spec, p.constructor, p.args, p.kwargs)
+        except BrokenProcessPool:
+            _descartar_pool()
+            return
+        with _lock:
+            _pendientes[clave] = (futuro, generacion)
+
+
+def figura(constructor, *args, **kwargs):
+    """La figura terminada: de la caché, del pool (espera a que termine) o construida aquí."""
+    clave = clave_de(constructor, args, kwargs)
+    with _lock:
+        pendiente = _pendientes.pop(clave, None)
+    if pendiente is not None:
+        futuro, generacion = pendiente
+        try:
+            # La especificación ya viene validada: armarla sin validar es ~5x más barato
+            fig = go.Figure(json.loads(futuro.result()), _validate=False)
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                _descartar_pool()
+            print(f"[construccion] {constructor.__name__}: {e!r}; se construye en el proceso principal", file=sys.stderr)
+        else:
+            return cache_figuras.publicar(clave, fig, generacion)
+    return constructor(*args, **kwargs)
+
+
+def _descartar_pool():
+    # Un proceso murió: el pool ya no acepta trabajo; el siguiente adelantar crea otro
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def cerrar():
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+        _pendientes.clear()
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,446 @@
+import argparse
+import csv
+import glob
+import gzip
+import hashlib
+import io
+import os
+import pickle
+import sys
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from kuali.cache import cache_figuras, cache_series
+from kuali.series import Bandas
+from kuali.ventanas import VentanaMovil
+
+# ==============================================================================
+# INGESTA EN STREAMING DE COTIZACIONES REALES DE OTAs
+# ==============================================================================
+# Los volcados crudos (plataforma, ruta, timestamp, precio) pesan millones de
+# filas en CSV o JSONL. Se leen por trozos de TAMANO_TROZO filas y cada trozo se
+# reduce a (plataforma, hora) -> mínimo, suma, conteo, máximo. El estado nunca
+# crece más allá de plataformas x horas, sin importar el tamaño del volcado.
+# Las bandas diarias se derivan de las horarias sin volver a leer nada.
+#
+# El `AlmacenCotizaciones` guarda ese estado (más una ventana móvil por
+# plataforma) en disco junto con hasta qué byte se leyó cada volcado: un rerun
+# o un proceso nuevo solo procesa las líneas agregadas desde entonces.
+
+# Archivo, directorio o patrón glob con los volcados (.csv, .jsonl, también .gz)
+RUTA_COTIZACIONES = os.environ.get("KUALI_COTIZACIONES")
+# Estado persistido del almacén (bandas horarias, ventanas móviles, avance por volcado)
+RUTA_ESTADO = os.environ.get(
+    "KUALI_ESTADO_COTIZACIONES", os.path.join(os.path.expanduser("~"), ".cache", "kuali", "cotizaciones.pkl")
+)
+
+COLUMNAS = ["plataforma", "timestamp", "precio"]
+TAMANO_TROZO = 100_000  # ~1 KB por fila en memoria mientras se procesa el trozo
+VENTANA_MOVIL_S = 7 * 24 * 3600
+BYTES_HUELLA = 4096  # Inicio del archivo que identifica un volcado (detecta reescrituras)
+
+
+def archivos(ruta=None):
+    ruta = ruta or RUTA_COTIZACIONES
+    if not ruta:
+        return []
+    if os.path.isdir(ruta):
+        ruta = os.path.join(ruta, "*")
+    return sorted(
+        a for a in glob.glob(ruta)
+        if a.endswith((".csv", ".jsonl", ".csv.gz", ".jsonl.gz"))
+    )
+
+
+# --- LECTURA POR TROZOS ---
+
+class _Tramo(io.RawIOBase):
+    # Vista de solo lectura de los siguientes `restantes` bytes de un archivo
+    def __init__(self, archivo, restantes=None):
+        self._archivo = archivo
+        self._restantes = restantes
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        n = len(destino) if self._restantes is None else min(len(destino), self._restantes)
+        leido = self._archivo.read(n)
+        destino[:len(leido)] = leido
+        if self._restantes is not None:
+            self._restantes -= len(leido)
+        return len(leido)
+
+
+def fin_de_lineas_completas(ruta):
+    # Posición tras el último salto de línea: una línea a medio escribir se lee la próxima vez
+    with open(ruta, "rb") as f:
+        fin = f.seek(0, os.SEEK_END)
+        while fin > 0:
+            paso = min(65536, fin)
+            f.seek(fin - paso)
+            i = f.read(paso).rfind(b"\n")
+            if i >= 0:
+                return fin - paso + i + 1
+            fin -= paso
+    return 0
+
+
+def leer_en_trozos(ruta, tamano_trozo=TAMANO_TROZO, desde=0, hasta=None):
+    """
+    Itera un volcado en DataFrames de a lo más `tamano_trozo` filas (solo COLUMNAS).
+    `desde`/`hasta` acotan el rango de bytes a leer.
+    """
+    es_jsonl = ruta.endswith((".jsonl", ".jsonl.gz"))
+    with (gzip.open if ruta.endswith(".gz") else open)(ruta, "rb") as f:
+        nombres = None
+        if not es_jsonl:
+            nombres = next(csv.reader([f.readline().decode("utf-8-sig")]), None)
+            desde = max(desde, f.tell())
+            if nombres is None:
+                return
+        if hasta is not None and hasta <= desde:
+            return
+        f.seek(desde)
+        texto = io.TextIOWrapper(
+            io.BufferedReader(_Tramo(f, None if hasta is None else hasta - desde)), encoding="utf-8"
+        )
+        if es_jsonl:
+            for trozo in pd.read_json(texto, lines=True, chunksize=tamano_trozo, dtype=False):
+                yield trozo[COLUMNAS]
+        else:
+            try:
+                yield from pd.read_csv(texto, names=nombres, header=None, usecols=COLUMNAS, chunksize=tamano_trozo)
+            except pd.errors.EmptyDataError:
+                return
+
+
+def normalizar_trozo(trozo):
+    """(plataforma, instante datetime64[s], precio) de las filas válidas de un trozo."""
+    instantes = (
+        pd.to_datetime(trozo["timestamp"], utc=True, format="ISO8601", errors="coerce")
+        .dt.tz_localize(None).to_numpy().astype("datetime64[s]")
+    )
+    precio = pd.to_numeric(trozo["precio"], errors="coerce").to_numpy(dtype=np.float64)
+    validos = np.isfinite(precio) & ~np.isnat(instantes)
+    plataforma = trozo["plataforma"].astype(str).str.strip().str.upper().to_numpy()
+    return plataforma[validos], instantes[validos], precio[validos]
+
+
+def reducir_trozo(plataforma, instantes, precio):
+    parcial = pd.DataFrame({
+        "plataforma": plataforma,
+        "hora": instantes.astype("datetime64[h]"),
+        "minimo": precio,
+        "suma": precio,
+        "conteo": np.ones(len(precio), dtype=np.int64),
+        "maximo": precio,
+    })
+    return _combinar(parcial)
+
+
+def _combinar(parciales):
+    if isinstance(parciales, list):
+        parciales = pd.concat(parciales, ignore_index=True)
+    return parciales.groupby(["plataforma", "hora"], as_index=False, sort=False).agg(
+        minimo=("minimo", "min"), suma=("suma", "sum"), conteo=("conteo", "sum"), maximo=("maximo", "max")
+    )
+
+
+def ingerir(rutas, tamano_trozo=TAMANO_TROZO):
+    """
+    Agrega los volcados a un DataFrame (plataforma, hora, minimo, suma, conteo,
+    maximo) ordenado por plataforma y hora. La memoria es O(tamano_trozo +
+    plataformas x horas); los parciales se compactan antes de acumular otro trozo.
+    """
+    almacen = AlmacenCotizaciones(ventana_s=None, tamano_trozo=tamano_trozo)
+    for ruta in rutas:
+        for trozo in leer_en_trozos(ruta, tamano_trozo):
+            almacen.agregar(*normalizar_trozo(trozo))
+    return almacen.horario
+
+
+def a_diario(horario):
+    diario = horario.assign(hora=horario["hora"].to_numpy().astype("datetime64[D]"))
+    return _combinar(diario).sort_values(["plataforma", "hora"], ignore_index=True)
+
+
+# ==============================================================================
+# ALMACÉN INCREMENTAL Y PERSISTENTE
+# ==============================================================================
+
+class Lectura(NamedTuple):
+    desplazamiento: int   # bytes ya procesados
+    mtime_ns: int
+    tamano: int
+    huella: str           # blake2b de los primeros bytes (hasta BYTES_HUELLA)
+
+
+def _huella_inicio(ruta, n_bytes):
+    with (gzip.open if ruta.endswith(".gz") else open)(ruta, "rb") as f:
+        return hashlib.blake2b(f.read(n_bytes), digest_size=16).hexdigest()
+
+
+def _recientes(plataforma, instantes, limites):
+    # Máscara de las observaciones posteriores al límite de su plataforma
+    mascara = np.zeros(len(instantes), dtype=bool)
+    for p, limite in limites.items():
+        mascara |= (plataforma == p) & (instantes > limite)
+    return mascara
+
+
+class AlmacenCotizaciones:
+    """
+    Bandas horarias (mínimo, suma, conteo, máximo por plataforma y hora) y una
+    VentanaMovil por plataforma, actualizadas observación por observación.
+    `ventana_s=None` omite las ventanas (solo bandas).
+    """
+
+    VERSION = 2
+
+    def __init__(self, ventana_s=VENTANA_MOVIL_S, tamano_trozo=TAMANO_TROZO):
+        self.ventana_s = ventana_s
+        self.tamano_trozo = tamano_trozo
+        self.reiniciar()
+
+    def reiniciar(self):
+        self._horario = None
+        self._pendientes = []
+        self._filas_pendientes = 0
+        self._diario = None
+        self.ventanas = {}     # plataforma -> VentanaMovil
+        self.lecturas = {}     # ruta -> Lectura
+        self.observaciones = 0
+
+    def agregar(self, plataforma, instantes, precio):
+        """Incorpora observaciones ya normalizadas (ver normalizar_trozo)."""
+        self._agregar_a_cubetas(plataforma, instantes, precio)
+        self._alimentar_ventanas(plataforma, instantes, precio)
+
+    def _agregar_a_cubetas(self, plataforma, instantes, precio):
+        if not len(precio):
+            return
+        self._pendientes.append(reducir_trozo(plataforma, instantes, precio))
+        self._filas_pendientes += len(self._pendientes[-1])
+        if self._filas_pendientes >= self.tamano_trozo:
+            self._compactar()
+        self._diario = None
+        self.observaciones += len(precio)
+
+    def _alimentar_ventanas(self, plataforma, instantes, precio):
+        # En orden temporal; una observación anterior a la última de su plataforma es tardía
+        if self.ventana_s is None or not len(precio):
+            return
+        orden = np.argsort(instantes, kind="stable")
+        segundos = instantes[orden].astype(np.int64).tolist()
+        for p, t, x in zip(plataforma[orden].tolist(), segundos, precio[orden].tolist()):
+            ventana = self.ventanas.get(p)
+            if ventana is None:
+                ventana = self.ventanas[p] = VentanaMovil(self.ventana_s)
+            ventana.agregar(t, x)
+
+    def _compactar(self):
+        if self._pendientes:
+            partes = self._pendientes if self._horario is None else [self._horario] + self._pendientes
+            self._horario = _combinar(partes).sort_values(["plataforma", "hora"], ignore_index=True)
+            self._pendientes, self._filas_pendientes = [], 0
+
+    @property
+    def horario(self):
+        self._compactar()
+        if self._horario is None:
+            return pd.DataFrame({
+                "plataforma": pd.Series(dtype=object), "hora": pd.Series(dtype="datetime64[s]"),
+                "minimo": pd.Series(dtype=np.float64), "suma": pd.Series(dtype=np.float64),
+                "conteo": pd.Series(dtype=np.int64), "maximo": pd.Series(dtype=np.float64),
+            })
+        return self._horario
+
+    @property
+    def diario(self):
+        if self._diario is None:
+            self._diario = a_diario(self.horario)
+        return self._diario
+
+    def actualizar(self, rutas):
+        """
+        Lee solo lo nuevo de cada volcado: las líneas agregadas al final desde la
+        última lectura. Si un volcado desaparece, se acorta o se reescribe (o es
+        .gz y cambió), se reconstruye todo. Devuelve cuántas observaciones entraron.
+        """
+        if set(self.lecturas) - set(rutas):
+            self.reiniciar()
+        antes = self.observaciones
+        # Varios volcados cubren el mismo periodo: a las ventanas se les da lo nuevo
+        # de todos, ya ordenado, y solo lo que cae dentro de la última ventana de
+        # su plataforma (la misma que queda al leer todo desde cero)
+        candidatas, limites = [], {}
+        for ruta in rutas:
+            estado = os.stat(ruta)
+            previa = self.lecturas.get(ruta)
+            if previa and (previa.mtime_ns, previa.tamano) == (estado.st_mtime_ns, estado.st_size):
+                continue
+            if previa and (
+                ruta.endswith(".gz") or estado.st_size < previa.desplazamiento
+                or _huella_inicio(ruta, min(BYTES_HUELLA, previa.desplazamiento)) != previa.huella
+            ):
+                self.reiniciar()
+                return self.actualizar(rutas)
+
+            desde = previa.desplazamiento if previa else 0
+            hasta = None if ruta.endswith(".gz") else fin_de_lineas_completas(ruta)
+            for trozo in leer_en_trozos(ruta, self.tamano_trozo, desde, hasta):
+                plataforma, instantes, precio = normalizar_trozo(trozo)
+                self._agregar_a_cubetas(plataforma, instantes, precio)
+                if self.ventana_s is not None and len(precio):
+                    for p in np.unique(plataforma):
+                        maximo = instantes[plataforma == p].max() - np.timedelta64(self.ventana_s, "s")
+                        limites[p] = max(limites.get(p, maximo), maximo)
+                    recientes = _recientes(plataforma, instantes, limites)
+                    candidatas.append((plataforma[recientes], instantes[recientes], precio[recientes]))
+                    if sum(len(c[2]) for c in candidatas) > self.tamano_trozo:
+                        candidatas = [tuple(v[_recientes(c[0], c[1], limites)] for v in c) for c in candidatas]
+            leido = estado.st_size if hasta is None else hasta
+            self.lecturas[ruta] = Lectura(
+                leido, estado.st_mtime_ns, estado.st_size, _huella_inicio(ruta, min(BYTES_HUELLA, leido))
+            )
+        if candidatas:
+            plataforma, instantes, precio = (np.concatenate(c) for c in zip(*candidatas))
+            recientes = _recientes(plataforma, instantes, limites)
+            self._alimentar_ventanas(plataforma[recientes], instantes[recientes], precio[recientes])
+        self._compactar()
+        return self.observaciones - antes
+
+    def bandas(self, nombre_plataforma, inicio, fin, freq="D"):
+        tabla = self.diario if freq == "D" else self.horario
+        filas = tabla[tabla["plataforma"].to_numpy() == nombre_plataforma.upper()]
+        if filas.empty:
+            return None
+
+        fechas = filas["hora"].to_numpy().astype(f"datetime64[{'D' if freq == 'D' else 'h'}]")
+        desde = np.searchsorted(fechas, np.datetime64(inicio, "D"), side="left")
+        hasta = np.searchsorted(fechas, np.datetime64(fin, "D") + 1, side="left")
+        filas = filas.iloc[desde:hasta]
+        promedio = filas["suma"].to_numpy() / filas["conteo"].to_numpy()
+        return Bandas(
+            fechas=fechas[desde:hasta],
+            precio_bajo=filas["minimo"].to_numpy()[None, :],
+            precio_prom=promedio[None, :],
+            precio_alto=filas["maximo"].to_numpy()[None, :],
+        )
+
+    def estadisticas_moviles(self, nombre_plataforma):
+        ventana = self.ventanas.get(nombre_plataforma.upper())
+        return ventana.resumen() if ventana is not None and ventana.n else None
+
+    def guardar(self, ruta=RUTA_ESTADO):
+        # Escritura atómica: otro proceso nunca lee un estado a medias
+        self._compactar()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        estado = {
+            "version": self.VERSION, "ventana_s": self.ventana_s, "horario": self._horario,
+            "ventanas": self.ventanas, "lecturas": self.lecturas, "observaciones": self.observaciones,
+        }
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            pickle.dump(estado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta=RUTA_ESTADO, ventana_s=VENTANA_MOVIL_S):
+        almacen = cls(ventana_s)
+        try:
+            with open(ruta, "rb") as f:
+                estado = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return almacen
+        if estado.get("version") != cls.VERSION or estado.get("ventana_s") != ventana_s:
+            return almacen
+        almacen._horario = estado["horario"]
+        almacen.ventanas = estado["ventanas"]
+        almacen.lecturas = estado["lecturas"]
+        almacen.observaciones = estado["observaciones"]
+        return almacen
+
+
+# --- ALMACÉN DEL PROCESO ---
+
+# Protege el almacén del proceso, tanto al actualizarlo como al leerlo
+_lock = threading.Lock()
+_almacen = None
+
+
+def almacen():
+    global _almacen
+    with _lock:
+        if _almacen is None:
+            _almacen = AlmacenCotizaciones.cargar()
+        return _almacen
+
+
+def recargar(ruta=None):
+    """
+    Incorpora lo nuevo de los volcados (una vez por rerun). Si algo cambió, se
+    persiste el estado y se descartan las series y figuras cacheadas.
+    """
+    rutas = archivos(ruta)
+    actual = almacen()
+    if not rutas and not actual.lecturas:
+        return 0
+    with _lock:
+        lecturas_previas = dict(actual.lecturas)
+        nuevas = actual.actualizar(rutas)
+        cambio = actual.lecturas != lecturas_previas
+        if cambio:
+            actual.guardar()
+    if cambio:
+        cache_series.limpiar()
+        cache_figuras.limpiar()
+    return nuevas
+
+
+def bandas(nombre_plataforma, inicio, fin, freq="D"):
+    """
+    Bandas reales (1, T) de una plataforma en [inicio, fin] con la forma que usan
+    las gráficas; None si no hay volcados o la plataforma no aparece en ellos.
+    Solo se incluyen los instantes con cotizaciones (el eje puede tener huecos).
+    """
+    if not RUTA_COTIZACIONES:
+        return None
+    actual = almacen()
+    if not actual.lecturas:
+        recargar()
+    # El almacén es del proceso: recargar() de otra sesión lo modifica y leer compacta
+    with _lock:
+        return actual.bandas(nombre_plataforma, inicio, fin, freq)
+
+
+def estadisticas_moviles(nombre_plataforma):
+    """Mínimo, máximo, media y desviación de los últimos 7 días de cotizaciones (o None)."""
+    if not RUTA_COTIZACIONES:
+        return None
+    actual = almacen()
+    with _lock:
+        return actual.estadisticas_moviles(nombre_plataforma)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agrega volcados de cotizaciones a bandas diarias por plataforma.")
+    parser.add_argument("ruta", help="Archivo, directorio o patrón glob (.csv / .jsonl)")
+    parser.add_argument("--trozo", type=int, default=TAMANO_TROZO, help="Filas por trozo")
+    args = parser.parse_args(argv)
+
+    diario = a_diario(ingerir(archivos(args.ruta), args.trozo))
+    resumen = diario.groupby("plataforma").agg(
+        dias=("hora", "size"), desde=("hora", "min"), hasta=("hora", "max"),
+        cotizaciones=("conteo", "sum"), minimo=("minimo", "min"), maximo=("maximo", "max"),
+    )
+    print(resumen.to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
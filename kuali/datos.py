@@ -0,0 +1,237 @@
+import argparse
+import os
+import sys
+import threading
+
+import pandas as pd
+
+# ==============================================================================
+# DATOS GLOBALES DEL PROYECTO
+# ==============================================================================
+# Las tablas del pitch viven en archivos Arrow IPC (o Parquet) en el directorio
+# `datos/` (o el de KUALI_DATOS). Se abren con memory map: varios procesos
+# worker comparten las mismas páginas del sistema operativo en lugar de tener
+# cada uno su copia. `recargar()` (una vez por rerun) compara mtime y tamaño de
+# cada archivo y solo vuelve a leer los que cambiaron; al cambiar algo se
+# avisa a las cachés registradas con `al_cambiar`. Tratar como solo lectura.
+# Si falta un archivo se usa la versión embebida de abajo.
+
+DIRECTORIO = os.environ.get(
+    "KUALI_DATOS", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datos")
+)
+EXTENSIONES = (".arrow", ".parquet")
+
+kpi_inversion_inicial = 1200000
+pe_paquetes_mensuales_c12 = 22
+
+# --- TABLAS EMBEBIDAS (RESPALDO Y FUENTE DE `--exportar`) ---
+TABLAS_POR_DEFECTO = {
+    "inversion_inicial": pd.DataFrame({
+        'Concepto': ['Activos Fijos', 'Activos Intangibles (IA)', 'Trámites', 'Capital Trabajo (Reserva)'],
+        'Monto Total (MXN)': [140500, 695000, 56500, 308000],
+        'Justificación': ['Equipo IA', 'Algoritmo KUALI-Δ', 'Legal/Marca', 'Fondo Reserva Leasing']
+    }),
+    "proyeccion_ingresos": pd.DataFrame({
+        'Concepto': ['Margen Paquetes', 'Comisión Leasing', 'Servicios Tech'],
+        'Año 1': [9500000, 950000, 480000],
+        'Año 2': [12000000, 1200000, 720000],
+        'Año 3': [16200000, 1620000, 950000]
+    }),
+    "competencia_mercado": pd.DataFrame({
+        'Plataforma': ['KUALI', 'Despegar', 'PriceTravel', 'Booking.com', 'Expedia Group'],
+        'Paquetes Ofrecidos': [
+            'Vuelo + Hotel + Traslado + Leasing + Experiencias',
+            'Vuelo + Hotel + MSI',
+            'Vuelo + Hotel + Todo Incluido',
+            'Alojamiento + Desayuno',
+            'Vuelo + Hotel + Autos'
+        ],
+        'Comisión': ['Única (10-15%)', 'Markup', 'Margen + Comisión', '10-25%', '10-30%']
+    }),
+    # --- FINANCIAMIENTO ---
+    "financiamiento": pd.DataFrame({
+        'Fuente': ['Capital Propio (Socios)', 'Financiamiento (Deuda)'],
+        'Monto': [900000, 300000],
+    }),
+    # --- EFICIENCIA OPERATIVA (la eficiencia mejora con la escala) ---
+    "eficiencia": pd.DataFrame({
+        'Año': ['Año 1', 'Año 2', 'Año 3'],
+        'Ingresos': [10930000, 13920000, 18770000],
+        'Costo Operativo (%)': [68, 62, 55],
+    }),
+    # --- RUTAS (MAPA): todas llegan a CDMX ---
+    "rutas": pd.DataFrame({
+        'origen': ['Monterrey', 'Guadalajara', 'Mérida', 'Cancún', 'Puebla', 'Querétaro'],
+        'lon_origen': [-100.3161, -103.3496, -89.5926, -86.8515, -98.2063, -100.3899],
+        'lat_origen': [25.6866, 20.6597, 20.9674, 21.1619, 19.0414, 20.5888],
+        'lon_destino': [-99.1332] * 6,
+        'lat_destino': [19.4326] * 6,
+        'r': [255, 255, 0, 0, 138, 255],
+        'g': [0, 165, 255, 255, 43, 215],
+        'b': [128, 0, 0, 255, 226, 0],
+        'alta': ['+45% (Navidad/Verano)', '+40% (Semana Santa)', '+25% (Vacaciones)',
+                 '+60% (Todo el año)', '+30% (Puentes)', '+35% (Verano)'],
+        'normal': ['Compras & Ocio', 'Cultural', 'Visita Familiar', 'Conexión', 'Fin de Semana', 'Recreativo'],
+        'segmento': ['20% Familias Norte (Ticket Alto)', '18% Familias Tradicionales',
+                     '12% Familias Multigeneracionales', '25% Familias en Retorno/Conexión',
+                     '10% Escapada Familiar Express', '15% Familias Jóvenes con Niños'],
+    }),
+}
+
+# --- PILARES DE OPERACIÓN: (icono, título, valor, descripción) ---
+PILARES = [
+    ("📍", "Alcance", "6 Estados", "Fase 1: Hubs Turísticos Clave"),
+    ("🚗", "Transporte", "Privado", "Aeropuerto - Hotel Garantizado"),
+    ("🛡️", "Seguridad", "100%", "Monitoreo Digital 24/7"),
+]
+
+# --- PLATAFORMAS COMPETIDORAS: (nombre, color, volatilidad, nivel_precio) ---
+PLATAFORMAS = [
+    ("DESPEGAR", "#8E44AD", 0.25, 1.0),
+    ("BOOKING", "#2E86C1", 0.40, 1.02),
+    ("EXPEDIA", "#F39C12", 0.20, 1.05),
+    ("PRICETRAVEL", "#3498DB", 0.30, 0.92),
+]
+
+
+# ==============================================================================
+# CARGA CON MEMORY MAP Y RECARGA POR MTIME
+# ==============================================================================
+_lock = threading.Lock()
+_tablas = {}       # nombre -> DataFrame vigente
+_firmas = {}       # nombre -> (ruta, mtime_ns, tamaño) o None si es la embebida
+_derivados = {}    # caché de las vistas de abajo; se vacía al recargar
+_suscriptores = []
+version = 0
+
+
+def ruta_tabla(nombre, directorio=None):
+    for extension in EXTENSIONES:
+        ruta = os.path.join(directorio or DIRECTORIO, nombre + extension)
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+
+def _firma(nombre):
+    ruta = ruta_tabla(nombre)
+    if ruta is None:
+        return None
+    estado = os.stat(ruta)
+    return (ruta, estado.st_mtime_ns, estado.st_size)
+
+
+def leer_tabla(ruta):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Sin `with`: el mapa debe vivir mientras existan columnas que apunten a él
+    if ruta.endswith(".arrow"):
+        tabla = pa.ipc.open_file(pa.memory_map(ruta)).read_all()
+    else:
+        tabla = pq.read_table(ruta, memory_map=True)
+    return tabla.to_pandas(split_blocks=True)
+
+
+def recargar():
+    """Vuelve a leer solo las tablas cuyo archivo cambió. Devuelve los nombres recargados."""
+    global version
+    cambiadas = []
+    with _lock:
+        for nombre, por_defecto in TABLAS_POR_DEFECTO.items():
+            firma = _firma(nombre)
+            if nombre in _tablas and _firmas.get(nombre) == firma:
+                continue
+            _tablas[nombre] = por_defecto if firma is None else leer_tabla(firma[0])
+            _firmas[nombre] = firma
+            cambiadas.append(nombre)
+        if cambiadas:
+            _derivados.clear()
+            version += 1
+    # La primera carga del proceso no invalida nada: las cachés están vacías
+    if cambiadas and version > 1:
+        for funcion in _suscriptores:
+            funcion()
+    return cambiadas
+
+
+def al_cambiar(funcion):
+    """Registra una función (p. ej. limpiar una caché) que se llama cuando cambian los datos."""
+    _suscriptores.append(funcion)
+    return funcion
+
+
+def tabla(nombre):
+    if nombre not in _tablas:
+        recargar()
+    return _tablas[nombre]
+
+
+def firmas():
+    # Identifica el contenido actual (lo usa el build estático)
+    tabla(next(iter(TABLAS_POR_DEFECTO)))
+    return sorted((n, f[1:] if f else None) for n, f in _firmas.items())
+
+
+def _rutas_data():
+    df = tabla("rutas")
+    return [
+        {"origen": f.origen, "source": [f.lon_origen, f.lat_origen], "target": [f.lon_destino, f.lat_destino],
+         "color": [int(f.r), int(f.g), int(f.b)], "alta": f.alta, "normal": f.normal, "segmento": f.segmento}
+        for f in df.itertuples(index=False)
+    ]
+
+
+# Nombres históricos del módulo: se resuelven contra las tablas vigentes
+_VISTAS = {
+    "df_inversion_inicial": lambda: tabla("inversion_inicial"),
+    "df_proyeccion_ingresos": lambda: tabla("proyeccion_ingresos"),
+    "df_precios_competencia": lambda: tabla("competencia_mercado"),
+    "data_competencia_mercado": lambda: tabla("competencia_mercado").to_dict("list"),
+    "labels_source": lambda: tabla("financiamiento")["Fuente"].tolist(),
+    "values_source": lambda: tabla("financiamiento")["Monto"].tolist(),
+    "anios": lambda: tabla("eficiencia")["Año"].tolist(),
+    "ingresos": lambda: tabla("eficiencia")["Ingresos"].tolist(),
+    "costos_operativos_pct": lambda: tabla("eficiencia")["Costo Operativo (%)"].tolist(),
+    "rutas_data": _rutas_data,
+}
+
+
+def __getattr__(nombre):
+    if nombre not in _VISTAS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    if nombre not in _derivados:
+        _derivados[nombre] = _VISTAS[nombre]()
+    return _derivados[nombre]
+
+
+def exportar(directorio=DIRECTORIO):
+    """Escribe las tablas embebidas como Arrow IPC sin compresión (mapeables tal cual)."""
+    import pyarrow as pa
+
+    os.makedirs(directorio, exist_ok=True)
+    for nombre, df in TABLAS_POR_DEFECTO.items():
+        ruta = os.path.join(directorio, nombre + ".arrow")
+        tabla_arrow = pa.Table.from_pandas(df, preserve_index=False)
+        temporal = ruta + ".tmp"
+        with pa.OSFile(temporal, "wb") as destino, pa.ipc.new_file(destino, tabla_arrow.schema) as escritor:
+            escritor.write_table(tabla_arrow)
+        os.replace(temporal, ruta)
+        print(f"  ✓ {ruta}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tablas de datos del dashboard KUALI.")
+    parser.add_argument("--exportar", metavar="DIRECTORIO", nargs="?", const=DIRECTORIO,
+                        help="Escribe las tablas embebidas como archivos .arrow (default: datos/)")
+    args = parser.parse_args(argv)
+    if args.exportar:
+        exportar(args.exportar)
+    else:
+        for nombre in TABLAS_POR_DEFECTO:
+            print(f"{nombre:<22} {ruta_tabla(nombre) or '(embebida)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import datetime
+import functools
+import unicodedata
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from kuali import datos, rutas
+from kuali.series import calendario
+
+# ==============================================================================
+# PRONÓSTICO DIARIO DE DEMANDA POR RUTA, DÍA Y SEGMENTO
+# ==============================================================================
+# La estacionalidad de cada ruta solo existe como texto ("+45% (Navidad/Verano)",
+# "20% Familias Norte (Ticket Alto)"). Aquí se convierte en números:
+#   demanda[r, d, s] = nivel[r] * (1 + incremento[r] * alta[r, d]) * reparto[r, s]
+# El cubo completo (rutas x días x segmentos) nunca se guarda: las rutas con
+# las mismas temporadas comparten una máscara diaria, así que con cientos de
+# orígenes y varios destinos el costo es O(rutas + combinaciones x días).
+# Los totales por ruta, por día o por segmento salen sin materializarlo.
+#
+# Calibración del nivel:
+# - Con volúmenes en la matriz OD (anuales), cada ruta suma su volumen en el año.
+# - Sin volúmenes (rutas del pitch) la participación del segmento pondera las
+#   rutas y el total del año es el de paquetes mensuales del plan x 12; una
+#   ruta con "+60% (Todo el año)" se lleva más que su participación.
+
+# Días del año de calibración del nivel
+DIAS_CALIBRACION = 365
+
+
+def _normalizar(texto):
+    sin_acentos = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(sin_acentos.lower().split())
+
+
+def _pascua(anios):
+    # Domingo de Pascua (algoritmo gregoriano anónimo), vectorizado por año
+    a, b, c = anios % 19, anios // 100, anios % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 19 * l) // 433
+    mes = (h + l - 7 * m + 90) // 25
+    dia = (h + l - 7 * m + 33 * mes + 19) % 32
+    meses = ((anios - 1970) * 12 + mes - 1).astype("datetime64[M]")
+    return meses.astype("datetime64[D]") + (dia - 1).astype("timedelta64[D]")
+
+
+def _semana_santa(fechas):
+    anios = fechas.astype("datetime64[Y]").astype(np.int64) + 1970
+    pascua = _pascua(anios)
+    # Domingo de Ramos a domingo de Pascua más la semana de Pascua
+    return (fechas >= pascua - np.timedelta64(7, "D")) & (fechas <= pascua + np.timedelta64(7, "D"))
+
+
+def _puentes(fechas):
+    # Fines de semana largos por ley (lunes 1º de febrero, 3º de marzo y 3º de
+    # noviembre: sábado a lunes) más 1 de mayo, 16 de septiembre y 1-2 de noviembre
+    def lunes_festivo(dias):
+        dia_semana, mes, dia = calendario(dias)
+        semana = (dia - 1) // 7
+        return (dia_semana == 0) & (((mes == 2) & (semana == 0)) | ((mes == 3) & (semana == 2)) | ((mes == 11) & (semana == 2)))
+
+    _, mes, dia = calendario(fechas)
+    fijos = ((mes == 5) & (dia == 1)) | ((mes == 9) & (dia == 16)) | ((mes == 11) & (dia <= 2))
+    return fijos | lunes_festivo(fechas) | lunes_festivo(fechas + 1) | lunes_festivo(fechas + 2)
+
+
+def _temporada_fija(condicion):
+    def mascara(fechas):
+        dia_semana, mes, dia = calendario(fechas)
+        return condicion(dia_semana, mes, dia)
+    return mascara
+
+
+# Nombre normalizado -> máscara diaria. Un nombre desconocido no suma temporada alta.
+TEMPORADAS = {
+    "navidad": _temporada_fija(lambda ds, m, d: ((m == 12) & (d >= 15)) | ((m == 1) & (d <= 6))),
+    "verano": _temporada_fija(lambda ds, m, d: (m == 7) | (m == 8)),
+    "semana santa": _semana_santa,
+    "puentes": _puentes,
+    "dia de muertos": _temporada_fija(lambda ds, m, d: ((m == 10) & (d == 31)) | ((m == 11) & (d <= 2))),
+    "fin de semana": _temporada_fija(lambda ds, m, d: ds >= 5),
+    "todo el ano": _temporada_fija(lambda ds, m, d: np.ones(m.shape, dtype=bool)),
+}
+# Vacaciones escolares = Semana Santa + verano + Navidad
+TEMPORADAS["vacaciones"] = lambda fechas: (
+    TEMPORADAS["semana santa"](fechas) | TEMPORADAS["verano"](fechas) | TEMPORADAS["navidad"](fechas)
+)
+
+
+class Perfiles(NamedTuple):
+    incremento: np.ndarray   # (r,) fracción extra en temporada alta
+    grupo: np.ndarray        # (r,) índice en `combinaciones`
+    combinaciones: list      # (G,) tuplas de temporadas normalizadas
+    participacion: np.ndarray  # (r,) fracción del mercado (NaN si el texto no la trae)
+    segmento: np.ndarray     # (r,) índice en `segmentos`
+    segmentos: np.ndarray    # (s,) etiquetas
+
+
+class Pronostico(NamedTuple):
+    fechas: np.ndarray       # (D,) datetime64[D]
+    nivel: np.ndarray        # (r,) demanda diaria fuera de temporada alta
+    incremento: np.ndarray   # (r,)
+    grupo: np.ndarray        # (r,)
+    mascaras: np.ndarray     # (G, D) bool: días de temporada alta de cada combinación
+    reparto: np.ndarray      # (r, s) fracción de la ruta que es de cada segmento
+    segmentos: np.ndarray    # (s,)
+
+
+def parsear(alta, segmento):
+    """Textos "alta" y "segmento" de cada ruta -> Perfiles numéricos (vectorizado con pandas)."""
+    alta = pd.Series(alta, dtype=object).fillna("").astype(str)
+    segmento = pd.Series(segmento, dtype=object).fillna("").astype(str)
+
+    incremento = alta.str.extract(r"([+-]?\d+(?:\.\d+)?)\s*%", expand=False).astype(np.float64).fillna(0.0) / 100.0
+    temporadas = alta.str.extract(r"\(([^)]*)\)", expand=False).fillna("")
+    # Se normalizan solo los textos distintos (con miles de arcos se repiten)
+    codigos, textos = pd.factorize(temporadas)
+    nombres = [tuple(sorted({_normalizar(n) for n in t.replace(",", "/").split("/") if n.strip()})) for t in textos]
+    grupo, combinaciones = pd.factorize(pd.Series(nombres, dtype=object))
+    grupo = grupo[codigos] if len(codigos) else codigos
+
+    partes = segmento.str.extract(r"^\s*(\d+(?:\.\d+)?)\s*%\s*(.*)$")
+    participacion = partes[0].astype(np.float64) / 100.0
+    etiqueta = partes[1].where(partes[0].notna(), segmento).str.strip()
+    codigo, segmentos = pd.factorize(etiqueta)
+    return Perfiles(
+        incremento=incremento.to_numpy(),
+        grupo=grupo,
+        combinaciones=list(combinaciones),
+        participacion=participacion.to_numpy(),
+        segmento=codigo,
+        segmentos=np.asarray(segmentos, dtype=object),
+    )
+
+
+def mascaras(combinaciones, fechas):
+    """(G, D): día de temporada alta para cada combinación de temporadas."""
+    por_temporada = {}
+    resultado = np.zeros((len(combinaciones), len(fechas)), dtype=bool)
+    for g, combinacion in enumerate(combinaciones):
+        for nombre in combinacion:
+            if nombre not in TEMPORADAS:
+                continue
+            if nombre not in por_temporada:
+                por_temporada[nombre] = TEMPORADAS[nombre](fechas)
+            resultado[g] |= por_temporada[nombre]
+    return resultado
+
+
+def pronosticar(od, inicio, fin, paquetes_mes=datos.pe_paquetes_mensuales_c12):
+    """Pronóstico diario [inicio, fin] para cada arco de la matriz OD."""
+    perfiles = parsear(od.detalle["alta"].to_numpy(), od.detalle["segmento"].to_numpy())
+    fechas = np.arange(np.datetime64(inicio, "D"), np.datetime64(fin, "D") + 1)
+
+    # Año de calibración: el que empieza en enero del año de `inicio`
+    enero = np.datetime64(np.datetime64(inicio, "Y"), "D")
+    anio = np.arange(enero, enero + DIAS_CALIBRACION)
+    dias_altos = mascaras(perfiles.combinaciones, anio).sum(axis=1)[perfiles.grupo]
+    forma_anual = DIAS_CALIBRACION + perfiles.incremento * dias_altos
+
+    if np.isnan(od.volumen).all():
+        participacion = perfiles.participacion
+        conocida = ~np.isnan(participacion)
+        participacion = np.where(conocida, participacion, participacion[conocida].mean() if conocida.any() else 1.0)
+        peso = participacion * forma_anual
+        nivel = participacion * (12.0 * paquetes_mes / peso.sum())
+    else:
+        nivel = np.nan_to_num(od.volumen, nan=0.0) / forma_anual
+
+    reparto = np.zeros((len(nivel), len(perfiles.segmentos)))
+    reparto[np.arange(len(nivel)), perfiles.segmento] = 1.0
+    return Pronostico(
+        fechas=fechas, nivel=nivel, incremento=perfiles.incremento, grupo=perfiles.grupo,
+        mascaras=mascaras(perfiles.combinaciones, fechas), reparto=reparto, segmentos=perfiles.segmentos,
+    )
+
+
+def perfil_diario(p, rutas_sel=slice(None)):
+    """(r, D) multiplicador diario de las rutas elegidas."""
+    return 1.0 + p.incremento[rutas_sel, None] * p.mascaras[p.grupo[rutas_sel]]
+
+
+def cubo(p, rutas_sel=slice(None)):
+    """(r, D, s) demanda por ruta, día y segmento (materializar solo para pocas rutas)."""
+    diaria = p.nivel[rutas_sel, None] * perfil_diario(p, rutas_sel)
+    return diaria[:, :, None] * p.reparto[rutas_sel, None, :]
+
+
+def total_por_ruta(p):
+    """(r,) demanda total de cada ruta en el horizonte."""
+    dias_altos = p.mascaras.sum(axis=1)[p.grupo]
+    return p.nivel * (len(p.fechas) + p.incremento * dias_altos)
+
+
+def total_por_dia(p):
+    """(D,) demanda de todas las rutas por día."""
+    extra = np.bincount(p.grupo, weights=p.nivel * p.incremento, minlength=len(p.mascaras))
+    return p.nivel.sum() + extra @ p.mascaras
+
+
+def total_por_segmento(p):
+    """(s,) demanda de cada segmento en el horizonte."""
+    return total_por_ruta(p) @ p.reparto
+
+
+def estacionalidad_mensual(p):
+    """
+    (12,) parte de la demanda anual de cada mes calendario (enero = 0) x 12:
+    multiplicar doce meses iguales por estos factores conserva el total del año.
+    """
+    meses = p.fechas.astype("datetime64[M]").astype(np.int64) % 12
+    por_mes = np.bincount(meses, weights=total_por_dia(p), minlength=12)
+    return por_mes / por_mes.mean() if por_mes.mean() > 0 else np.ones(12)
+
+
+@functools.lru_cache(maxsize=16)
+def pronostico(inicio, fin, ruta_od=None):
+    # Compartido por el mapa y el modelo financiero (solo lectura)
+    return pronosticar(rutas.matriz_od(ruta_od), inicio, fin)
+
+
+@functools.lru_cache(maxsize=4)
+def estacionalidad(anio, ruta_od=None):
+    return estacionalidad_mensual(pronostico(datetime.date(anio, 1, 1), datetime.date(anio, 12, 31), ruta_od))
+
+
+datos.al_cambiar(pronostico.cache_clear)
+datos.al_cambiar(estacionalidad.cache_clear)
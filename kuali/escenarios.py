@@ -0,0 +1,127 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from kuali import datos
+
+# ==============================================================================
+# ESCENARIOS WHAT-IF DEL ESTUDIO FINANCIERO
+# ==============================================================================
+# Cuatro entradas ajustables y un grafo que dice de cuáles depende cada figura.
+# Cada figura recibe SOLO sus entradas como argumentos, así que su clave de
+# caché cambia únicamente cuando cambia algo que la afecta: mover el ticket no
+# reconstruye las gráficas de inversión. Con los valores base todas las figuras
+# son idénticas a las originales.
+
+# Ticket promedio de referencia de un paquete familiar (MXN)
+TICKET_BASE = 22000
+
+
+class Entrada(NamedTuple):
+    etiqueta: str
+    minimo: float
+    maximo: float
+    base: float
+    paso: float
+    formato: str
+
+
+ENTRADAS = {
+    "inversion": Entrada("Inversión inicial (MXN)", 600_000, 2_400_000, datos.kpi_inversion_inicial, 50_000, "$%d"),
+    "paquetes": Entrada("Paquetes mensuales (P.E.)", 5, 60, datos.pe_paquetes_mensuales_c12, 1, "%d"),
+    "ticket": Entrada("Ticket promedio (MXN)", 12_000, 40_000, TICKET_BASE, 500, "$%d"),
+    "costo_pp": Entrada("Ajuste al costo operativo (pp)", -15, 15, 0, 1, "%+d pp"),
+}
+
+
+class Escenario(NamedTuple):
+    inversion: float = ENTRADAS["inversion"].base
+    paquetes: float = ENTRADAS["paquetes"].base
+    ticket: float = ENTRADAS["ticket"].base
+    costo_pp: float = ENTRADAS["costo_pp"].base
+
+
+# --- GRAFO DE DEPENDENCIAS: figura -> entradas de las que depende ---
+DEPENDENCIAS = {
+    "inversion": ("inversion",),
+    "financiamiento": ("inversion",),
+    "proyeccion": ("paquetes", "ticket"),
+    "eficiencia": ("paquetes", "ticket", "costo_pp"),
+    "flujo": ("inversion", "paquetes", "ticket", "costo_pp"),
+    "equilibrio": ("inversion", "paquetes", "ticket", "costo_pp"),
+    # La simulación Monte Carlo usa las cuatro entradas
+    "kpis_viabilidad": ("inversion", "paquetes", "ticket", "costo_pp"),
+    "gauge_liquidez": ("inversion", "paquetes", "ticket", "costo_pp"),
+    "gauge_endeudamiento": ("inversion", "paquetes", "ticket", "costo_pp"),
+    "gauge_margen": ("inversion", "paquetes", "ticket", "costo_pp"),
+    "vpn": ("inversion", "paquetes", "ticket", "costo_pp"),
+    "sensibilidad": ("inversion", "paquetes", "ticket", "costo_pp"),
+    "tornado": ("inversion", "paquetes", "ticket", "costo_pp"),
+}
+
+
+def afectadas(entrada):
+    """Figuras que hay que recalcular cuando cambia `entrada`."""
+    return [figura for figura, entradas in DEPENDENCIAS.items() if entrada in entradas]
+
+
+def argumentos(figura, escenario):
+    """Solo los valores del escenario de los que depende `figura` (kwargs del constructor)."""
+    return {entrada: getattr(escenario, entrada) for entrada in DEPENDENCIAS[figura]}
+
+
+def o_base(escenario):
+    # Los valores base comparten caché con las figuras sin escenario
+    return None if escenario is None or escenario == Escenario() else escenario
+
+
+# --- TABLAS AJUSTADAS (None = valor base) ---
+
+def factor_paquetes(paquetes=None, ticket=None):
+    # El margen por paquetes escala con el volumen y con el ticket
+    paquetes = ENTRADAS["paquetes"].base if paquetes is None else paquetes
+    ticket = ENTRADAS["ticket"].base if ticket is None else ticket
+    return (paquetes / ENTRADAS["paquetes"].base) * (ticket / ENTRADAS["ticket"].base)
+
+
+def tabla_inversion(inversion=None):
+    df = datos.df_inversion_inicial
+    if inversion is None or inversion == datos.kpi_inversion_inicial:
+        return df
+    escala = inversion / datos.kpi_inversion_inicial
+    return df.assign(**{'Monto Total (MXN)': (df['Monto Total (MXN)'] * escala).round().astype(np.int64)})
+
+
+def fuentes_financiamiento(inversion=None):
+    # La mezcla capital/deuda se conserva; cambia el monto total
+    if inversion is None or inversion == datos.kpi_inversion_inicial:
+        return datos.values_source
+    escala = inversion / datos.kpi_inversion_inicial
+    return [round(v * escala) for v in datos.values_source]
+
+
+def tabla_proyeccion(paquetes=None, ticket=None):
+    df = datos.df_proyeccion_ingresos
+    factor = factor_paquetes(paquetes, ticket)
+    if factor == 1.0:
+        return df
+    df = df.copy()
+    anios = df.columns.drop('Concepto')
+    fila = df['Concepto'] == 'Margen Paquetes'
+    df.loc[fila, anios] = (df.loc[fila, anios] * factor).round().astype(np.int64)
+    return df
+
+
+def serie_eficiencia(paquetes=None, ticket=None, costo_pp=None):
+    """(ingresos, costos_operativos_pct) por año."""
+    ingresos = datos.ingresos
+    costos = datos.costos_operativos_pct
+    base = datos.df_proyeccion_ingresos
+    if factor_paquetes(paquetes, ticket) != 1.0:
+        ajustada = tabla_proyeccion(paquetes, ticket)
+        anios = base.columns.drop('Concepto')
+        diferencia = ajustada[anios].sum() - base[anios].sum()
+        ingresos = [int(i + d) for i, d in zip(ingresos, diferencia)]
+    if costo_pp:
+        costos = [int(min(max(c + costo_pp, 0), 100)) for c in costos]
+    return ingresos, costos
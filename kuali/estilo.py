@@ -0,0 +1,184 @@
+# ==============================================================================
+# ESTILO DE LA MARCA (COMPARTIDO POR LA APP Y EL SITIO ESTÁTICO)
+# ==============================================================================
+
+# --- CSS MAESTRO: TARJETAS, FUENTES Y TOOLTIPS INTELIGENTES ---
+CSS = """
+    /* 1. FONDO GENERAL */
+    .stApp {
+        background-color: #F4F6F7;
+    }
+
+    /* 2. TIPOGRAFÍA GLOBAL (NEGRO POR DEFECTO) */
+    html, body, [class*="css"], .stMarkdown, .stText, p, li, span, div {
+        font-size: 24px !important;
+        color: #000000 !important;
+        font-family: 'Arial', sans-serif !important;
+    }
+
+    /* 3. TÍTULO PRINCIPAL */
+    .main-title {
+        font-size: 140px !important;
+        font-weight: 900 !important;
+        color: #0A3069 !important;
+        text-align: center;
+        text-transform: uppercase;
+        text-shadow: 5px 5px 0px #FFFFFF, 7px 7px 0px #BDC3C7;
+        margin-bottom: 0px !important;
+        line-height: 1 !important;
+        padding-top: 20px;
+    }
+
+    /* 4. SLOGAN */
+    .main-slogan {
+        font-size: 48px !important;
+        color: #154360 !important;
+        text-align: center;
+        font-weight: 700 !important;
+        font-style: italic;
+        margin-top: 10px !important;
+        margin-bottom: 40px !important;
+        border-bottom: 5px solid #E67E22;
+    }
+
+    /* 5. TÍTULOS DE SECCIONES */
+    h1, h2, h3 {
+        color: #154360 !important;
+        font-weight: 800 !important;
+        padding-top: 10px;
+    }
+
+    /* 6. TARJETAS BLANCAS */
+    div.block-container {
+        padding-top: 2rem;
+        padding-bottom: 5rem;
+    }
+
+    /* 7. ESTILO DE TABLA */
+    div[data-testid="stTable"] {
+        background-color: #FFFFFF !important;
+        border-radius: 10px;
+        overflow: hidden;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        border: 1px solid #BDC3C7;
+    }
+    table { width: 100% !important; border-collapse: collapse !important; }
+    thead tr th {
+        background-color: #FFFFFF !important;
+        color: #0A3069 !important;
+        font-size: 26px !important;
+        font-weight: 900 !important;
+        text-align: center !important;
+        padding: 15px !important;
+        border-bottom: 4px solid #0A3069 !important;
+    }
+    tbody tr td {
+        background-color: #FFFFFF !important;
+        color: #000000 !important;
+        font-size: 24px !important;
+        border-bottom: 2px solid #D5D8DC !important;
+        font-weight: 600 !important;
+        padding: 15px !important;
+    }
+
+    /* 8. PESTAÑAS (NAVEGACIÓN SUPERIOR) */
+    a[data-testid="stTopNavLink"] {
+        font-size: 28px !important;
+        background-color: #E5E8E8 !important;
+        color: #555555 !important;
+        margin-right: 5px;
+        border-radius: 10px 10px 0 0;
+    }
+    a[data-testid="stTopNavLink"][aria-current="page"] {
+        background-color: #FFFFFF !important;
+        color: #0A3069 !important;
+        border-top: 6px solid #0A3069 !important;
+    }
+
+    /* 9. ALERTAS */
+    .stAlert {
+        background-color: #FFFFFF !important;
+        border-left: 10px solid #E67E22 !important;
+        box-shadow: 0 2px 5px rgba(0,0,0,0.05);
+    }
+
+    /* 10. MÉTRICAS */
+    div[data-testid="metric-container"] {
+        background-color: #FFFFFF !important;
+        border: 1px solid #BDC3C7 !important;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        padding: 15px !important;
+        border-radius: 8px;
+    }
+    [data-testid="stMetricValue"] { color: #0A3069 !important; }
+
+    /* 11. TOOLTIPS DE PYDECK (SOLUCIÓN DEFINITIVA COLOR NARANJA) */
+    .deck-tooltip {
+        background-color: #0A3069 !important;
+        color: #FFA500 !important;
+        font-family: 'Arial', sans-serif !important;
+        font-size: 18px !important;
+        border-radius: 8px !important;
+        padding: 12px !important;
+        box-shadow: 0px 4px 10px rgba(0,0,0,0.3) !important;
+        border: 2px solid #FFA500 !important;
+        z-index: 9999 !important;
+    }
+    /* FUERZA BRUTA: CUALQUIER COSA DENTRO DEL TOOLTIP SERÁ NARANJA */
+    .deck-tooltip * {
+        color: #FFA500 !important;
+    }
+
+    /* 12. TARJETAS HTML DE PILARES */
+    .pilar-card {
+        background-color: white;
+        border-radius: 15px;
+        padding: 20px;
+        text-align: center;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.15);
+        border-bottom: 5px solid #0A3069;
+        height: 100%;
+        transition: transform 0.3s ease;
+    }
+    .pilar-card:hover {
+        transform: scale(1.05);
+        background-color: #FDFEFE;
+    }
+    .pilar-icon { font-size: 60px; margin-bottom: 10px; }
+    .pilar-title { font-size: 28px; font-weight: bold; color: #154360; margin-bottom: 5px; }
+    .pilar-value { font-size: 36px; font-weight: 900; color: #E67E22; }
+    .pilar-desc { font-size: 20px; color: #555; }
+"""
+
+
+def tarjeta_pilar(icono, titulo, valor, descripcion):
+    return f"""
+        <div class="pilar-card">
+            <div class="pilar-icon">{icono}</div>
+            <div class="pilar-title">{titulo}</div>
+            <div class="pilar-value">{valor}</div>
+            <div class="pilar-desc">{descripcion}</div>
+        </div>
+        """
+
+
+# --- ESTILO DE LAS GRÁFICAS DE PLOTLY (update_fig_layout / plantilla "kuali") ---
+LAYOUT_GRAFICAS = dict(
+    paper_bgcolor='#FFFFFF',
+    plot_bgcolor='#FFFFFF',
+    font=dict(color='#000000', size=20, family="Arial"),
+    margin=dict(l=20, r=20, t=60, b=20),
+    legend=dict(
+        font=dict(color="#000000", size=20),
+        bgcolor="rgba(255,255,255,0.9)",
+        bordercolor="#BDC3C7",
+        borderwidth=1
+    ),
+    # Tooltip Plotly Inteligente
+    hoverlabel=dict(
+        bgcolor="#0A3069",
+        font=dict(color="#FFFFFF", size=24),
+        bordercolor="#E67E22"
+    )
+)
+EJES_GRAFICAS = dict(showgrid=True, gridwidth=1, gridcolor='#EBEDEF', showline=True, linewidth=2, linecolor='black', tickfont=dict(color='black', size=18))
@@ -0,0 +1,406 @@
+import argparse
+import asyncio
+import datetime
+import gzip
+import hashlib
+import json
+import math
+import os
+import pickle
+import sys
+import threading
+import time
+from typing import NamedTuple
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+
+from kuali import datos
+from kuali.cache import cache_figuras, cache_series
+from kuali.series import FIN_TEMPORADA, INICIO_TEMPORADA, Bandas
+
+# ==============================================================================
+# FEEDS DE PRECIOS EN VIVO DE LA COMPETENCIA (ASYNCIO, CONCURRENTES)
+# ==============================================================================
+# Con KUALI_FEEDS cada plataforma se grafica con las bandas que entrega su feed
+# HTTP (JSON con fechas, precio_bajo, precio_prom y precio_alto, el mismo formato
+# de /api/bandas). Las cuatro plataformas se piden A LA VEZ: la página espera lo
+# que tarde el feed más lento, no la suma de todos.
+# - Un bucle asyncio propio (hilo daemon) y un cliente con conexiones
+#   keep-alive reutilizables por host: un rerun no vuelve a abrir conexiones.
+# - Cada feed tiene su tiempo límite (TIEMPO_LIMITE_S).
+# - Stale-while-revalidate: una instantánea de menos de FRESCO_S se usa tal
+#   cual; hasta OBSOLETO_S se usa al instante y se revalida en segundo plano
+#   (con If-None-Match si el feed manda ETag).
+# - Si un feed falla o no responde a tiempo se usa la última instantánea buena
+#   (en memoria o en RUTA_ESTADO, persistida entre reinicios); sin ninguna,
+#   la plataforma vuelve a los volcados de cotizaciones o a la serie sintética.
+
+# Plantilla de URL; admite {plataforma}, {inicio}, {fin} (AAAA-MM-DD) y {freq}
+URL_FEEDS = os.environ.get("KUALI_FEEDS")
+# Últimas instantáneas buenas de cada feed
+RUTA_ESTADO = os.environ.get(
+    "KUALI_ESTADO_FEEDS", os.path.join(os.path.expanduser("~"), ".cache", "kuali", "feeds.pkl")
+)
+
+TIEMPO_LIMITE_S = 2.0          # por feed: conexión, petición y respuesta completa
+FRESCO_S = 60.0
+OBSOLETO_S = 3600.0
+CONEXIONES_POR_HOST = 8
+MAX_RESPUESTA = 64 * 1024 * 1024
+
+
+class Instantanea(NamedTuple):
+    bandas: Bandas
+    obtenida: float     # time.time() de la última descarga o revalidación exitosa
+    etag: str           # "" si el feed no manda ETag
+    huella: str         # blake2b del cuerpo: detecta cambios aunque no haya ETag
+
+
+# ==============================================================================
+# CLIENTE HTTP/1.1 CON POOL DE CONEXIONES
+# ==============================================================================
+
+async def _leer_respuesta(lector):
+    """(estado, cabeceras, cuerpo, reutilizable) de una respuesta HTTP/1.x."""
+    bloque = await lector.readuntil(b"\r\n\r\n")
+    linea, *resto = bloque.decode("latin-1").split("\r\n")
+    version, estado = linea.split(" ", 2)[:2]
+    estado = int(estado)
+    cabeceras = {}
+    for campo in resto:
+        nombre, separador, valor = campo.partition(":")
+        if separador:
+            cabeceras[nombre.strip().lower()] = valor.strip()
+
+    reutilizable = version == "HTTP/1.1" and cabeceras.get("connection", "").lower() != "close"
+    if estado in (204, 304) or estado < 200:
+        cuerpo = b""
+    elif "chunked" in cabeceras.get("transfer-encoding", "").lower():
+        partes, total = [], 0
+        while True:
+            tamano = int((await lector.readuntil(b"\r\n")).split(b";")[0], 16)
+            if tamano == 0:
+                while await lector.readuntil(b"\r\n") != b"\r\n":
+                    pass  # trailers
+                break
+            total += tamano
+            if total > MAX_RESPUESTA:
+                raise ValueError(f"Respuesta de más de {MAX_RESPUESTA:,} bytes")
+            partes.append(await lector.readexactly(tamano))
+            await lector.readexactly(2)
+        cuerpo = b"".join(partes)
+    elif "content-length" in cabeceras:
+        largo = int(cabeceras["content-length"])
+        if largo > MAX_RESPUESTA:
+            raise ValueError(f"Respuesta de {largo:,} bytes (máximo {MAX_RESPUESTA:,})")
+        cuerpo = await lector.readexactly(largo)
+    else:
+        # Sin largo declarado el cuerpo termina al cerrar la conexión
+        cuerpo = await lector.read(MAX_RESPUESTA + 1)
+        reutilizable = False
+        if len(cuerpo) > MAX_RESPUESTA:
+            raise ValueError(f"Respuesta de más de {MAX_RESPUESTA:,} bytes")
+
+    if cabeceras.get("content-encoding", "").lower() == "gzip":
+        cuerpo = gzip.decompress(cuerpo)
+    return estado, cabeceras, cuerpo, reutilizable
+
+
+def _cerrar_apertura(apertura):
+    if not apertura.cancelled() and apertura.exception() is None:
+        apertura.result()[1].close()
+
+
+class ClienteHTTP:
+    """GET asíncrono con conexiones keep-alive reutilizables (a lo más N por host)."""
+
+    def __init__(self, conexiones_por_host=CONEXIONES_POR_HOST):
+        self.conexiones_por_host = conexiones_por_host
+        self._libres = {}     # (esquema, host, puerto) -> [(lector, escritor)]
+        self._cupos = {}      # (esquema, host, puerto) -> Semaphore
+        self.abiertas = 0     # conexiones abiertas desde el inicio (mide el reuso)
+
+    async def get(self, url, cabeceras=None):
+        partes = urlsplit(url)
+        seguro = partes.scheme == "https"
+        destino = (partes.scheme, partes.hostname, partes.port or (443 if seguro else 80))
+        objetivo = (partes.path or "/") + (f"?{partes.query}" if partes.query else "")
+        extra = "".join(f"{n}: {v}\r\n" for n, v in (cabeceras or {}).items())
+        pedido = (
+            f"GET {objetivo} HTTP/1.1\r\nHost: {partes.netloc}\r\nAccept: application/json\r\n"
+            f"Accept-Encoding: gzip\r\nConnection: keep-alive\r\n{extra}\r\n"
+        ).encode("latin-1")
+
+        cupo = self._cupos.get(destino)
+        if cupo is None:
+            cupo = self._cupos[destino] = asyncio.Semaphore(self.conexiones_por_host)
+        async with cupo:
+            libres = self._libres.setdefault(destino, [])
+            while libres:
+                try:
+                    return await self._intercambio(destino, libres.pop(), pedido)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    continue  # el servidor cerró la conexión inactiva: se prueba otra
+            conexion = await self._conectar(partes.hostname, destino[2], seguro)
+            self.abiertas += 1
+            return await self._intercambio(destino, conexion, pedido)
+
+    async def _conectar(self, host, puerto, seguro):
+        apertura = asyncio.ensure_future(asyncio.open_connection(host, puerto, ssl=seguro or None))
+        try:
+            return await asyncio.shield(apertura)
+        except asyncio.CancelledError:
+            # Tiempo límite a media conexión: si la apertura alcanza a completarse, se cierra
+            apertura.cancel()
+            apertura.add_done_callback(_cerrar_apertura)
+            raise
+
+    async def _intercambio(self, destino, conexion, pedido):
+        lector, escritor = conexion
+        try:
+            escritor.write(pedido)
+            await escritor.drain()
+            estado, cabeceras, cuerpo, reutilizable = await _leer_respuesta(lector)
+        except BaseException:
+            # Error, tiempo límite o cancelación a media respuesta: no se puede reutilizar
+            escritor.close()
+            raise
+        if reutilizable:
+            self._libres[destino].append(conexion)
+        else:
+            escritor.close()
+        return estado, cabeceras, cuerpo
+
+    def cerrar(self):
+        for libres in self._libres.values():
+            for _, escritor in libres:
+                escritor.close()
+        self._libres.clear()
+
+
+# ==============================================================================
+# INSTANTÁNEAS, REVALIDACIÓN Y RESPALDO
+# ==============================================================================
+_lock = threading.Lock()
+_lock_guardar = threading.Lock()
+_bucle = None
+_cliente = None
+_instantaneas = None   # (plataforma, inicio, fin, freq) -> Instantanea; solo desde el bucle
+_en_curso = {}         # misma clave -> Task de la descarga
+_errores = {}          # misma clave -> último error (para el resumen)
+_suscriptores = []
+
+
+def al_cambiar(funcion):
+    """Registra una función que se llama cuando un feed trae contenido nuevo."""
+    _suscriptores.append(funcion)
+    return funcion
+
+
+# Las series y figuras cacheadas se hicieron con los precios anteriores
+al_cambiar(cache_series.limpiar)
+al_cambiar(cache_figuras.limpiar)
+
+
+def activo():
+    return bool(URL_FEEDS)
+
+
+def _en_bucle(corrutina):
+    # Corre `corrutina` en el bucle de los feeds y espera su resultado (código síncrono)
+    global _bucle, _cliente
+    with _lock:
+        if _bucle is None:
+            _bucle = asyncio.new_event_loop()
+            _cliente = ClienteHTTP()
+            threading.Thread(target=_bucle.run_forever, name="kuali-feeds", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(corrutina, _bucle).result()
+
+
+def _estado():
+    global _instantaneas
+    if _instantaneas is None:
+        try:
+            with open(RUTA_ESTADO, "rb") as f:
+                _instantaneas = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            _instantaneas = {}
+    return _instantaneas
+
+
+def _guardar(instantaneas):
+    # Escritura atómica: otro proceso nunca lee un estado a medias
+    with _lock_guardar:
+        os.makedirs(os.path.dirname(os.path.abspath(RUTA_ESTADO)), exist_ok=True)
+        temporal = f"{RUTA_ESTADO}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            pickle.dump(instantaneas, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, RUTA_ESTADO)
+
+
+def a_bandas(cuerpo, inicio, fin, freq):
+    """JSON del feed -> Bandas (1, T) dentro de [inicio, fin], en orden cronológico."""
+    try:
+        d = json.loads(cuerpo)
+        fechas = np.asarray(d["fechas"], dtype=f"datetime64[{freq}]")
+        precios = [np.asarray(d[c], dtype=np.float64) for c in ("precio_bajo", "precio_prom", "precio_alto")]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Feed con formato inesperado: {e!r}") from None
+    if any(p.shape != fechas.shape for p in precios):
+        raise ValueError("Feed con fechas y precios de distinto largo")
+    en_rango = (fechas >= np.datetime64(inicio, "D")) & (fechas < np.datetime64(fin, "D") + 1)
+    en_rango &= np.isfinite(precios[0]) & np.isfinite(precios[1]) & np.isfinite(precios[2])
+    if not en_rango.any():
+        raise ValueError(f"El feed no trae precios entre {inicio} y {fin}")
+    orden = np.argsort(fechas[en_rango], kind="stable")
+    return Bandas(
+        fechas[en_rango][orden],
+        *(np.rint(p[en_rango][orden]).astype(np.int64)[None, :] for p in precios),
+    )
+
+
+def _url(clave):
+    plataforma, inicio, fin, freq = clave
+    return URL_FEEDS.format(plataforma=quote(plataforma), inicio=inicio.isoformat(), fin=fin.isoformat(), freq=freq)
+
+
+async def _descargar(clave, previa):
+    cabeceras = {"If-None-Match": previa.etag} if previa is not None and previa.etag else None
+    estado, respuesta, cuerpo = await _cliente.get(_url(clave), cabeceras)
+    ahora = time.time()
+    if estado == 304 and previa is not None:
+        return previa._replace(obtenida=ahora), False
+    if estado != 200:
+        raise ValueError(f"HTTP {estado}")
+    etag = respuesta.get("etag", "")
+    huella = hashlib.blake2b(cuerpo, digest_size=16).hexdigest()
+    if previa is not None and previa.huella == huella:
+        return previa._replace(obtenida=ahora, etag=etag), False
+    return Instantanea(a_bandas(cuerpo, *clave[1:]), ahora, etag, huella), True
+
+
+async def _actualizar(clave):
+    # Nunca lanza: None si el feed falló (quien espera decide el respaldo)
+    try:
+        nueva, cambio = await asyncio.wait_for(_descargar(clave, _estado().get(clave)), TIEMPO_LIMITE_S)
+    except Exception as e:
+        _errores[clave] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        print(f"[feeds] {clave[0]}: {_errores[clave]}; se usa la última instantánea", file=sys.stderr)
+        return None
+    _errores.pop(clave, None)
+    _estado()[clave] = nueva
+    if cambio:
+        # Copia tomada en el bucle: el hilo que guarda no ve el dict a medio cambiar
+        await asyncio.get_running_loop().run_in_executor(None, _avisar_cambio, dict(_estado()))
+    return nueva
+
+
+def _avisar_cambio(instantaneas):
+    _guardar(instantaneas)
+    for funcion in _suscriptores:
+        funcion()
+
+
+def _lanzar(clave):
+    # Una sola descarga por clave aunque la pidan varios a la vez
+    tarea = _en_curso.get(clave)
+    if tarea is None:
+        tarea = asyncio.ensure_future(_actualizar(clave))
+        _en_curso[clave] = tarea
+        tarea.add_done_callback(lambda _: _en_curso.pop(clave, None))
+    return tarea
+
+
+async def _obtener(clave):
+    instantanea = _estado().get(clave)
+    edad = time.time() - instantanea.obtenida if instantanea is not None else math.inf
+    if edad < FRESCO_S:
+        return instantanea.bandas
+    tarea = _lanzar(clave)
+    if edad < OBSOLETO_S:
+        return instantanea.bandas  # la revalidación sigue en segundo plano
+    nueva = await asyncio.shield(tarea)
+    if nueva is not None:
+        return nueva.bandas
+    return instantanea.bandas if instantanea is not None else None
+
+
+def cargar(plataformas, inicio=INICIO_TEMPORADA, fin=FIN_TEMPORADA, freq="D"):
+    """
+    {plataforma: Bandas (1, T) o None} pidiendo todos los feeds a la vez. Espera
+    a lo más ~TIEMPO_LIMITE_S aunque algún feed no responda.
+    """
+    plataformas = list(plataformas)
+    if not activo():
+        return dict.fromkeys(plataformas)
+
+    async def todas():
+        resultados = await asyncio.gather(*(_obtener((p, inicio, fin, freq)) for p in plataformas))
+        return dict(zip(plataformas, resultados))
+
+    return _en_bucle(todas())
+
+
+def bandas(nombre_plataforma, inicio, fin, freq="D"):
+    """Bandas del feed de una plataforma (misma forma que cotizaciones.bandas) o None."""
+    return cargar([nombre_plataforma], inicio, fin, freq)[nombre_plataforma]
+
+
+def revalidar():
+    """Vuelve a pedir en segundo plano los feeds ya conocidos que no estén frescos."""
+    if not activo():
+        return
+
+    async def lanzar_vencidos():
+        ahora = time.time()
+        for clave, instantanea in list(_estado().items()):
+            if ahora - instantanea.obtenida >= FRESCO_S:
+                _lanzar(clave)
+
+    _en_bucle(lanzar_vencidos())
+
+
+def olvidar():
+    """Descarta las instantáneas en memoria; se vuelven a leer de RUTA_ESTADO."""
+    async def descartar():
+        global _instantaneas
+        _instantaneas = None
+        _errores.clear()
+
+    _en_bucle(descartar())
+
+
+def resumen():
+    """Estado de cada feed conocido: puntos, edad de la instantánea y último error."""
+    async def leer():
+        ahora = time.time()
+        return [
+            {"plataforma": c[0], "inicio": c[1], "fin": c[2], "freq": c[3], "puntos": len(i.bandas.fechas),
+             "edad_s": ahora - i.obtenida, "error": _errores.get(c)}
+            for c, i in sorted(_estado().items())
+        ]
+    return _en_bucle(leer())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Descarga los feeds de precios de la competencia (KUALI_FEEDS).")
+    parser.add_argument("--inicio", type=datetime.date.fromisoformat, default=INICIO_TEMPORADA, help="AAAA-MM-DD")
+    parser.add_argument("--fin", type=datetime.date.fromisoformat, default=FIN_TEMPORADA, help="AAAA-MM-DD")
+    parser.add_argument("--freq", choices=["D", "h"], default="D")
+    args = parser.parse_args(argv)
+    if not activo():
+        print("Define KUALI_FEEDS con la plantilla de URL de los feeds", file=sys.stderr)
+        return 1
+    t0 = time.perf_counter()
+    resultado = cargar([p[0] for p in datos.PLATAFORMAS], args.inicio, args.fin, args.freq)
+    print(f"{len(resultado)} feeds en {time.perf_counter() - t0:.3f} s")
+    for fila in resumen():
+        estado = fila["error"] or "ok"
+        rango = f"{fila['inicio']} a {fila['fin']} ({fila['freq']})"
+        print(f"  {fila['plataforma']:<12} {rango:<28} {fila['puntos']:>7,} puntos  {fila['edad_s']:7.1f} s  {estado}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
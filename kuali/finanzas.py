@@ -0,0 +1,306 @@
+import datetime
+import functools
+from typing import NamedTuple
+
+import numpy as np
+
+from kuali import datos, demanda, escenarios, montecarlo
+
+# ==============================================================================
+# MODELO MENSUAL DE FLUJO DE EFECTIVO Y PUNTO DE EQUILIBRIO
+# ==============================================================================
+# Proyecta mes a mes (36 a 120 meses) ingresos, costos, depreciación, deuda,
+# impuestos y caja a partir de las tablas del pitch, y de ahí deriva el punto
+# de equilibrio, liquidez, endeudamiento, margen neto, VPN, TIR y payback.
+# Cada parámetro es un arreglo: k juegos de parámetros se evalúan en una sola
+# llamada como matrices (k, meses), sin ciclos de Python por juego.
+#
+# Supuestos que no vienen en las tablas:
+# - Los años posteriores a la proyección crecen a `crecimiento` anual.
+# - El costo operativo se separa en fijo + variable ajustando una recta a la
+#   curva de eficiencia (costo absoluto vs ingresos): la caída del % de costo
+#   con la escala es justamente el costo fijo diluyéndose.
+# - Activos fijos e intangibles se deprecian en línea recta; los trámites se
+#   gastan en el mes 0 (son parte de la inversión) y el capital de trabajo es
+#   la caja inicial.
+# - La deuda se amortiza en línea recta en PLAZO_DEUDA_MESES.
+# - El margen por paquetes sigue la estacionalidad del pronóstico de demanda
+#   por ruta (kuali.demanda); los factores promedian 1, así que cada bloque de
+#   12 meses suma lo mismo que la tabla anual.
+
+MESES_MIN, MESES_MAX = 36, 120
+VIDA_UTIL_MESES = 60
+PLAZO_DEUDA_MESES = 36
+TASA_DEUDA = 0.15              # punto medio de montecarlo.TASA_DEUDA
+CRECIMIENTO = 0.05             # anual, después del último año proyectado
+INICIO_OPERACION = datetime.date(2026, 1, 1)   # mes 0 del modelo
+
+# Filas por bloque en `indicadores`: acota la memoria de lotes grandes
+FILAS_POR_BLOQUE = 4096
+
+
+class Parametros(NamedTuple):
+    inversion: np.ndarray
+    paquetes: np.ndarray
+    ticket: np.ndarray
+    costo_pp: np.ndarray
+    deuda_pct: np.ndarray
+    tasa_deuda: np.ndarray
+    crecimiento: np.ndarray
+    tasa_descuento: np.ndarray
+
+
+class Proyeccion(NamedTuple):
+    ingresos: np.ndarray        # (k, meses)
+    costos: np.ndarray          # (k, meses) costo operativo
+    depreciacion: np.ndarray    # (k, meses)
+    intereses: np.ndarray       # (k, meses)
+    amortizacion: np.ndarray    # (k, meses)
+    utilidad_neta: np.ndarray   # (k, meses)
+    flujos: np.ndarray          # (k, meses + 1) flujo libre del proyecto; columna 0 = inversión
+    caja: np.ndarray            # (k, meses) saldo de caja al cierre de cada mes
+
+
+class Indicadores(NamedTuple):
+    paquetes_equilibrio: np.ndarray  # (k,) paquetes/mes con utilidad neta cero en el año 1
+    payback_meses: np.ndarray        # (k,) inf si no se recupera en el horizonte
+    caja_minima: np.ndarray          # (k,) MXN
+    vpn: np.ndarray                  # (k,) MXN
+    tir: np.ndarray                  # (k,) anual; NaN si no existe o no se pidió
+    liquidez: np.ndarray             # (k,) activo circulante / pasivo circulante (año 1)
+    endeudamiento: np.ndarray        # (k,) % deuda / inversión
+    margen_neto: np.ndarray          # (k,) % del año 1
+
+
+class Estructura(NamedTuple):
+    paquetes_mes: np.ndarray    # (años,) ingreso mensual de paquetes con los paquetes base
+    otros_mes: np.ndarray       # (años,) comisiones y servicios por mes
+    costo_fijo_mes: float
+    costo_variable: float       # fracción del ingreso
+    depreciable_pct: float      # fracción de la inversión que se deprecia
+    caja_pct: float             # fracción de la inversión que es capital de trabajo
+    estacionalidad: np.ndarray  # (12,) factor del mes calendario (enero = 0), promedio 1
+
+
+@functools.lru_cache(maxsize=1)
+def estructura():
+    """Lo que el modelo toma de las tablas del pitch (se recalcula si cambian)."""
+    proyeccion = datos.df_proyeccion_ingresos.set_index('Concepto')
+    paquetes = proyeccion.loc['Margen Paquetes'].to_numpy(dtype=np.float64)
+    otros = proyeccion.drop(index='Margen Paquetes').to_numpy(dtype=np.float64).sum(axis=0)
+
+    ingresos = np.asarray(datos.ingresos, dtype=np.float64)
+    costo = ingresos * np.asarray(datos.costos_operativos_pct, dtype=np.float64) / 100.0
+    variable, fijo = np.polyfit(ingresos, costo, 1)
+
+    inversion = datos.df_inversion_inicial.set_index('Concepto')['Monto Total (MXN)']
+    total = float(inversion.sum())
+    return Estructura(
+        paquetes_mes=paquetes / 12.0,
+        otros_mes=otros / 12.0,
+        costo_fijo_mes=max(float(fijo), 0.0) / 12.0,
+        costo_variable=float(variable),
+        depreciable_pct=float(inversion[['Activos Fijos', 'Activos Intangibles (IA)']].sum()) / total,
+        caja_pct=float(inversion['Capital Trabajo (Reserva)']) / total,
+        estacionalidad=demanda.estacionalidad(INICIO_OPERACION.year),
+    )
+
+
+datos.al_cambiar(estructura.cache_clear)
+
+
+def parametros(**valores):
+    """
+    Juego(s) de parámetros; lo que no se indique (o sea None) toma el valor base.
+    Escalares y arreglos se combinan con broadcasting y se aplanan a (k,).
+    """
+    base = escenarios.Escenario()
+    por_defecto = {
+        "inversion": base.inversion, "paquetes": base.paquetes, "ticket": base.ticket,
+        "costo_pp": base.costo_pp,
+        "deuda_pct": datos.values_source[1] / sum(datos.values_source),
+        "tasa_deuda": TASA_DEUDA, "crecimiento": CRECIMIENTO,
+        "tasa_descuento": montecarlo.TASA_DESCUENTO,
+    }
+    desconocidos = set(valores) - set(por_defecto)
+    if desconocidos:
+        raise ValueError(f"Parámetros desconocidos: {sorted(desconocidos)}")
+    por_defecto.update((c, v) for c, v in valores.items() if v is not None)
+    arreglos = np.broadcast_arrays(*(np.asarray(por_defecto[c], dtype=np.float64) for c in Parametros._fields))
+    return Parametros(*(np.ravel(a) for a in arreglos))
+
+
+def desde_escenarios(lista, **valores):
+    """Un juego de parámetros por cada escenarios.Escenario de la lista."""
+    columnas = np.array([tuple(e) for e in lista], dtype=np.float64).reshape(-1, len(escenarios.Escenario._fields))
+    return parametros(**dict(zip(escenarios.Escenario._fields, columnas.T)), **valores)
+
+
+def _validar_meses(meses):
+    if not MESES_MIN <= meses <= MESES_MAX:
+        raise ValueError(f"El horizonte debe estar entre {MESES_MIN} y {MESES_MAX} meses (recibido: {meses})")
+
+
+def _estacion(e, mes):
+    # Factor de temporada de cada mes del modelo
+    return e.estacionalidad[(mes + INICIO_OPERACION.month - 1) % 12]
+
+
+def proyectar(p, meses=60):
+    """Proyección mensual completa de cada juego de parámetros en `p`."""
+    _validar_meses(meses)
+    e = estructura()
+    col = lambda a: a[:, None]  # noqa: E731
+    mes = np.arange(meses)
+    anio = mes // 12
+    ultimo = len(e.paquetes_mes) - 1
+
+    # --- INGRESOS: años de la tabla y crecimiento compuesto después ---
+    escala = (p.paquetes / escenarios.ENTRADAS["paquetes"].base) * (p.ticket / escenarios.TICKET_BASE)
+    i = np.minimum(anio, ultimo)
+    crecimiento = (1.0 + col(p.crecimiento)) ** np.maximum(anio - ultimo, 0)
+    ingresos = (col(escala) * (e.paquetes_mes[i] * _estacion(e, mes)) + e.otros_mes[i]) * crecimiento
+
+    # --- COSTOS: fijo + variable (el ajuste en pp mueve la parte variable) ---
+    costos = e.costo_fijo_mes + col(e.costo_variable + p.costo_pp / 100.0) * ingresos
+    depreciacion = col(p.inversion * e.depreciable_pct / VIDA_UTIL_MESES) * (mes < VIDA_UTIL_MESES)
+
+    # --- DEUDA: amortización lineal, interés sobre saldo inicial del mes ---
+    deuda = col(p.inversion * p.deuda_pct)
+    saldo = deuda * np.maximum(1.0 - mes / PLAZO_DEUDA_MESES, 0.0)
+    intereses = saldo * col(p.tasa_deuda) / 12.0
+    amortizacion = (deuda / PLAZO_DEUDA_MESES) * (mes < PLAZO_DEUDA_MESES)
+
+    antes_impuestos = ingresos - costos - depreciacion - intereses
+    utilidad_neta = np.where(antes_impuestos > 0, antes_impuestos * (1.0 - montecarlo.TASA_IMPUESTOS), antes_impuestos)
+
+    flujos = np.empty((len(p.inversion), meses + 1))
+    flujos[:, 0] = -p.inversion
+    flujos[:, 1:] = utilidad_neta + depreciacion + intereses * (1.0 - montecarlo.TASA_IMPUESTOS)
+
+    caja = col(p.inversion * e.caja_pct) + np.cumsum(utilidad_neta + depreciacion - amortizacion, axis=1)
+    return Proyeccion(ingresos, costos, depreciacion, intereses, amortizacion, utilidad_neta, flujos, caja)
+
+
+def _potencias(bases, exponentes):
+    # bases[:, None] ** exponentes; en una rejilla hay pocas bases distintas y
+    # copiar filas ya calculadas es mucho más barato que elevar (k, meses) veces
+    unicas, indice = np.unique(bases, return_inverse=True)
+    return (unicas[:, None] ** exponentes)[indice]
+
+
+def vpn(p, meses=60):
+    """
+    Solo el VPN de cada juego de `p` (mismo modelo que `proyectar`). Es la ruta
+    rápida de la sensibilidad: la utilidad antes de impuestos de todos los
+    juegos sale de un solo producto matricial (coeficientes por juego x
+    perfiles mensuales) y el descuento es un producto matriz-vector.
+    """
+    _validar_meses(meses)
+    e = estructura()
+    impuestos = montecarlo.TASA_IMPUESTOS
+    mes = np.arange(meses)
+    anio = mes // 12
+    ultimo = len(e.paquetes_mes) - 1
+    i = np.minimum(anio, ultimo)
+    extra = anio > ultimo
+
+    escala = (p.paquetes / escenarios.ENTRADAS["paquetes"].base) * (p.ticket / escenarios.TICKET_BASE)
+    margen = 1.0 - e.costo_variable - p.costo_pp / 100.0
+    depreciacion = p.inversion * e.depreciable_pct / VIDA_UTIL_MESES
+    interes = p.inversion * p.deuda_pct * p.tasa_deuda / 12.0
+    saldo = np.maximum(1.0 - mes / PLAZO_DEUDA_MESES, 0.0)
+
+    # utilidad antes de impuestos = coeficientes (k, 5) @ perfiles (5, meses)
+    perfiles = np.stack([
+        e.paquetes_mes[i] * _estacion(e, mes), e.otros_mes[i], -saldo, -(mes < VIDA_UTIL_MESES).astype(np.float64),
+        np.full(meses, -e.costo_fijo_mes),
+    ])
+    coeficientes = np.column_stack([escala * margen, margen, interes, depreciacion, np.ones_like(margen)])
+    utilidad = coeficientes @ perfiles
+    # Después de la tabla el ingreso es el del último año por (1 + g)^n: un
+    # ajuste por año extra (a lo más 7), no una potencia por mes y juego
+    for n in np.unique(anio[extra] - ultimo):
+        columnas = anio - ultimo == n
+        ingresos = coeficientes[:, :2] @ perfiles[:2, columnas]
+        utilidad[:, columnas] += ingresos * ((1.0 + p.crecimiento) ** n - 1.0)[:, None]
+
+    # Impuesto solo sobre utilidad positiva: neto = x - t * max(x, 0)
+    positiva = np.maximum(utilidad, 0.0)
+    tasa_mensual = (1.0 + p.tasa_descuento) ** (1.0 / 12.0) - 1.0
+    if np.ptp(tasa_mensual) == 0:
+        descuento = (1.0 + tasa_mensual[0]) ** -np.arange(1, meses + 1)
+        neto = utilidad @ descuento - impuestos * (positiva @ descuento)
+        dep_descontada = descuento[:VIDA_UTIL_MESES].sum()
+        saldo_descontado = saldo @ descuento
+    else:
+        descuento = _potencias(1.0 + tasa_mensual, -np.arange(1, meses + 1))
+        neto = np.einsum("km,km->k", utilidad, descuento) - impuestos * np.einsum("km,km->k", positiva, descuento)
+        dep_descontada = descuento[:, :VIDA_UTIL_MESES].sum(axis=1)
+        saldo_descontado = descuento @ saldo
+
+    # Depreciación e intereses no dependen de los ingresos: se suman en forma cerrada
+    return neto + depreciacion * dep_descontada + interes * (1.0 - impuestos) * saldo_descontado - p.inversion
+
+
+def _indicadores(p, proy, con_tir):
+    e = estructura()
+    anio1 = slice(0, 12)
+
+    # Punto de equilibrio: contribución por paquete vs gastos fijos del año 1
+    # (costo fijo, depreciación e intereses) menos lo que aportan las otras líneas
+    variable = e.costo_variable + p.costo_pp / 100.0
+    por_paquete = e.paquetes_mes[0] / escenarios.ENTRADAS["paquetes"].base * (p.ticket / escenarios.TICKET_BASE)
+    contribucion = por_paquete * (1.0 - variable)
+    fijos = e.costo_fijo_mes + proy.depreciacion[:, anio1].mean(axis=1) + proy.intereses[:, anio1].mean(axis=1)
+    faltante = fijos - e.otros_mes[0] * (1.0 - variable)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        equilibrio = np.where(contribucion > 0, np.maximum(faltante, 0.0) / contribucion, np.inf)
+
+    tasa_mensual = (1.0 + p.tasa_descuento) ** (1.0 / 12.0) - 1.0
+    tir = np.full(len(p.inversion), np.nan)
+    if con_tir:
+        tir = (1.0 + montecarlo.tir(proy.flujos)) ** 12 - 1.0
+
+    # Mismas definiciones que montecarlo.simular para liquidez y margen
+    servicio = (proy.amortizacion[:, anio1] + proy.intereses[:, anio1]).sum(axis=1)
+    activo = p.inversion * e.caja_pct + proy.utilidad_neta[:, anio1].sum(axis=1) / 12.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        liquidez = np.where(servicio > 0, activo / servicio, np.inf)
+        margen = 100.0 * proy.utilidad_neta[:, anio1].sum(axis=1) / proy.ingresos[:, anio1].sum(axis=1)
+
+    return Indicadores(
+        paquetes_equilibrio=equilibrio,
+        payback_meses=montecarlo.payback(proy.flujos),
+        caja_minima=proy.caja.min(axis=1),
+        vpn=montecarlo.vpn(proy.flujos, tasa_mensual),
+        tir=tir,
+        liquidez=liquidez,
+        endeudamiento=100.0 * p.deuda_pct,
+        margen_neto=margen,
+    )
+
+
+def indicadores(p, meses=60, con_tir=True):
+    """
+    Indicadores de cada juego de parámetros. Los lotes grandes se procesan por
+    bloques de FILAS_POR_BLOQUE para no materializar todas las matrices a la
+    vez. La TIR es lo más caro (bisección): con_tir=False la omite (NaN).
+    """
+    _validar_meses(meses)
+    k = len(p.inversion)
+    bloques = []
+    for inicio in range(0, k, FILAS_POR_BLOQUE):
+        sub = Parametros(*(a[inicio:inicio + FILAS_POR_BLOQUE] for a in p))
+        bloques.append(_indicadores(sub, proyectar(sub, meses), con_tir))
+    return Indicadores(*(np.concatenate(campo) for campo in zip(*bloques)))
+
+
+@functools.lru_cache(maxsize=128)
+def resumen(escenario=None, meses=60):
+    """Indicadores de un solo escenario what-if como floats (cacheado por proceso)."""
+    ind = indicadores(desde_escenarios([escenario or escenarios.Escenario()]), meses)
+    return {campo: float(valor[0]) for campo, valor in ind._asdict().items()}
+
+
+datos.al_cambiar(resumen.cache_clear)
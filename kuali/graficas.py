@@ -0,0 +1,688 @@
+import numpy as np
+
+from kuali import datos, escenarios, estilo
+from kuali.cache import cache_figuras, figura_cacheada, serie_cacheada
+from kuali.muestreo import ANCHO_PX, recortar, reducir_bandas
+from kuali.series import FIN_TEMPORADA, INICIO_TEMPORADA, bandas_kuali, generar_bandas, rango_fechas
+
+# ==============================================================================
+# CONSTRUCTORES DE FIGURAS
+# ==============================================================================
+# Todos los constructores son funciones puras de sus argumentos y pasan por
+# `figura_cacheada`: un rerun (de cualquier sesión) reutiliza la misma figura.
+# Si cambian las tablas de `datos` en disco, la caché completa se descarta.
+# Plotly, pydeck, pandas y los motores (montecarlo, finanzas, sensibilidad,
+# feeds, ...) se importan dentro de los constructores que los usan: importar
+# este módulo no los carga, y una figura que llega de la instantánea o de la
+# caché compartida tampoco.
+
+datos.al_cambiar(cache_figuras.limpiar)
+
+def hex_to_rgba(hex_code, opacity):
+    hex_code = hex_code.lstrip('#')
+    return f"rgba({int(hex_code[0:2], 16)}, {int(hex_code[2:4], 16)}, {int(hex_code[4:6], 16)}, {opacity})"
+
+def update_fig_layout(fig, height=None):
+    # El estilo de la casa va en la plantilla "kuali"; compactar() deja en la figura solo lo propio
+    from kuali import compacto
+
+    fig.update_layout(template=compacto.plantilla(), height=height if height else 450, **estilo.LAYOUT_GRAFICAS)
+    fig.update_xaxes(**estilo.EJES_GRAFICAS)
+    fig.update_yaxes(**estilo.EJES_GRAFICAS)
+    return compacto.compactar(fig)
+
+# Con más puntos que esto los marcadores solo ensucian la línea
+MAX_PUNTOS_CON_MARCADOR = 200
+
+# --- SERIES DE PRECIO (CACHEADAS Y SEMBRADAS POR PLATAFORMA Y RANGO) ---
+
+@serie_cacheada
+def bandas_plataforma(nombre_plataforma, volatilidad, nivel_precio,
+                      inicio=INICIO_TEMPORADA, fin=FIN_TEMPORADA, freq="D", rng=None):
+    # Precios reales: feed en vivo (KUALI_FEEDS) o volcados de cotizaciones (KUALI_COTIZACIONES)
+    from kuali import cotizaciones, feeds
+
+    reales = feeds.bandas(nombre_plataforma, inicio, fin, freq)
+    if reales is None:
+        reales = cotizaciones.bandas(nombre_plataforma, inicio, fin, freq)
+    if reales is not None:
+        return reales
+    return generar_bandas(volatilidad, nivel_precio, fechas=rango_fechas(inicio, fin, freq), rng=rng)
+
+@serie_cacheada
+def bandas_kuali_rango(inicio=INICIO_TEMPORADA, fin=FIN_TEMPORADA, freq="D", rng=None):
+    return bandas_kuali(fechas=rango_fechas(inicio, fin, freq), rng=rng)
+
+@serie_cacheada
+def matriz_precios(plataformas, inicio=INICIO_TEMPORADA, fin=FIN_TEMPORADA, freq="D"):
+    """
+    (nombres, fechas, precios (N, T)) con KUALI en la primera fila y las mismas
+    series que grafican crear_grafica_kuali / crear_grafica_plataforma. Las
+    series reales con huecos se alinean al eje completo con NaN.
+    """
+    fechas = rango_fechas(inicio, fin, freq)
+    precios = np.full((len(plataformas) + 1, len(fechas)), np.nan)
+    precios[0] = bandas_kuali_rango(inicio, fin, freq).precio_prom[0]
+    for fila, (nombre, _, sigma, nivel_precio) in enumerate(plataformas, start=1):
+        bandas = bandas_plataforma(nombre, sigma, nivel_precio, inicio, fin, freq)
+        instantes = bandas.fechas.astype(fechas.dtype)
+        posiciones = np.minimum(np.searchsorted(fechas, instantes), len(fechas) - 1)
+        en_eje = fechas[posiciones] == instantes
+        precios[fila, posiciones[en_eje]] = bandas.precio_prom[0][en_eje]
+    return ["KUALI"] + [p[0] for p in plataformas], fechas, precios
+
+@serie_cacheada
+def tabla_volatilidad(plataformas, inicio=INICIO_TEMPORADA, fin=FIN_TEMPORADA, freq="D", ventana=None):
+    # La ventana elegida se recorta sobre la matriz del histórico completo (búsqueda binaria, sin copiar)
+    from kuali import volatilidad
+
+    nombres, fechas, precios = matriz_precios(plataformas, inicio, fin, freq)
+    tramo = recortar(fechas, ventana)
+    return volatilidad.tabla(nombres, volatilidad.analizar(fechas[tramo], precios[:, tramo]))
+
+def serie_para_grafica(bandas, ventana=None, ancho_px=ANCHO_PX):
+    # Series largas: submuestreo al ancho de la gráfica y trazas WebGL
+    import plotly.graph_objects as go
+
+    serie = reducir_bandas(
+        bandas.fechas, bandas.precio_bajo[0], bandas.precio_prom[0], bandas.precio_alto[0],
+        ancho_px=ancho_px, ventana=ventana
+    )
+    traza = go.Scattergl if serie.usar_webgl else go.Scatter
+    modo = 'lines+markers' if serie.puntos_originales <= MAX_PUNTOS_CON_MARCADOR else 'lines'
+    return serie, traza, modo
+
+def formato_fechas(serie):
+    # Más de un año en pantalla: las marcas llevan el año
+    if len(serie.x_prom) and serie.x_prom[-1] - serie.x_prom[0] > np.timedelta64(366, "D"):
+        return "%b %Y"
+    return "%d %b"
+
+def anotaciones_dia_muertos(bandas, serie):
+    # Un 1 de noviembre por año dentro del tramo graficado, ubicado por fecha en el eje ordenado
+    if not len(serie.x_prom):
+        return []
+    desde, hasta = serie.x_prom[0], serie.x_prom[-1]
+    anios = np.arange(desde.astype("datetime64[Y]"), hasta.astype("datetime64[Y]") + 1)
+    fechas = (anios.astype("datetime64[M]") + 10).astype("datetime64[D]").astype(bandas.fechas.dtype)
+    posiciones = np.searchsorted(bandas.fechas, fechas)
+    anotaciones = []
+    for fecha, i in zip(fechas, posiciones):
+        if fecha < desde or fecha > hasta or i >= len(bandas.fechas) or bandas.fechas[i] != fecha:
+            continue
+        anotaciones.append(dict(
+            x=str(fecha.astype("datetime64[D]")), y=bandas.precio_prom[0][i], xref="x", yref="y",
+            text="<b>Sin abusos en Día de Muertos</b>",
+            showarrow=True, arrowhead=2, ax=0, ay=-50,
+            font=dict(color="#E67E22", size=24)
+        ))
+    return anotaciones
+
+# --- FUNCIONES GENERADORAS ---
+
+@figura_cacheada
+def crear_grafica_plataforma(nombre_plataforma, color_linea, volatilidad, nivel_precio,
+                             inicio=INICIO_TEMPORADA, fin=FIN_TEMPORADA, freq="D", ventana=None, ancho_px=ANCHO_PX):
+    import plotly.graph_objects as go
+
+    bandas = bandas_plataforma(nombre_plataforma, volatilidad, nivel_precio, inicio, fin, freq)
+    serie, traza, modo = serie_para_grafica(bandas, ventana, ancho_px)
+
+    fill_color = hex_to_rgba(color_linea, 0.2)
+
+    # --- TOOLTIP COMPETENCIA ---
+    tooltip_template = (
+        "<b>PLATAFORMA: " + nombre_plataforma + "</b><br>" +
+        "📅 Fecha: %{x|%d %b}<br>" +
+        "💸 Precio: %{y:$,.0f}<br>" +
+        "<br>" +
+        "⚠️ <b>RIESGO:</b> El precio cambia por hora.<br>" +
+        "📉 <b>CAUSA:</b> Algoritmo de Especulación.<br>" +
+        "❌ <b>EFECTO:</b> Pagas más si hay mucha demanda.<extra></extra>"
+    )
+
+    fig = go.Figure()
+    fig.add_trace(traza(x=serie.x_banda, y=serie.precio_alto, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(traza(
+        x=serie.x_banda, y=serie.precio_bajo, mode='lines', line=dict(width=0), fill='tonexty', fillcolor=fill_color, name=f'Volatilidad',
+        hoverinfo='skip'
+    ))
+    fig.add_trace(traza(
+        x=serie.x_prom, y=serie.precio_prom, mode=modo, line=dict(color=color_linea, width=4), marker=dict(size=8), name=f'Precio',
+        hovertemplate=tooltip_template
+    ))
+
+    fig.update_layout(
+        title=dict(text=f'<b>{nombre_plataforma}</b>', font=dict(size=24, color="#000000")),
+        yaxis=dict(tickformat="$,.0f"),
+        xaxis=dict(tickformat=formato_fechas(serie)),
+        showlegend=False
+    )
+    return update_fig_layout(fig, height=350)
+
+@figura_cacheada
+def crear_grafica_kuali(inicio=INICIO_TEMPORADA, fin=FIN_TEMPORADA, freq="D", ventana=None, ancho_px=ANCHO_PX):
+    import plotly.graph_objects as go
+
+    bandas = bandas_kuali_rango(inicio, fin, freq)
+    serie, traza, modo = serie_para_grafica(bandas, ventana, ancho_px)
+    precio_prom = serie.precio_prom
+
+    color_kuali = "#0A3069"
+    fill_kuali = hex_to_rgba(color_kuali, 0.15)
+
+    # --- TOOLTIP KUALI ---
+    tooltip_kuali = (
+        "<b>KUALI (NOSOTROS)</b><br>" +
+        "📅 Fecha: %{x|%d %b}<br>" +
+        "💰 Precio: %{y:$,.0f}<br>" +
+        "<br>" +
+        "✅ <b>GARANTÍA:</b> Precio Protegido y Fijo.<br>" +
+        "🤖 <b>TECNOLOGÍA:</b> IA Anti-Bias bloquea aumentos.<br>" +
+        "❤️ <b>BENEFICIO:</b> Tu presupuesto está seguro.<extra></extra>"
+    )
+
+    fig = go.Figure()
+    fig.add_trace(traza(x=serie.x_banda, y=serie.precio_alto, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(traza(
+        x=serie.x_banda, y=serie.precio_bajo, mode='lines', line=dict(width=0), fill='tonexty', fillcolor=fill_kuali, name='Volatilidad Mínima',
+        hoverinfo='skip'
+    ))
+    fig.add_trace(traza(
+        x=serie.x_prom, y=precio_prom, mode=modo, line=dict(color=color_kuali, width=6), marker=dict(size=12, symbol='square'), name='Precio KUALI',
+        hovertemplate=tooltip_kuali
+    ))
+
+    fig.update_layout(
+        title=dict(text='<b>KUALI</b>: Estabilidad Garantizada', font=dict(size=28, color="#000000")),
+        yaxis=dict(title='Precio (MXN)', tickformat="$,.0f"),
+        xaxis=dict(title='Fechas', tickformat=formato_fechas(serie)),
+        annotations=anotaciones_dia_muertos(bandas, serie)
+    )
+    return update_fig_layout(fig, height=500)
+
+# --- PESTAÑA 1: PRODUCTO ---
+
+@figura_cacheada
+def crear_mapa_rutas(ruta_od=None, zoom=4.2, inicio=INICIO_TEMPORADA, fin=FIN_TEMPORADA):
+    import pydeck as pdk
+
+    from kuali import demanda, rutas
+
+    od = rutas.matriz_od(ruta_od)
+    # El ancho de cada arco es la demanda pronosticada en [inicio, fin]
+    pronostico = demanda.pronostico(inicio, fin, ruta_od)
+    arcos = rutas.registros_arcos(od._replace(volumen=demanda.total_por_ruta(pronostico)), zoom)
+    en_linea = "origen" in arcos[0] if arcos else True
+
+    layer_arc = pdk.Layer(
+        "ArcLayer",
+        id="arcos",
+        data=arcos,
+        get_source_position="[sx, sy]",
+        get_target_position="[tx, ty]",
+        get_source_color="c",
+        get_target_color=[14, 102, 85],
+        get_width="w",
+        get_tilt=15,
+        pickable=True,
+        auto_highlight=True,
+    )
+
+    # --- TOOLTIP NARANJA FORZADO CON !IMPORTANT EN CSS ---
+    if en_linea:
+        tooltip_html = """
+        <div style='font-family: Arial; line-height: 1.4;'>
+            <b style='font-size: 1.3em;'>Ruta: {origen} ➡ {destino}</b><br/>
+            <div style='border-bottom: 2px solid #FFA500; margin: 5px 0;'></div>
+            <span>📈 T. Alta:</span> <b>{alta}</b><br/>
+            <span>📉 Motivo:</span> <b>{normal}</b><br/>
+            <span>👨‍👩‍👧‍👦 Target:</span> <b>{segmento}</b><br/>
+            <span>✈️ Pronóstico:</span> <b>{v} paquetes</b>
+        </div>
+        """
+    else:
+        # Muchos arcos: el perfil se consulta al seleccionar el arco
+        tooltip_html = """
+        <div style='font-family: Arial; line-height: 1.4;'>
+            <b style='font-size: 1.3em;'>✈️ Pronóstico: {v} paquetes</b><br/>
+            <span>Haz clic en la ruta para ver su perfil.</span>
+        </div>
+        """
+    deck_tooltip = {
+        "html": tooltip_html,
+        "style": {
+            "backgroundColor": "#0A3069",
+            "color": "#FFA500", # ESTE COLOR ES REFORZADO POR EL CSS .deck-tooltip *
+            "fontSize": "18px",
+            "padding": "15px",
+            "borderRadius": "10px",
+            "border": "2px solid #E67E22",
+            "zIndex": "1000",
+            "boxShadow": "0px 4px 15px rgba(0,0,0,0.5)"
+        }
+    }
+
+    layer_text = pdk.Layer(
+        "TextLayer",
+        data=rutas.registros_etiquetas(od),
+        get_position="[x, y]",
+        get_text="t",
+        get_color=[0, 0, 0],
+        get_size=26,
+        get_alignment_baseline="'bottom'",
+        background=True,
+        get_background_color=[255, 255, 255, 240]
+    )
+
+    view_state = pdk.ViewState(latitude=23.5, longitude=-101.0, zoom=zoom, pitch=40)
+
+    return rutas.DeckCompacto(
+        layers=[layer_arc, layer_text],
+        initial_view_state=view_state,
+        map_style=None,
+        height=850,
+        tooltip=deck_tooltip
+    )
+
+@figura_cacheada
+def crear_grafica_valor_cliente():
+    import plotly.graph_objects as go
+
+    fig_pie = go.Figure(data=[go.Pie(
+        labels=["Logística", "Hospedaje", "Tecnología", "Experiencias"],
+        values=[40, 30, 20, 10], hole=.4,
+        textinfo='label+percent',
+        textfont=dict(size=20, color="black"),
+        marker=dict(colors=["#2874A6", "#E67E22", "#2ECC71", "#F1C40F"], line=dict(color='#000000', width=2)),
+        hovertemplate='<b>%{label}</b><br>Aporte: %{percent}<extra></extra>'
+    )])
+    return update_fig_layout(fig_pie, 400)
+
+@figura_cacheada
+def crear_grafica_estructura():
+    import plotly.graph_objects as go
+
+    fig_sun = go.Figure(go.Sunburst(
+        labels=["KUALI", "Logística", "Hospedaje", "Tecnología", "Leasing", "Traslado", "Hotel", "Ruta", "IA", "Precio"],
+        parents=["", "KUALI", "KUALI", "KUALI", "Logística", "Logística", "Hospedaje", "Hospedaje", "Tecnología", "Tecnología"],
+        values=[100, 40, 30, 30, 20, 20, 15, 15, 15, 15],
+        branchvalues="total",
+        textinfo='label+percent root',
+        textfont=dict(size=18, color="black"),
+        marker=dict(colors=["#2ECC71", "#3498DB", "#E67E22", "#9B59B6", "#AED6F1", "#AED6F1", "#F5CBA7", "#F5CBA7", "#D2B4DE", "#D2B4DE"], line=dict(color='#000000', width=1)),
+        hovertemplate='<b>%{label}</b><br>Peso Total: %{percentRoot:.1%}<extra></extra>'
+    ))
+    return update_fig_layout(fig_sun, 400)
+
+@figura_cacheada
+def crear_grafica_radar():
+    import plotly.graph_objects as go
+
+    fig_radar = go.Figure()
+    fig_radar.add_trace(go.Scatterpolar(r=[5, 5, 5, 5, 4], theta=['Transparencia', 'Precio', 'Logística', 'Ética', 'Servicio'], fill='toself', name='KUALI', line_color='#2ECC71', hovertemplate='<b>KUALI:</b> %{r}/5<extra></extra>'))
+    fig_radar.add_trace(go.Scatterpolar(r=[2, 2, 1, 1, 2], theta=['Transparencia', 'Precio', 'Logística', 'Ética', 'Servicio'], fill='toself', name='OTAs', line_color='#E74C3C', hovertemplate='<b>OTAs:</b> %{r}/5<extra></extra>'))
+    fig_radar.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 5], tickfont=dict(size=16, color='black')),
+            angularaxis=dict(tickfont=dict(size=20, color='black'))
+        )
+    )
+    return update_fig_layout(fig_radar, 550)
+
+@figura_cacheada
+def crear_grafica_tecnologia():
+    import plotly.express as px
+
+    fig_tech = px.bar(
+        x=[80, 100, 95, 100], y=['Automatización API', 'Algoritmo Antibias', 'Cloud', 'Seguridad'],
+        orientation='h', text=[80, 100, 95, 100],
+        title="Nivel de Madurez Tecnológica",
+        color_discrete_sequence=['#0A3069']
+    )
+    fig_tech.update_layout(xaxis_title="%", yaxis_title="", showlegend=False)
+    fig_tech.update_traces(
+        texttemplate='%{text}%',
+        textposition='outside',
+        textfont_size=24,
+        textfont_color="black",
+        marker_line_color='black',
+        marker_line_width=2,
+        hovertemplate='<b>%{y}</b>: %{x}% Completado<extra></extra>'
+    )
+    return update_fig_layout(fig_tech, 450)
+
+# --- PESTAÑA 2: FINANCIERO ---
+
+@figura_cacheada
+def crear_grafica_inversion(inversion=None):
+    import plotly.express as px
+
+    fig_pie_inv = px.pie(
+        escenarios.tabla_inversion(inversion),
+        values='Monto Total (MXN)',
+        names='Concepto',
+        hole=0.4,
+        color_discrete_sequence=['#E74C3C', '#3498DB', '#F1C40F', '#2ECC71']
+    )
+    fig_pie_inv.update_traces(
+        textinfo='percent+label',
+        textfont_size=24,
+        textfont_color="black",
+        marker=dict(line=dict(color='#000000', width=2)),
+        hovertemplate='<b>%{label}</b><br>Monto: %{value:$,.0f}<extra></extra>'
+    )
+    return update_fig_layout(fig_pie_inv, height=700)
+
+@figura_cacheada
+def crear_grafica_financiamiento(inversion=None):
+    import plotly.graph_objects as go
+
+    colors_source = ['#FF6F61', '#48C9B0']
+    valores = escenarios.fuentes_financiamiento(inversion)
+
+    fig_source = go.Figure(data=[go.Pie(
+        labels=datos.labels_source, values=valores, hole=.6,
+        textinfo='label+percent',
+        textfont=dict(size=22, color="black"),
+        marker=dict(colors=colors_source, line=dict(color='#000000', width=2)),
+        hovertemplate='<b>%{label}</b>: %{value:$,.0f}<extra></extra>'
+    )])
+    fig_source.update_layout(
+        annotations=[dict(text=f'<b>${sum(valores) / 1e6:.1f}M</b>', x=0.5, y=0.5, font_size=50, showarrow=False, font_color="black")],
+        showlegend=True,
+        legend=dict(font=dict(size=20))
+    )
+    return update_fig_layout(fig_source, height=550)
+
+@figura_cacheada
+def crear_grafica_proyeccion(paquetes=None, ticket=None):
+    import plotly.express as px
+
+    df_melt = escenarios.tabla_proyeccion(paquetes, ticket).melt(id_vars=['Concepto'], var_name='Año', value_name='Monto')
+    fig_bar = px.bar(df_melt, x='Año', y='Monto', color='Concepto', text_auto='.2s', color_discrete_sequence=['#2ECC71', '#F39C12', '#3498DB'])
+    fig_bar.update_traces(textfont_size=20, textfont_color="black", marker_line_color='black', marker_line_width=1.5, hovertemplate='<b>%{x}</b><br>Monto: %{y:$,.0f}<extra></extra>')
+    return update_fig_layout(fig_bar, 500)
+
+@figura_cacheada
+def crear_grafica_eficiencia(paquetes=None, ticket=None, costo_pp=None):
+    import plotly.graph_objects as go
+
+    from kuali import compacto
+
+    anios = datos.anios
+    ingresos, costos_operativos_pct = escenarios.serie_eficiencia(paquetes, ticket, costo_pp)
+
+    fig_combo = go.Figure()
+    fig_combo.add_trace(go.Bar(
+        x=anios, y=ingresos, name='Ingresos Totales',
+        marker_color='#3498DB', text=ingresos, texttemplate='%{text:.2s}', textposition='inside',
+        hovertemplate='<b>Ingreso:</b> %{y:$,.0f}<extra></extra>'
+    ))
+    fig_combo.add_trace(go.Scatter(
+        x=anios, y=costos_operativos_pct, name='Costo Operativo (%)',
+        yaxis='y2', mode='lines+markers+text', text=[f"{v}%" for v in costos_operativos_pct], textposition='top center',
+        line=dict(color='#E74C3C', width=5), marker=dict(size=12, color='red'),
+        hovertemplate='<b>Costo:</b> %{y}%<extra></extra>'
+    ))
+
+    fig_combo.update_layout(
+        template=compacto.plantilla(casa=False),
+        paper_bgcolor='#FFFFFF', plot_bgcolor='#FFFFFF',
+        font=dict(color='black', size=18),
+        height=500,
+        yaxis=dict(title='Ingresos (MXN)', showgrid=True, gridcolor='#EAEDED'),
+        yaxis2=dict(title='Costo Operativo (%)', overlaying='y', side='right', range=[0, 100], showgrid=False),
+        legend=dict(x=0.1, y=1.1, orientation='h'),
+        hovermode='x unified',
+        hoverlabel=dict(bgcolor="#0A3069", font=dict(color="#FFFFFF", size=24), bordercolor="#E67E22")
+    )
+    return compacto.compactar(fig_combo)
+
+@figura_cacheada
+def crear_grafica_flujo(inversion=None, paquetes=None, ticket=None, costo_pp=None, meses=60):
+    import plotly.graph_objects as go
+
+    from kuali import finanzas, montecarlo
+
+    p = finanzas.parametros(inversion=inversion, paquetes=paquetes, ticket=ticket, costo_pp=costo_pp)
+    proy = finanzas.proyectar(p, meses)
+    mes = np.arange(1, meses + 1)
+    utilidad = proy.utilidad_neta[0]
+
+    fig_flujo = go.Figure()
+    fig_flujo.add_trace(go.Bar(
+        x=mes, y=utilidad, name='Utilidad Neta Mensual',
+        marker_color=np.where(utilidad >= 0, '#2ECC71', '#E74C3C'),
+        hovertemplate='<b>Mes %{x}</b><br>Utilidad: %{y:$,.0f}<extra></extra>'
+    ))
+    fig_flujo.add_trace(go.Scatter(
+        x=mes, y=proy.caja[0], name='Caja Acumulada', yaxis='y2',
+        line=dict(color='#0A3069', width=4),
+        hovertemplate='<b>Mes %{x}</b><br>Caja: %{y:$,.0f}<extra></extra>'
+    ))
+    payback = montecarlo.payback(proy.flujos)[0]
+    if np.isfinite(payback):
+        fig_flujo.add_vline(
+            x=payback, line_dash="dash", line_color="#E67E22", line_width=3,
+            annotation_text="<b>Recuperación</b>", annotation_font=dict(size=18, color="#E67E22")
+        )
+    fig_flujo.update_layout(
+        xaxis=dict(title='Mes'),
+        yaxis=dict(title='Utilidad Neta (MXN)', showgrid=True, gridcolor='#EAEDED'),
+        yaxis2=dict(title='Caja (MXN)', overlaying='y', side='right', showgrid=False),
+        legend=dict(x=0.1, y=1.1, orientation='h'),
+        hovermode='x unified',
+    )
+    return update_fig_layout(fig_flujo, 500)
+
+@figura_cacheada
+def crear_grafica_equilibrio(inversion=None, paquetes=None, ticket=None, costo_pp=None):
+    import plotly.graph_objects as go
+
+    from kuali import finanzas
+
+    # Utilidad neta mensual del año 1 en todo el rango de paquetes: un solo lote del modelo
+    entrada = escenarios.ENTRADAS["paquetes"]
+    volumenes = np.arange(entrada.minimo, entrada.maximo + entrada.paso, entrada.paso)
+    lote = finanzas.parametros(inversion=inversion, paquetes=volumenes, ticket=ticket, costo_pp=costo_pp)
+    utilidad = finanzas.proyectar(lote, finanzas.MESES_MIN).utilidad_neta[:, :12].mean(axis=1)
+    equilibrio = finanzas.indicadores(
+        finanzas.parametros(inversion=inversion, ticket=ticket, costo_pp=costo_pp), con_tir=False
+    ).paquetes_equilibrio[0]
+
+    fig_eq = go.Figure(go.Bar(
+        x=volumenes, y=utilidad, name='Utilidad Neta (año 1)',
+        marker_color=np.where(utilidad >= 0, '#2ECC71', '#E74C3C'),
+        hovertemplate='<b>%{x} paquetes/mes</b><br>Utilidad mensual: %{y:$,.0f}<extra></extra>'
+    ))
+    if np.isfinite(equilibrio):
+        fig_eq.add_vline(
+            x=equilibrio, line_dash="dash", line_color="#E67E22", line_width=3,
+            annotation_text=f"<b>Equilibrio: {equilibrio:.1f}</b>", annotation_font=dict(size=18, color="#E67E22")
+        )
+    actual = entrada.base if paquetes is None else paquetes
+    fig_eq.add_vline(
+        x=actual, line_color="#0A3069", line_width=2,
+        annotation_text="<b>Escenario</b>", annotation_position="bottom right",
+        annotation_font=dict(size=16, color="#0A3069")
+    )
+    fig_eq.update_layout(
+        xaxis=dict(title='Paquetes por mes'),
+        yaxis=dict(title='Utilidad Neta Mensual (MXN)', showgrid=True, gridcolor='#EAEDED'),
+        showlegend=False,
+    )
+    return update_fig_layout(fig_eq, 450)
+
+@figura_cacheada
+def crear_gauge_liquidez(valor=2.4):
+    import plotly.graph_objects as go
+
+    fig_g1 = go.Figure(go.Indicator(
+        mode="gauge+number+delta", value=valor,
+        title={'text': "Liquidez", 'font': {'color': 'black'}},
+        delta={'reference': 1.5, 'increasing': {'color': "green"}, 'position': "top"},
+        gauge={
+            'axis': {'range': [0, 5], 'tickfont': {'color': 'black', 'size': 18}},
+            'bar': {'color': "#2ECC71"},
+            'bordercolor': "black", 'borderwidth': 2,
+            'threshold': {'value': 1, 'line': {'color': "red", 'width': 4}}
+        },
+        number={'font': {'color': 'black'}}
+    ))
+    return update_fig_layout(fig_g1, 350)
+
+@figura_cacheada
+def crear_gauge_endeudamiento(valor=34):
+    import plotly.graph_objects as go
+
+    fig_g2 = go.Figure(go.Indicator(
+        mode="gauge+number+delta", value=valor,
+        title={'text': "Endeudamiento (%)", 'font': {'color': 'black'}},
+        delta={'reference': 50, 'decreasing': {'color': "green"}, 'increasing': {'color': "red"}},
+        gauge={
+            'axis': {'range': [0, 100], 'tickfont': {'color': 'black', 'size': 18}},
+            'bar': {'color': "#3498DB"},
+            'bordercolor': "black", 'borderwidth': 2
+        },
+        number={'font': {'color': 'black'}}
+    ))
+    return update_fig_layout(fig_g2, 350)
+
+@figura_cacheada
+def crear_gauge_margen(valor=14):
+    import plotly.graph_objects as go
+
+    fig_mar = go.Figure(go.Indicator(
+        mode="gauge+number+delta", value=valor,
+        title={'text': "Margen Neto (%)", 'font': {'color': 'black'}},
+        delta={'reference': 10, 'increasing': {'color': "green"}},
+        gauge={
+            'axis': {'range': [0, 25], 'tickfont': {'color': 'black', 'size': 18}},
+            'bar': {'color': "#F39C12"},
+            'threshold': {'value': 10, 'line': {'color': "gray", 'width': 4}}
+        },
+        number={'font': {'color': 'black'}}
+    ))
+    return update_fig_layout(fig_mar, 350)
+
+@figura_cacheada
+def crear_grafica_vpn(n_escenarios=100_000, semilla=0, escenario=None):
+    import plotly.graph_objects as go
+
+    from kuali import montecarlo
+
+    resultados = montecarlo.simulacion(n_escenarios, semilla, escenario=escenario)
+    kpis = montecarlo.indicadores(n_escenarios, semilla, escenario=escenario)
+    # Se envía el histograma (80 barras), no los escenarios individuales
+    conteos, bordes = np.histogram(resultados.vpn / 1e6, bins=80)
+    centros = 0.5 * (bordes[:-1] + bordes[1:])
+
+    fig_vpn = go.Figure(go.Bar(
+        x=centros, y=100.0 * conteos / conteos.sum(), width=bordes[1] - bordes[0],
+        marker_color=np.where(centros >= 0, '#2ECC71', '#E74C3C'),
+        marker_line_color='black', marker_line_width=0.5,
+        hovertemplate='<b>VPN:</b> $%{x:.2f} M<br>Escenarios: %{y:.2f}%<extra></extra>'
+    ))
+    for etiqueta, valor in (("P5", kpis["vpn_p5"]), ("P50", kpis["vpn_p50"]), ("P95", kpis["vpn_p95"])):
+        fig_vpn.add_vline(
+            x=valor / 1e6, line_dash="dash", line_color="#0A3069", line_width=3,
+            annotation_text=f"<b>{etiqueta}</b>", annotation_font=dict(size=20, color="#0A3069")
+        )
+    fig_vpn.update_layout(
+        title=dict(text=f'<b>Distribución del VPN</b> ({n_escenarios:,} escenarios)', font=dict(size=24, color="#000000")),
+        xaxis=dict(title='VPN (Millones MXN)'),
+        yaxis=dict(title='% de escenarios'),
+        bargap=0,
+        showlegend=False
+    )
+    return update_fig_layout(fig_vpn, 500)
+
+@figura_cacheada
+def crear_mapa_sensibilidad(rejilla, escenario=None):
+    import plotly.graph_objects as go
+
+    from kuali import sensibilidad
+
+    mapa = sensibilidad.mapa_calor(rejilla, escenario)
+    eje_x, eje_y = sensibilidad.VARIABLES[rejilla.x], sensibilidad.VARIABLES[rejilla.y]
+
+    # Plotly manda los arreglos numpy como binario: en float32 (millones) las
+    # 40,000 celdas pesan la mitad que en float64 y sobra precisión
+    fig_mapa = go.Figure(go.Heatmap(
+        x=mapa.xs, y=mapa.ys, z=(mapa.vpn / 1e6).astype(np.float32),
+        colorscale='RdYlGn', zmid=0, colorbar=dict(title='VPN (M)'),
+        hovertemplate=f'<b>{eje_x.etiqueta}:</b> %{{x:,.2f}}<br><b>{eje_y.etiqueta}:</b> %{{y:,.2f}}'
+                      '<br><b>VPN:</b> $%{z:,.2f} M<extra></extra>'
+    ))
+    fig_mapa.update_layout(
+        title=dict(text=f'<b>VPN a {rejilla.meses} meses</b>', font=dict(size=24, color="#000000")),
+        xaxis=dict(title=eje_x.etiqueta),
+        yaxis=dict(title=eje_y.etiqueta),
+    )
+    return update_fig_layout(fig_mapa, 600)
+
+@figura_cacheada
+def crear_grafica_tornado(escenario=None, meses=60):
+    import plotly.graph_objects as go
+
+    from kuali import sensibilidad
+
+    vpn_base, barras = sensibilidad.tornado(escenario, meses)
+    # La barra más ancha arriba
+    barras = barras[::-1]
+    etiquetas = [sensibilidad.VARIABLES[b.variable].etiqueta for b in barras]
+
+    fig_tornado = go.Figure()
+    for nombre, campo, color in (("En el mínimo", "bajo", '#E74C3C'), ("En el máximo", "alto", '#2ECC71')):
+        valores = np.array([getattr(b, campo) for b in barras])
+        fig_tornado.add_trace(go.Bar(
+            y=etiquetas, x=(valores - vpn_base) / 1e6, base=vpn_base / 1e6, orientation='h',
+            name=nombre, marker_color=color, marker_line_color='black', marker_line_width=1,
+            customdata=valores / 1e6,
+            hovertemplate='<b>%{y}</b><br>VPN: $%{customdata:,.2f} M<extra></extra>'
+        ))
+    fig_tornado.add_vline(x=vpn_base / 1e6, line_color="#0A3069", line_width=3)
+    fig_tornado.update_layout(
+        title=dict(text='<b>Tornado del VPN</b>', font=dict(size=24, color="#000000")),
+        xaxis=dict(title='VPN (Millones MXN)'),
+        barmode='overlay',
+        legend=dict(x=0.1, y=1.1, orientation='h'),
+    )
+    return update_fig_layout(fig_tornado, 600)
+
+# --- PESTAÑA 3: MERCADO ---
+
+@figura_cacheada
+def crear_grafica_demanda():
+    import plotly.graph_objects as go
+
+    fig_don = go.Figure(data=[go.Pie(
+        labels=['Migraría a KUALI', 'Otros'],
+        values=[82, 18], hole=.6,
+        marker_colors=['#27AE60', '#D5D8DC'],
+        textinfo='none',
+        marker=dict(line=dict(color='#000000', width=3)),
+        hovertemplate='<b>%{label}:</b> %{percent}<extra></extra>'
+    )])
+    fig_don.update_layout(
+        annotations=[dict(text='<b>82%</b>', x=0.5, y=0.5, font_size=90, showarrow=False, font_color="#000000")]
+    )
+    return update_fig_layout(fig_don, 700)
+
+@figura_cacheada
+def crear_grafica_razones():
+    import pandas as pd
+    import plotly.express as px
+
+    df_razones = pd.DataFrame({
+        'Motivo': ['Desconfianza Cargos Ocultos', 'Odio a Precios Dinámicos', 'Busca Transparencia'],
+        'Porcentaje': [87, 75, 82]
+    })
+    fig_raz = px.bar(
+        df_razones, x='Porcentaje', y='Motivo', orientation='h', text='Porcentaje',
+        color='Porcentaje', color_continuous_scale='Reds'
+    )
+    fig_raz.update_layout(yaxis=dict(autorange="reversed"), showlegend=False)
+    fig_raz.update_traces(texttemplate='%{text}%', textposition='inside', textfont_size=24, textfont_color="white", marker_line_color='black', marker_line_width=1.5, hovertemplate='<b>%{y}:</b> %{x}%<extra></extra>')
+    return update_fig_layout(fig_raz, 500)
@@ -0,0 +1,149 @@
+import argparse
+import os
+import pickle
+import sys
+import threading
+import time
+
+from kuali import almacen, apptest, datos
+from kuali.cache import cache_figuras
+
+# ==============================================================================
+# INSTANTÁNEA DE LAS FIGURAS INICIALES (ARRANQUE EN FRÍO)
+# ==============================================================================
+# Un proceso recién creado (autoescalado, reinicio) tarda en su primera corrida
+# lo que tardan pandas / plotly.express / pydeck en importarse más todas las
+# figuras de la página en construirse. `python -m kuali.instantanea` ejecuta la
+# app una vez por página con sus valores iniciales y guarda en un archivo el
+# JSON de cada figura que se construyó, con su clave exacta de cache_figuras.
+# Con KUALI_INSTANTANEA apuntando a ese archivo, el proceso lo lee al arrancar:
+# cada figura de la instantánea se arma sin validar la primera vez que se pide
+# (~3 ms) en lugar de construirse, y lo que no está ahí sigue el camino normal.
+# - La instantánea lleva la huella de kuali.almacen (código, tablas, Plotly):
+#   si no coincide con la del proceso se ignora completa.
+# - Si las tablas cambian con el servidor corriendo, se descarta.
+
+RUTA_INSTANTANEA = os.environ.get("KUALI_INSTANTANEA")
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+PAGINAS = ("producto", "financiero", "mercado")
+
+
+class Instantanea:
+    # Respaldo de cache_figuras que entrega cada figura una vez y delega el resto
+    def __init__(self, entradas, siguiente=None):
+        self.entradas = entradas    # clave de caché -> (formato, bytes) de almacen.serializar
+        self.siguiente = siguiente
+        self._lock = threading.Lock()
+
+    def leer(self, clave):
+        with self._lock:
+            entrada = self.entradas.pop(clave, None)
+        if entrada is not None:
+            return almacen.deserializar(*entrada)
+        return self.siguiente.leer(clave) if self.siguiente is not None else None
+
+    def escribir(self, clave, valor):
+        if self.siguiente is not None:
+            self.siguiente.escribir(clave, valor)
+
+    def olvidar(self):
+        with self._lock:
+            self.entradas.clear()
+
+
+_lock = threading.Lock()
+_cargada = None     # ruta ya cargada en este proceso (se lee una sola vez)
+_instantanea = None
+
+
+def cargar(ruta=None):
+    """Pone la instantánea delante de cache_figuras. Sin ruta ni KUALI_INSTANTANEA no hace nada."""
+    global _cargada, _instantanea
+    ruta = ruta or RUTA_INSTANTANEA
+    if not ruta:
+        return None
+    with _lock:
+        if _cargada == ruta:
+            return _instantanea
+        _cargada = ruta
+        try:
+            with open(ruta, "rb") as f:
+                contenido = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"[instantanea] {ruta}: {e}; se construye todo", file=sys.stderr)
+            return None
+        if contenido.get("huella") != almacen.huella():
+            print(f"[instantanea] {ruta} es de otra versión del código o de los datos; se ignora", file=sys.stderr)
+            return None
+        _instantanea = Instantanea(dict(contenido["figuras"]), cache_figuras.respaldo)
+        cache_figuras.respaldo = _instantanea
+        return _instantanea
+
+
+def descargar():
+    # Quita la instantánea de cache_figuras (la siguiente cargar() vuelve a leer el archivo)
+    global _cargada, _instantanea
+    with _lock:
+        if _instantanea is not None and cache_figuras.respaldo is _instantanea:
+            cache_figuras.respaldo = _instantanea.siguiente
+        _cargada = _instantanea = None
+
+
+def _olvidar():
+    if _instantanea is not None:
+        _instantanea.olvidar()
+
+
+datos.al_cambiar(_olvidar)
+
+
+def _correr_paginas(app):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app, default_timeout=300)
+    for i, pagina in enumerate(PAGINAS):
+        if i:
+            apptest.ir_a(at, pagina)
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"La app falló en '{pagina}': {at.exception[0].value}")
+
+
+def escribir(ruta, app=APP, log=print):
+    """Ejecuta cada página de la app en frío y guarda las figuras que construyó."""
+    global _cargada
+    _cargada = ruta     # la corrida no debe leer una instantánea anterior
+    cache_figuras.limpiar()
+    t0 = time.perf_counter()
+    try:
+        _correr_paginas(app)
+    except apptest.NoSoportado as e:
+        # Sin forma de navegar entre páginas el proceso arranca sin instantánea, como sin KUALI_INSTANTANEA
+        print(f"[instantanea] {e}; no se genera la instantánea", file=sys.stderr)
+        return 0
+    figuras = {}
+    for clave, valor in cache_figuras.elementos():
+        if not almacen.compartible(clave) or " at 0x" in repr(clave):
+            continue
+        figuras[clave] = almacen.serializar(valor)
+        log(f"  ✓ {clave[0]:<28} {len(figuras[clave][1]):>10,} B")
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        pickle.dump({"huella": almacen.huella(), "figuras": figuras}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+    log(f"{len(figuras)} figuras en {ruta} ({os.path.getsize(ruta):,} B, {time.perf_counter() - t0:.1f} s)")
+    return len(figuras)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera la instantánea de figuras iniciales del dashboard KUALI.")
+    parser.add_argument("ruta", nargs="?", default=RUTA_INSTANTANEA or "instantanea.pkl",
+                        help="Archivo de salida (default: KUALI_INSTANTANEA o instantanea.pkl)")
+    parser.add_argument("--app", default=APP, help="Script de Streamlit a ejecutar (default: app.py)")
+    args = parser.parse_args(argv)
+    escribir(args.ruta, args.app)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
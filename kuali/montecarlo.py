@@ -0,0 +1,206 @@
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from kuali import datos, escenarios
+
+# ==============================================================================
+# MOTOR MONTE CARLO DE VIABILIDAD (VPN, TIR, PAYBACK)
+# ==============================================================================
+# Cada escenario perturba las líneas de ingreso, la curva de costo operativo
+# (costos_operativos_pct) y la mezcla de financiamiento. Todo se calcula como
+# arreglos (escenarios x años); no hay ciclos de Python por escenario.
+
+TASA_DESCUENTO = 0.12
+TASA_IMPUESTOS = 0.40          # ISR 30% + PTU 10%
+TASA_DEUDA = (0.12, 0.18)      # Rango de tasa anual del financiamiento
+
+# Por encima de este tamaño la simulación se parte en BLOQUES fijos (la semilla
+# de cada uno no depende de cuántos procesos haya) y se reparte en un pool
+UMBRAL_PARALELO = 400_000
+BLOQUES = 8
+
+
+class Resultados(NamedTuple):
+    vpn: np.ndarray            # (n,) MXN
+    tir: np.ndarray            # (n,) fracción anual (NaN si no existe)
+    payback: np.ndarray        # (n,) años (inf si no se recupera)
+    margen_neto: np.ndarray    # (n,) % del año 1
+    endeudamiento: np.ndarray  # (n,) % deuda / inversión
+    liquidez: np.ndarray       # (n,) activo circulante / pasivo circulante (año 1)
+
+
+def supuestos_base(escenario=None):
+    escenario = escenario or escenarios.Escenario()
+    proyeccion = escenarios.tabla_proyeccion(escenario.paquetes, escenario.ticket)
+    ingresos = proyeccion.drop(columns='Concepto').to_numpy(dtype=np.float64)
+    inversion = escenarios.tabla_inversion(escenario.inversion).set_index('Concepto')['Monto Total (MXN)']
+    _, costos_pct = escenarios.serie_eficiencia(costo_pp=escenario.costo_pp)
+    return {
+        "ingresos": ingresos,                                               # (lineas, años)
+        "costos_pct": np.asarray(costos_pct, dtype=np.float64) / 100.0,
+        "inversion": float(escenario.inversion),
+        "deuda_pct": datos.values_source[1] / sum(datos.values_source),
+        "capital_trabajo": float(inversion['Capital Trabajo (Reserva)']),
+    }
+
+
+def vpn(flujos, tasa):
+    # flujos: (n, periodos) con el periodo 0 en la primera columna
+    descuento = (1.0 + np.asarray(tasa, dtype=np.float64)[..., None]) ** -np.arange(flujos.shape[-1])
+    return (flujos * descuento).sum(axis=-1)
+
+
+def _vpn_horner(flujos, x):
+    # VPN como polinomio en x = 1 / (1 + tasa), evaluado con Horner
+    total = flujos[:, -1].copy()
+    for k in range(flujos.shape[1] - 2, -1, -1):
+        total *= x
+        total += flujos[:, k]
+    return total
+
+
+def tir(flujos, iteraciones=60, bajo=-0.99, alto=20.0):
+    """TIR por bisección vectorizada; NaN donde el VPN no cambia de signo en el rango."""
+    n = flujos.shape[0]
+    # Se bisecta en x = 1 / (1 + tasa): x decrece al crecer la tasa
+    x_lo = np.full(n, 1.0 / (1.0 + alto))
+    x_hi = np.full(n, 1.0 / (1.0 + bajo))
+    f_lo = _vpn_horner(flujos, x_lo)
+    valida = np.sign(f_lo) != np.sign(_vpn_horner(flujos, x_hi))
+    for _ in range(iteraciones):
+        x_mid = 0.5 * (x_lo + x_hi)
+        f_mid = _vpn_horner(flujos, x_mid)
+        mismo_signo = np.sign(f_mid) == np.sign(f_lo)
+        x_lo = np.where(mismo_signo, x_mid, x_lo)
+        f_lo = np.where(mismo_signo, f_mid, f_lo)
+        x_hi = np.where(mismo_signo, x_hi, x_mid)
+    return np.where(valida, 1.0 / (0.5 * (x_lo + x_hi)) - 1.0, np.nan)
+
+
+def payback(flujos):
+    """Años (fraccionarios) hasta recuperar la inversión; inf si no ocurre."""
+    acumulado = np.cumsum(flujos, axis=1)
+    recuperado = acumulado >= 0
+    periodo = np.argmax(recuperado, axis=1)
+    nunca = ~recuperado.any(axis=1)
+    periodo = np.maximum(periodo, 1)
+    filas = np.arange(flujos.shape[0])
+    previo = acumulado[filas, periodo - 1]
+    flujo = flujos[filas, periodo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultado = (periodo - 1) + np.where(flujo > 0, -previo / flujo, 0.0)
+    return np.where(nunca, np.inf, resultado)
+
+
+def _simular_bloque(n, semilla, supuestos, tasa_descuento):
+    rng = np.random.default_rng(semilla)
+    ingresos_base = supuestos["ingresos"]
+    lineas, anios = ingresos_base.shape
+
+    # --- INGRESOS: choque común de mercado + choque propio de cada línea ---
+    comun = rng.normal(0.0, 0.15, size=(n, 1, anios))
+    propio = rng.normal(0.0, 0.10, size=(n, lineas, anios))
+    choque = np.exp(comun + propio - 0.5 * (0.15 ** 2 + 0.10 ** 2))
+    ingresos = (ingresos_base[None] * choque).sum(axis=1)                     # (n, años)
+
+    # --- COSTO OPERATIVO: desplazamiento persistente + ruido anual ---
+    costos_pct = supuestos["costos_pct"][None] + rng.normal(0.0, 0.04, size=(n, 1)) + rng.normal(0.0, 0.02, size=(n, anios))
+    costos_pct = np.clip(costos_pct, 0.30, 0.95)
+
+    # --- FINANCIAMIENTO: mezcla deuda/capital y tasa ---
+    deuda_pct = np.clip(rng.normal(supuestos["deuda_pct"], 0.08, size=n), 0.0, 0.6)
+    deuda = supuestos["inversion"] * deuda_pct
+    tasa_deuda = rng.uniform(*TASA_DEUDA, size=n)
+    saldo = deuda[:, None] * (1.0 - np.arange(anios) / anios)                  # amortización lineal
+    intereses = saldo * tasa_deuda[:, None]
+    amortizacion = np.broadcast_to((deuda / anios)[:, None], (n, anios))
+
+    ebit = ingresos * (1.0 - costos_pct)
+    utilidad_neta = np.where(ebit - intereses > 0, (ebit - intereses) * (1.0 - TASA_IMPUESTOS), ebit - intereses)
+
+    flujos = np.empty((n, anios + 1))
+    flujos[:, 0] = -supuestos["inversion"]
+    flujos[:, 1:] = utilidad_neta + intereses * (1.0 - TASA_IMPUESTOS)          # flujo libre del proyecto
+
+    activo_circulante = supuestos["capital_trabajo"] + utilidad_neta[:, 0] / 12.0
+    pasivo_circulante = amortizacion[:, 0] + intereses[:, 0]
+    with np.errstate(divide="ignore"):
+        liquidez = np.where(pasivo_circulante > 0, activo_circulante / pasivo_circulante, np.inf)
+
+    return Resultados(
+        vpn=vpn(flujos, np.full(n, tasa_descuento)),
+        tir=tir(flujos),
+        payback=payback(flujos),
+        margen_neto=100.0 * utilidad_neta[:, 0] / ingresos[:, 0],
+        endeudamiento=100.0 * deuda_pct,
+        liquidez=liquidez,
+    )
+
+
+def simular(n_escenarios=100_000, semilla=0, tasa_descuento=TASA_DESCUENTO, supuestos=None, procesos=None):
+    """
+    Simula `n_escenarios` de viabilidad. Corridas mayores a UMBRAL_PARALELO se
+    dividen en BLOQUES independientes (SeedSequence.spawn) que corren en un pool
+    de `procesos`; el resultado solo depende de la semilla y de `n_escenarios`.
+    """
+    supuestos = supuestos or supuestos_base()
+    if n_escenarios <= UMBRAL_PARALELO:
+        return _simular_bloque(n_escenarios, semilla, supuestos, tasa_descuento)
+
+    tamanos = [len(b) for b in np.array_split(np.arange(n_escenarios), BLOQUES)]
+    semillas = np.random.SeedSequence(semilla).spawn(BLOQUES)
+    if procesos is None:
+        procesos = min(os.cpu_count() or 1, BLOQUES)
+    if procesos <= 1:
+        bloques = [_simular_bloque(t, s, supuestos, tasa_descuento) for t, s in zip(tamanos, semillas)]
+    else:
+        # forkserver: hacer fork del servidor de Streamlit (con hilos) puede trabarse
+        contexto = multiprocessing.get_context("forkserver")
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            bloques = list(pool.map(
+                _simular_bloque, tamanos, semillas, [supuestos] * BLOQUES, [tasa_descuento] * BLOQUES
+            ))
+    return Resultados(*(np.concatenate(campo) for campo in zip(*bloques)))
+
+
+def resumen(resultados):
+    finitos = np.isfinite(resultados.payback)
+    return {
+        "vpn_p5": float(np.percentile(resultados.vpn, 5)),
+        "vpn_p50": float(np.median(resultados.vpn)),
+        "vpn_p95": float(np.percentile(resultados.vpn, 95)),
+        "prob_vpn_positivo": float((resultados.vpn > 0).mean()),
+        "tir_p50": float(np.nanmedian(resultados.tir)),
+        "payback_p50": float(np.median(resultados.payback[finitos])) if finitos.any() else float("inf"),
+        "margen_neto": float(np.median(resultados.margen_neto)),
+        "endeudamiento": float(np.median(resultados.endeudamiento)),
+        "liquidez": float(np.median(resultados.liquidez)),
+    }
+
+
+@functools.lru_cache(maxsize=8)
+def simulacion(n_escenarios=100_000, semilla=0, tasa_descuento=TASA_DESCUENTO, escenario=None):
+    # Compartida por todas las sesiones del proceso (solo lectura)
+    return simular(n_escenarios, semilla, tasa_descuento, supuestos_base(escenario))
+
+
+# Los indicadores pesan poco: se conservan más escenarios what-if que simulaciones
+@functools.lru_cache(maxsize=128)
+def indicadores(n_escenarios=100_000, semilla=0, tasa_descuento=TASA_DESCUENTO, escenario=None):
+    return resumen(simulacion(n_escenarios, semilla, tasa_descuento, escenario))
+
+
+# Las tablas de datos cambiaron en disco: los supuestos base ya no son los mismos
+datos.al_cambiar(simulacion.cache_clear)
+datos.al_cambiar(indicadores.cache_clear)
+
+
+def valores_gauges(n_escenarios=100_000, semilla=0, escenario=None):
+    # Redondeados: son parte de la clave de caché de cada gauge
+    kpis = indicadores(n_escenarios, semilla, escenario=escenario)
+    return round(kpis["liquidez"], 1), round(kpis["endeudamiento"]), round(kpis["margen_neto"])
@@ -0,0 +1,102 @@
+from typing import NamedTuple
+
+import numpy as np
+
+# ==============================================================================
+# SUBMUESTREO DEL LADO SERVIDOR PARA SERIES LARGAS
+# ==============================================================================
+# Una serie horaria de un año son 8,760 puntos x 3 trazas por gráfica. Nadie ve
+# más puntos que píxeles: se reduce al ancho de la gráfica conservando la forma
+# (LTTB para la línea de precio, mínimo/máximo por cubeta para la banda).
+
+ANCHO_PX = 1200        # Ancho de referencia de una gráfica en pantalla
+UMBRAL_WEBGL = 1000    # Puntos por traza a partir de los cuales se usa Scattergl
+
+
+class SerieReducida(NamedTuple):
+    x_banda: np.ndarray
+    precio_bajo: np.ndarray
+    precio_alto: np.ndarray
+    x_prom: np.ndarray
+    precio_prom: np.ndarray
+    puntos_originales: int
+    usar_webgl: bool
+
+
+def lttb(x, y, n_salida):
+    """Índices de Largest-Triangle-Three-Buckets (Steinarsson, 2013)."""
+    n = len(y)
+    if n_salida >= n or n_salida < 3:
+        return np.arange(n)
+    x = np.asarray(x).astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    cada = (n - 2) / (n_salida - 2)
+    bordes = np.append(np.floor(np.arange(n_salida - 1) * cada).astype(np.int64) + 1, n)
+    indices = np.empty(n_salida, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(n_salida - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        siguiente = slice(bordes[i + 1], bordes[i + 2])
+        prom_x = x[siguiente].mean()
+        prom_y = y[siguiente].mean()
+        area = np.abs((x[a] - prom_x) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (prom_y - y[a]))
+        a = inicio + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def bordes_cubetas(n, n_cubetas):
+    return np.unique(np.linspace(0, n, n_cubetas + 1).astype(np.int64)[:-1])
+
+
+def envolvente(bajo, alto, n_cubetas):
+    """Mínimo de `bajo` y máximo de `alto` por cubeta: la banda nunca se angosta."""
+    bordes = bordes_cubetas(len(bajo), n_cubetas)
+    return bordes, np.minimum.reduceat(bajo, bordes), np.maximum.reduceat(alto, bordes)
+
+
+def recortar(fechas, ventana):
+    # `fechas` está ordenado: la ventana se resuelve con búsqueda binaria
+    if ventana is None:
+        return slice(None)
+    inicio = np.searchsorted(fechas, np.datetime64(ventana[0]), side="left")
+    fin = np.searchsorted(fechas, np.datetime64(ventana[1]), side="right")
+    return slice(inicio, fin)
+
+
+def reducir_bandas(fechas, precio_bajo, precio_prom, precio_alto, ancho_px=ANCHO_PX, ventana=None):
+    tramo = recortar(fechas, ventana)
+    fechas = fechas[tramo]
+    precio_bajo, precio_prom, precio_alto = precio_bajo[tramo], precio_prom[tramo], precio_alto[tramo]
+    n = len(fechas)
+
+    if n <= ancho_px:
+        return SerieReducida(fechas, precio_bajo, precio_alto, fechas, precio_prom, n, n >= UMBRAL_WEBGL)
+
+    bordes, bajo, alto = envolvente(precio_bajo, precio_alto, ancho_px // 2)
+    indices = lttb(fechas.astype(np.int64), precio_prom, ancho_px)
+    return SerieReducida(
+        fechas[bordes], bajo, alto, fechas[indices], precio_prom[indices], n, ancho_px >= UMBRAL_WEBGL
+    )
+
+
+def ventana_desde_seleccion(estado):
+    """
+    Ventana (inicio, fin) en ISO a partir del estado de selección por caja de
+    st.plotly_chart; None si no hay caja (p. ej. tras doble clic).
+    """
+    cajas = ((estado or {}).get("selection") or {}).get("box") or []
+    if not cajas or len(cajas[0].get("x", [])) != 2:
+        return None
+    extremos = []
+    for valor in cajas[0]["x"]:
+        if isinstance(valor, (int, float)):
+            fecha = np.datetime64(int(valor), "ms")
+        else:
+            fecha = np.datetime64(str(valor).strip())
+        extremos.append(fecha.astype("datetime64[m]"))
+    inicio, fin = sorted(extremos)
+    return (str(inicio), str(fin))
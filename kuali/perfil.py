@@ -0,0 +1,212 @@
+import contextlib
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# ==============================================================================
+# PERFIL POR SECCIÓN (?perfil=1 o KUALI_PERFIL=1)
+# ==============================================================================
+# Mide el tiempo de cada bloque de la página (construir la figura + enviarla) y
+# los bytes que ese bloque manda al navegador. Los bytes se cuentan en la cola
+# de mensajes de la sesión, así que reflejan lo que realmente viaja (un mensaje
+# que el navegador ya tiene en caché cuenta solo como referencia).
+# Desactivado, cada bloque es un contextlib.nullcontext: costo prácticamente nulo.
+# Un rerun de un fragmento (@st.fragment) no vuelve a ejecutar la página: el
+# perfil de la página ya se cerró, así que el fragmento mide con uno propio
+# (`fragmento`) y muestra su panel dentro de sí mismo.
+
+# Si se define, cada corrida perfilada escribe ahí su JSON
+DIRECTORIO_EXPORTACION = os.environ.get("KUALI_PERFIL_DIR")
+
+
+class Registro(NamedTuple):
+    bloque: str
+    segundos: float
+    bytes: int
+
+
+class Arranque(NamedTuple):
+    pagina: str             # primera página que sirvió el proceso
+    importacion_s: float    # módulos de la sección importados en esa corrida
+    primer_render_s: float  # corrida completa del script, de la primera línea al final
+
+
+# --- ARRANQUE DEL PROCESO: se mide una sola vez, siempre (aunque el perfil esté apagado) ---
+_lock = threading.Lock()
+_importaciones = {}     # sección -> segundos de su primera importación
+_actuales = {}          # sesión -> Perfil de la corrida en curso (página o fragmento)
+arranque = None
+
+
+@contextlib.contextmanager
+def importando(seccion):
+    """Mide las importaciones diferidas de una sección (solo cuenta la primera vez)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _importaciones.setdefault(seccion, time.perf_counter() - inicio)
+
+
+def _registrar_arranque(pagina, segundos):
+    global arranque
+    with _lock:
+        if arranque is not None:
+            return
+        arranque = Arranque(pagina, sum(_importaciones.values()), segundos)
+    print(
+        f"[arranque] /{pagina}: importaciones {arranque.importacion_s * 1000:,.0f} ms · "
+        f"primer render {arranque.primer_render_s * 1000:,.0f} ms",
+        file=sys.stderr,
+    )
+
+
+class Perfil:
+    def __init__(self, pagina, activo, inicio=None):
+        self.pagina = pagina
+        self.activo = activo
+        self.registros = []
+        self.bytes_totales = 0
+        # `inicio`: perf_counter de la primera línea del script (incluye lo previo a la página)
+        self._inicio = time.perf_counter() if inicio is None else inicio
+        self._contexto = None
+        self._enqueue_original = None
+        self.total = None
+
+    def iniciar(self):
+        with _lock:
+            _actuales[_sesion()] = self
+        if not self.activo:
+            return self
+        contexto = get_script_run_ctx()
+        # _enqueue es interno de Streamlit: sin él solo se mide el tiempo
+        if contexto is not None and hasattr(contexto, "_enqueue"):
+            original = contexto._enqueue
+
+            def contar(mensaje):
+                self.bytes_totales += mensaje.ByteSize()
+                original(mensaje)
+
+            self._contexto, self._enqueue_original = contexto, original
+            contexto._enqueue = contar
+        return self
+
+    def finalizar(self):
+        with _lock:
+            if _actuales.get(_sesion()) is self:
+                del _actuales[_sesion()]
+        if self._contexto is not None:
+            self._contexto._enqueue = self._enqueue_original
+            self._contexto = None
+        self.total = Registro("TOTAL", time.perf_counter() - self._inicio, self.bytes_totales)
+        _registrar_arranque(self.pagina, self.total.segundos)
+        return self
+
+    def bloque(self, nombre):
+        if not self.activo:
+            return contextlib.nullcontext()
+        return self._medir(nombre)
+
+    @contextlib.contextmanager
+    def _medir(self, nombre):
+        bytes_previos = self.bytes_totales
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registros.append(Registro(nombre, time.perf_counter() - inicio, self.bytes_totales - bytes_previos))
+
+    def exportar(self):
+        return {
+            "pagina": self.pagina,
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "total": self.total._asdict(),
+            "arranque": arranque._asdict() if arranque else None,
+            "bloques": [r._asdict() for r in self.registros],
+        }
+
+    def guardar(self, directorio=DIRECTORIO_EXPORTACION):
+        if not directorio:
+            return None
+        os.makedirs(directorio, exist_ok=True)
+        sello = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        ruta = os.path.join(directorio, f"perfil-{self.pagina}-{sello}.json")
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(self.exportar(), f, indent=2, ensure_ascii=False)
+        return ruta
+
+
+def _sesion():
+    contexto = get_script_run_ctx()
+    return contexto.session_id if contexto is not None else None
+
+
+_INACTIVO = Perfil("", False)
+
+
+def actual():
+    """Perfil de la corrida en curso de esta sesión (uno apagado si no hay)."""
+    with _lock:
+        return _actuales.get(_sesion(), _INACTIVO)
+
+
+def esta_activo(estado_sesion):
+    return bool(estado_sesion.get("perfil")) or os.environ.get("KUALI_PERFIL") == "1"
+
+
+@contextlib.contextmanager
+def fragmento(pagina):
+    """Dentro de la corrida de la página usa su perfil; en un rerun del fragmento, uno propio."""
+    if actual() is not _INACTIVO:
+        yield actual()
+        return
+    propio = Perfil(f"{pagina}-fragmento", esta_activo(st.session_state)).iniciar()
+    try:
+        yield propio
+    finally:
+        propio.finalizar()
+    if propio.activo:
+        # Un fragmento no puede escribir en la barra lateral
+        mostrar_panel(propio, st.expander(f"⏱️ Perfil del fragmento: /{pagina}", expanded=True))
+
+
+def mostrar_panel(perfil, contenedor=None):
+    # El panel va después de finalizar(): sus propios bytes no se cuentan
+    import pandas as pd
+
+    ruta = perfil.guardar()
+    tabla = pd.DataFrame(perfil.registros, columns=Registro._fields)
+    tabla = tabla.assign(ms=tabla.segundos * 1000, KB=tabla.bytes / 1024)
+    tabla = tabla.sort_values("ms", ascending=False)[["bloque", "ms", "KB"]]
+
+    with contenedor or st.sidebar:
+        st.markdown(f"### ⏱️ Perfil: /{perfil.pagina}")
+        c1, c2 = st.columns(2)
+        c1.metric("Tiempo total", f"{perfil.total.segundos * 1000:,.0f} ms")
+        c2.metric("Enviado", f"{perfil.total.bytes / 1024:,.1f} KB")
+        if arranque is not None:
+            st.caption(
+                f"Arranque del proceso (/{arranque.pagina}): importaciones {arranque.importacion_s * 1000:,.0f} ms · "
+                f"primer render {arranque.primer_render_s * 1000:,.0f} ms"
+            )
+        st.dataframe(
+            tabla, hide_index=True, use_container_width=True,
+            column_config={
+                "ms": st.column_config.NumberColumn(format="%.1f"),
+                "KB": st.column_config.NumberColumn(format="%.1f"),
+            },
+        )
+        st.download_button(
+            "Exportar JSON", json.dumps(perfil.exportar(), indent=2, ensure_ascii=False),
+            file_name=f"perfil-{perfil.pagina}.json", mime="application/json",
+        )
+        if ruta:
+            st.caption(f"Guardado en `{ruta}`")
@@ -0,0 +1,219 @@
+import functools
+import json
+import os
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from kuali import datos
+
+# ==============================================================================
+# RUTAS ORIGEN-DESTINO: CARGA, AGREGACIÓN POR ZOOM Y CODIFICACIÓN COMPACTA
+# ==============================================================================
+# Con decenas de miles de arcos el costo está en el JSON que viaja al navegador.
+# Aquí los arcos se mandan como registros planos de claves cortas y coordenadas
+# redondeadas; los textos del tooltip (alta, normal, segmento) se quedan en el
+# servidor y solo se consultan para el arco seleccionado.
+
+# Archivo OD opcional (CSV o Parquet); sin él se usan las rutas del pitch
+RUTA_OD = os.environ.get("KUALI_RUTAS_OD")
+
+COLUMNAS_OD = ["origen", "destino", "lon_origen", "lat_origen", "lon_destino", "lat_destino", "volumen"]
+COLUMNAS_DETALLE = ["alta", "normal", "segmento"]
+
+# Hasta este número de arcos los textos del tooltip viajan en línea (hover)
+UMBRAL_TOOLTIP_EN_LINEA = 200
+MAX_ARCOS = 3000
+MAX_ETIQUETAS = 40
+DECIMALES = 4  # ~11 m de precisión
+
+PALETA = np.array([
+    [255, 0, 128], [255, 165, 0], [0, 255, 0], [0, 255, 255], [138, 43, 226], [255, 215, 0],
+    [231, 76, 60], [52, 152, 219], [46, 204, 113], [243, 156, 18],
+], dtype=np.uint8)
+
+
+class MatrizOD(NamedTuple):
+    origen: np.ndarray    # (n,) str
+    destino: np.ndarray   # (n,) str
+    src: np.ndarray       # (n, 2) lon, lat
+    dst: np.ndarray       # (n, 2) lon, lat
+    volumen: np.ndarray   # (n,) float (NaN si no se conoce)
+    color: np.ndarray     # (n, 3) uint8
+    detalle: pd.DataFrame  # textos por arco (solo servidor), índice = id de arco
+
+
+def od_desde_rutas(rutas=None, destino="CDMX"):
+    rutas = datos.rutas_data if rutas is None else rutas
+    return MatrizOD(
+        origen=np.array([r["origen"] for r in rutas], dtype=object),
+        destino=np.array([r.get("destino", destino) for r in rutas], dtype=object),
+        src=np.array([r["source"] for r in rutas], dtype=np.float64),
+        dst=np.array([r["target"] for r in rutas], dtype=np.float64),
+        volumen=np.array([r.get("volumen", np.nan) for r in rutas], dtype=np.float64),
+        color=np.array([r["color"] for r in rutas], dtype=np.uint8),
+        detalle=pd.DataFrame({c: [r.get(c, "") for r in rutas] for c in COLUMNAS_DETALLE}),
+    )
+
+
+def cargar_od(ruta):
+    """Lee una matriz OD (CSV o Parquet) con las columnas de COLUMNAS_OD."""
+    if str(ruta).endswith(".parquet"):
+        df = pd.read_parquet(ruta)
+    else:
+        df = pd.read_csv(ruta)
+    faltantes = [c for c in COLUMNAS_OD if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en la matriz OD {ruta}: {faltantes}")
+    df = df.reset_index(drop=True)
+
+    if {"r", "g", "b"} <= set(df.columns):
+        color = df[["r", "g", "b"]].to_numpy(dtype=np.uint8)
+    else:
+        codigos = pd.factorize(df["origen"])[0]
+        color = PALETA[codigos % len(PALETA)]
+
+    return MatrizOD(
+        origen=df["origen"].to_numpy(dtype=object),
+        destino=df["destino"].to_numpy(dtype=object),
+        src=df[["lon_origen", "lat_origen"]].to_numpy(dtype=np.float64),
+        dst=df[["lon_destino", "lat_destino"]].to_numpy(dtype=np.float64),
+        volumen=df["volumen"].to_numpy(dtype=np.float64),
+        color=color,
+        detalle=df.reindex(columns=COLUMNAS_DETALLE).fillna(""),
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def matriz_od(ruta=None):
+    ruta = ruta or RUTA_OD
+    return cargar_od(ruta) if ruta else od_desde_rutas()
+
+
+datos.al_cambiar(matriz_od.cache_clear)
+
+
+def tamano_celda(zoom):
+    # Grados por celda de agregación: 2° en zoom 4, 0.5° en zoom 6, 0.125° en zoom 8
+    return 2.0 * 2.0 ** (4.0 - zoom)
+
+
+def agregar_por_zoom(od, zoom, max_arcos=MAX_ARCOS):
+    """
+    Reduce la matriz al nivel de detalle visible en `zoom`.
+
+    Devuelve (ids, src, dst, volumen, color): si hay más de `max_arcos` arcos se
+    agrupan origen y destino en celdas de `tamano_celda(zoom)` grados (posición
+    ponderada por volumen) y se conservan los `max_arcos` de mayor volumen. El id
+    de cada arco agregado es el del arco original de mayor volumen del grupo.
+    """
+    n = len(od.origen)
+    volumen = np.nan_to_num(od.volumen, nan=1.0)
+    if n <= max_arcos:
+        return np.arange(n), od.src, od.dst, od.volumen, od.color
+
+    celda = tamano_celda(zoom)
+    llaves = np.floor(np.hstack([od.src, od.dst]) / celda).astype(np.int64)
+    _, grupo = np.unique(llaves, axis=0, return_inverse=True)
+    grupo = grupo.ravel()
+    n_grupos = grupo.max() + 1
+
+    vol_grupo = np.bincount(grupo, weights=volumen, minlength=n_grupos)
+    # Un grupo con volumen total 0 se posiciona con el promedio simple
+    peso = np.maximum(volumen, 1e-9)
+    peso_grupo = np.bincount(grupo, weights=peso, minlength=n_grupos)
+
+    def ponderado(col):
+        return np.bincount(grupo, weights=col * peso, minlength=n_grupos) / peso_grupo
+
+    src = np.column_stack([ponderado(od.src[:, 0]), ponderado(od.src[:, 1])])
+    dst = np.column_stack([ponderado(od.dst[:, 0]), ponderado(od.dst[:, 1])])
+
+    # Representante: arco de mayor volumen en cada grupo
+    orden = np.lexsort((-volumen, grupo))
+    primero = np.ones(n, dtype=bool)
+    primero[1:] = grupo[orden][1:] != grupo[orden][:-1]
+    ids = np.empty(n_grupos, dtype=np.int64)
+    ids[grupo[orden][primero]] = orden[primero]
+
+    top = np.argsort(-vol_grupo, kind="stable")[:max_arcos]
+    return ids[top], src[top], dst[top], vol_grupo[top], od.color[ids[top]]
+
+
+def anchos(volumen, minimo=2.0, maximo=25.0, fijo=15.0):
+    if np.all(np.isnan(volumen)):
+        return np.full(volumen.shape, fijo)
+    v = np.sqrt(np.nan_to_num(volumen, nan=0.0))
+    rango = v.max() - v.min()
+    if rango == 0:
+        return np.full(volumen.shape, fijo)
+    return minimo + (maximo - minimo) * (v - v.min()) / rango
+
+
+def registros_arcos(od, zoom, max_arcos=MAX_ARCOS):
+    """Registros planos y compactos para el ArcLayer (claves de 1-2 letras)."""
+    ids, src, dst, volumen, color = agregar_por_zoom(od, zoom, max_arcos)
+    tabla = {
+        "i": ids,
+        "sx": np.round(src[:, 0], DECIMALES), "sy": np.round(src[:, 1], DECIMALES),
+        "tx": np.round(dst[:, 0], DECIMALES), "ty": np.round(dst[:, 1], DECIMALES),
+        "c": color.tolist(),
+        "w": np.round(anchos(volumen), 1),
+    }
+    if not np.all(np.isnan(volumen)):
+        tabla["v"] = np.rint(np.nan_to_num(volumen)).astype(np.int64)
+    if len(od.origen) <= UMBRAL_TOOLTIP_EN_LINEA:
+        tabla["origen"] = od.origen[ids]
+        tabla["destino"] = od.destino[ids]
+        for columna in COLUMNAS_DETALLE:
+            tabla[columna] = od.detalle[columna].to_numpy()[ids]
+    return pd.DataFrame(tabla).to_dict(orient="records")
+
+
+def registros_etiquetas(od, max_etiquetas=MAX_ETIQUETAS):
+    # Una etiqueta por origen (no por arco), los de mayor volumen primero
+    df = pd.DataFrame({
+        "t": od.origen, "x": od.src[:, 0], "y": od.src[:, 1], "v": np.nan_to_num(od.volumen, nan=1.0)
+    })
+    df = df.groupby("t", sort=False).agg(x=("x", "first"), y=("y", "first"), v=("v", "sum")).reset_index()
+    df = df.nlargest(max_etiquetas, "v", keep="first")
+    df[["x", "y"]] = df[["x", "y"]].round(DECIMALES)
+    return df[["t", "x", "y"]].to_dict(orient="records")
+
+
+def detalle_arco(od, arco_id):
+    """Textos de tooltip de un solo arco (consulta del lado servidor al seleccionarlo)."""
+    arco_id = int(arco_id)
+    detalle = {"origen": od.origen[arco_id], "destino": od.destino[arco_id]}
+    detalle.update(od.detalle.iloc[arco_id].to_dict())
+    if not np.isnan(od.volumen[arco_id]):
+        detalle["volumen"] = int(od.volumen[arco_id])
+    return detalle
+
+
+_lock_deck = threading.Lock()
+
+
+def _clase_deck_compacto():
+    import pydeck as pdk
+    from pydeck.bindings.json_tools import default_serialize
+
+    class DeckCompacto(pdk.Deck):
+        # pydeck serializa con indent=2; sin espacios el payload del mapa baja ~40%
+        def to_json(self):
+            return json.dumps(self, sort_keys=True, default=default_serialize, separators=(",", ":"))
+
+    DeckCompacto.__qualname__ = "DeckCompacto"  # pickle la encuentra como kuali.rutas.DeckCompacto
+    return DeckCompacto
+
+
+def __getattr__(nombre):
+    # pydeck (~75 ms de importación) se carga con el primer mapa, no con el módulo
+    if nombre != "DeckCompacto":
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    with _lock_deck:
+        if nombre not in globals():
+            globals()[nombre] = _clase_deck_compacto()
+    return globals()[nombre]
\ No newline at end of file
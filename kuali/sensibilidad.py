@@ -0,0 +1,93 @@
+import functools
+from typing import NamedTuple
+
+import numpy as np
+
+from kuali import datos, escenarios, finanzas
+from kuali.escenarios import Entrada
+
+# ==============================================================================
+# SENSIBILIDAD DEL VPN: MAPA DE CALOR Y TORNADO
+# ==============================================================================
+# Ambas vistas son UNA evaluación de finanzas.vpn sobre un lote de parámetros
+# armado con broadcasting (la rejilla 200 x 200 son 40,000 juegos en una sola
+# llamada). Los resultados se cachean por la definición de la rejilla y el
+# escenario what-if, así que volver a unos límites ya vistos es inmediato.
+
+# Además de las cuatro entradas what-if, los supuestos fijos del modelo
+VARIABLES = {
+    **escenarios.ENTRADAS,
+    "deuda_pct": Entrada("Proporción de deuda", 0.0, 0.6, None, 0.05, "%.2f"),
+    "tasa_deuda": Entrada("Tasa de la deuda (anual)", 0.05, 0.30, finanzas.TASA_DEUDA, 0.01, "%.2f"),
+    "crecimiento": Entrada("Crecimiento después del año 3", -0.10, 0.20, finanzas.CRECIMIENTO, 0.01, "%.2f"),
+    "tasa_descuento": Entrada("Tasa de descuento", 0.05, 0.30, 0.12, 0.01, "%.2f"),
+}
+
+
+class Rejilla(NamedTuple):
+    x: str
+    x_min: float
+    x_max: float
+    y: str
+    y_min: float
+    y_max: float
+    n: int = 200
+    meses: int = 60
+
+
+class MapaCalor(NamedTuple):
+    xs: np.ndarray
+    ys: np.ndarray
+    vpn: np.ndarray     # (n_y, n_x) MXN
+
+
+class Barra(NamedTuple):
+    variable: str
+    bajo: float         # VPN con la variable en su mínimo
+    alto: float         # VPN con la variable en su máximo
+
+
+def rejilla_completa(x="ticket", y="paquetes", meses=60):
+    """Rejilla sobre el rango completo de las dos variables (la vista inicial del dashboard)."""
+    vx, vy = VARIABLES[x], VARIABLES[y]
+    return Rejilla(x, vx.minimo, vx.maximo, y, vy.minimo, vy.maximo, meses=meses)
+
+
+def _base(escenario):
+    return (escenario or escenarios.Escenario())._asdict()
+
+
+@functools.lru_cache(maxsize=32)
+def mapa_calor(rejilla, escenario=None):
+    """VPN sobre la rejilla x * y; el resto de los parámetros viene del escenario."""
+    if rejilla.x == rejilla.y:
+        raise ValueError(f"La rejilla necesita dos variables distintas (recibido: {rejilla.x})")
+    xs = np.linspace(rejilla.x_min, rejilla.x_max, rejilla.n)
+    ys = np.linspace(rejilla.y_min, rejilla.y_max, rejilla.n)
+    valores = _base(escenario)
+    valores[rejilla.x] = xs[None, :]
+    valores[rejilla.y] = ys[:, None]
+    p = finanzas.parametros(**valores)
+    return MapaCalor(xs, ys, finanzas.vpn(p, rejilla.meses).reshape(rejilla.n, rejilla.n))
+
+
+@functools.lru_cache(maxsize=32)
+def tornado(escenario=None, meses=60):
+    """
+    Cada variable en su mínimo y en su máximo con las demás en el escenario
+    (2 filas por variable, una sola evaluación). Ordenado de mayor a menor rango.
+    """
+    nombres = list(VARIABLES)
+    base = finanzas.parametros(**_base(escenario))
+    lote = {campo: np.repeat(valor, 2 * len(nombres) + 1) for campo, valor in base._asdict().items()}
+    for j, nombre in enumerate(nombres):
+        lote[nombre][2 * j] = VARIABLES[nombre].minimo
+        lote[nombre][2 * j + 1] = VARIABLES[nombre].maximo
+    vpn = finanzas.vpn(finanzas.parametros(**lote), meses)
+    barras = [Barra(nombre, float(vpn[2 * j]), float(vpn[2 * j + 1])) for j, nombre in enumerate(nombres)]
+    # La última fila es el escenario sin mover nada
+    return float(vpn[-1]), sorted(barras, key=lambda b: abs(b.alto - b.bajo), reverse=True)
+
+
+datos.al_cambiar(mapa_calor.cache_clear)
+datos.al_cambiar(tornado.cache_clear)
@@ -0,0 +1,103 @@
+import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+# ==============================================================================
+# MOTOR VECTORIZADO DE SERIES DE PRECIO (N PLATAFORMAS x T INSTANTES)
+# ==============================================================================
+
+# Temporada de referencia del pitch (Día de Muertos)
+INICIO_TEMPORADA = datetime.date(2025, 10, 10)
+FIN_TEMPORADA = datetime.date(2025, 11, 5)
+
+# 1970-01-01 fue jueves (weekday() == 3)
+_DIA_SEMANA_EPOCH = 3
+
+
+class Bandas(NamedTuple):
+    fechas: np.ndarray        # (T,) datetime64
+    precio_bajo: np.ndarray   # (N, T) int64
+    precio_prom: np.ndarray   # (N, T) int64
+    precio_alto: np.ndarray   # (N, T) int64
+
+
+def rango_fechas(inicio=INICIO_TEMPORADA, fin=FIN_TEMPORADA, freq="D"):
+    """Eje temporal inclusivo [inicio, fin] con paso diario ('D') u horario ('h')."""
+    inicio = np.datetime64(inicio, "D")
+    fin = np.datetime64(fin, "D")
+    if freq == "D":
+        return np.arange(inicio, fin + 1, dtype="datetime64[D]")
+    return np.arange(inicio, fin + 1, np.timedelta64(1, freq), dtype=f"datetime64[{freq}]")
+
+
+def calendario(fechas):
+    """Día de la semana, mes y día del mes para un arreglo datetime64."""
+    dias = fechas.astype("datetime64[D]")
+    dia_semana = (dias.astype(np.int64) + _DIA_SEMANA_EPOCH) % 7
+    meses = dias.astype("datetime64[M]")
+    mes = meses.astype(np.int64) % 12 + 1
+    dia = (dias - meses).astype(np.int64) + 1
+    return dia_semana, mes, dia
+
+
+def es_dia_muertos(mes, dia):
+    return (mes == 11) & (dia <= 2)
+
+
+def generar_bandas(
+    volatilidad,
+    nivel_precio,
+    fechas=None,
+    base=22000,
+    factor_fin_semana=1.15,
+    factor_festivo=1.85,
+    ruido=0.05,
+    gap_fijo=None,
+    ruido_en_promedio=True,
+    rng=None,
+):
+    """
+    Bandas bajo/promedio/alto para N plataformas en una sola llamada.
+
+    `volatilidad`, `nivel_precio`, `factor_fin_semana` y `factor_festivo` aceptan
+    escalares o arreglos de longitud N. Reproduce la lógica día a día original:
+    viernes a domingo aplica el factor de fin de semana, y el festivo lo reemplaza.
+    """
+    if fechas is None:
+        fechas = rango_fechas()
+    if rng is None:
+        rng = np.random.default_rng()
+
+    volatilidad = np.atleast_1d(np.asarray(volatilidad, dtype=np.float64))
+    nivel_precio = np.atleast_1d(np.asarray(nivel_precio, dtype=np.float64))
+    n = max(volatilidad.size, nivel_precio.size)
+
+    def columna(v):
+        return np.broadcast_to(np.asarray(v, dtype=np.float64), (n,))[:, None]
+
+    dia_semana, mes, dia = calendario(fechas)
+    fin_semana = (dia_semana >= 4)[None, :]
+    festivo = es_dia_muertos(mes, dia)[None, :]
+
+    factor = np.where(festivo, columna(factor_festivo), np.where(fin_semana, columna(factor_fin_semana), 1.0))
+    p_prom = (columna(base) * columna(nivel_precio) * factor).astype(np.int64)
+    if gap_fijo is None:
+        gap = (p_prom * columna(volatilidad)).astype(np.int64)
+    else:
+        gap = np.int64(gap_fijo)
+
+    noise = rng.uniform(1.0 - ruido, 1.0 + ruido, size=p_prom.shape)
+    precio_bajo = ((p_prom - gap) * noise).astype(np.int64)
+    precio_alto = ((p_prom + gap) * noise).astype(np.int64)
+    precio_prom = (p_prom * noise).astype(np.int64) if ruido_en_promedio else p_prom
+    return Bandas(fechas, precio_bajo, precio_prom, precio_alto)
+
+
+def bandas_kuali(fechas=None, rng=None):
+    # KUALI: precio protegido, gap fijo y ruido mínimo
+    return generar_bandas(
+        volatilidad=0.0, nivel_precio=1.0, fechas=fechas, base=21500,
+        factor_fin_semana=1.05, factor_festivo=1.10, ruido=0.01,
+        gap_fijo=1500, ruido_en_promedio=False, rng=rng,
+    )
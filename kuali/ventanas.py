@@ -0,0 +1,88 @@
+from collections import deque
+
+# ==============================================================================
+# VENTANA MÓVIL INCREMENTAL (MÍNIMO, MÁXIMO, MEDIA, VARIANZA)
+# ==============================================================================
+# Cada observación entra una vez y sale una vez: O(1) amortizado por
+# observación, sin volver a recorrer la historia. Mínimo y máximo con colas
+# monótonas; media y varianza con Welford (que también admite retirar valores).
+
+
+class VentanaMovil:
+    """Estadísticas de las observaciones con instante en (t_ultimo - duracion, t_ultimo]."""
+
+    __slots__ = ("duracion", "n", "media", "_m2", "_obs", "_minimos", "_maximos", "ultimo", "tardias")
+
+    def __init__(self, duracion):
+        self.duracion = duracion
+        self.n = 0
+        self.media = 0.0
+        self._m2 = 0.0
+        self._obs = deque()       # (t, x) en orden de llegada
+        self._minimos = deque()   # (t, x) con x creciente
+        self._maximos = deque()   # (t, x) con x decreciente
+        self.ultimo = None
+        self.tardias = 0
+
+    def agregar(self, t, x):
+        # Los instantes deben llegar en orden; una observación atrasada no entra
+        if self.ultimo is not None and t < self.ultimo:
+            self.tardias += 1
+            return
+        self.ultimo = t
+        self._obs.append((t, x))
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self._m2 += delta * (x - self.media)
+
+        while self._minimos and self._minimos[-1][1] >= x:
+            self._minimos.pop()
+        self._minimos.append((t, x))
+        while self._maximos and self._maximos[-1][1] <= x:
+            self._maximos.pop()
+        self._maximos.append((t, x))
+
+        limite = t - self.duracion
+        while self._obs[0][0] <= limite:
+            self._retirar()
+
+    def _retirar(self):
+        t, x = self._obs.popleft()
+        self.n -= 1
+        if self.n == 0:
+            self.media, self._m2 = 0.0, 0.0
+        else:
+            delta = x - self.media
+            self.media -= delta / self.n
+            self._m2 -= delta * (x - self.media)
+        if self._minimos[0][0] <= t:
+            self._minimos.popleft()
+        if self._maximos[0][0] <= t:
+            self._maximos.popleft()
+
+    @property
+    def minimo(self):
+        return self._minimos[0][1] if self._minimos else None
+
+    @property
+    def maximo(self):
+        return self._maximos[0][1] if self._maximos else None
+
+    @property
+    def varianza(self):
+        # Varianza muestral; el max() absorbe residuos negativos de redondeo
+        return max(self._m2, 0.0) / (self.n - 1) if self.n > 1 else 0.0
+
+    def resumen(self):
+        return {
+            "n": self.n, "minimo": self.minimo, "maximo": self.maximo,
+            "media": self.media, "desviacion": self.varianza ** 0.5, "tardias": self.tardias,
+        }
+
+    def __getstate__(self):
+        return {s: getattr(self, s) for s in self.__slots__}
+
+    def __setstate__(self, estado):
+        for s, valor in estado.items():
+            setattr(self, s, valor)
@@ -0,0 +1,89 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from kuali.series import calendario, es_dia_muertos
+
+# ==============================================================================
+# ANALÍTICA DE VOLATILIDAD (N PLATAFORMAS x T INSTANTES EN UNA PASADA)
+# ==============================================================================
+# Todas las métricas se calculan sobre la matriz completa de precios promedio
+# con operaciones por eje (sumas acumuladas, máscaras de calendario, productos
+# matriz-vector): el costo es O(N x T) sin ciclos por plataforma. Los huecos
+# (instantes sin cotización) van como NaN y no cuentan en ninguna métrica.
+
+VENTANA_DIAS = 7
+# Un alza mayor a esto entre dos instantes consecutivos cuenta como salto
+UMBRAL_SALTO = 0.10
+
+
+class Indicadores(NamedTuple):
+    desviacion_movil: np.ndarray  # (N,) mediana de σ móvil / media móvil
+    pico_valle: np.ndarray        # (N,) (máximo - mínimo) / mediana
+    alza_festiva: np.ndarray      # (N,) precio medio en Día de Muertos / días normales
+    saltos: np.ndarray            # (N,) alzas > UMBRAL_SALTO entre instantes consecutivos
+
+
+def _acumulada(x):
+    # Suma acumulada con un cero al inicio: suma de [i, j) = c[j] - c[i]
+    c = np.zeros((x.shape[0], x.shape[1] + 1))
+    np.cumsum(x, axis=1, out=c[:, 1:])
+    return c
+
+
+def desviacion_movil(precios, ventana):
+    """(N, T - ventana + 1) coeficiente de variación en cada ventana móvil."""
+    validos = ~np.isnan(precios)
+    # Se centra por fila: las sumas de cuadrados no pierden precisión
+    centro = np.nanmean(precios, axis=1, keepdims=True)
+    x = np.where(validos, precios - centro, 0.0)
+    n = _acumulada(validos.astype(np.float64))
+    s1, s2 = _acumulada(x), _acumulada(x * x)
+    n = n[:, ventana:] - n[:, :-ventana]
+    s1 = s1[:, ventana:] - s1[:, :-ventana]
+    s2 = s2[:, ventana:] - s2[:, :-ventana]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media = s1 / n
+        varianza = np.maximum(s2 - s1 * media, 0.0) / (n - 1)
+        return np.where(n > 1, np.sqrt(varianza) / (media + centro), np.nan)
+
+
+def analizar(fechas, precios, ventana_dias=VENTANA_DIAS):
+    """Indicadores de cada fila de `precios` (N, T) sobre el eje `fechas`."""
+    precios = np.asarray(precios, dtype=np.float64)
+    validos = ~np.isnan(precios)
+    por_dia = np.timedelta64(1, "D") // (fechas[1] - fechas[0]) if len(fechas) > 1 else 1
+    ventana = int(min(max(ventana_dias * por_dia, 2), precios.shape[1]))
+
+    with np.errstate(all="ignore"):
+        desviacion = np.nanmedian(desviacion_movil(precios, ventana), axis=1)
+        pico_valle = (np.nanmax(precios, axis=1) - np.nanmin(precios, axis=1)) / np.nanmedian(precios, axis=1)
+
+        # Festivo vs días normales (ni festivo ni viernes a domingo, como en series.generar_bandas)
+        dia_semana, mes, dia = calendario(fechas)
+        festivo = es_dia_muertos(mes, dia)
+        mascaras = np.stack([festivo, ~festivo & (dia_semana < 4)], axis=1).astype(np.float64)
+        # (N, 2) sumas y conteos de cada grupo en dos productos matriz-matriz
+        sumas = np.where(validos, precios, 0.0) @ mascaras
+        conteos = validos.astype(np.float64) @ mascaras
+        medio = sumas / conteos
+        alza = medio[:, 0] / medio[:, 1]
+
+        saltos = (precios[:, 1:] > precios[:, :-1] * (1.0 + UMBRAL_SALTO)).sum(axis=1)
+
+    return Indicadores(desviacion, pico_valle, alza, saltos)
+
+
+def tabla(nombres, indicadores):
+    """Ranking de mayor a menor volatilidad (σ móvil), listo para st.dataframe."""
+    df = pd.DataFrame({
+        "Plataforma": list(nombres),
+        "σ móvil (%)": 100.0 * indicadores.desviacion_movil,
+        "Pico-valle (%)": 100.0 * indicadores.pico_valle,
+        "Alza festiva (x)": indicadores.alza_festiva,
+        f"Saltos > {UMBRAL_SALTO:.0%}": indicadores.saltos,
+    })
+    df = df.sort_values("σ móvil (%)", ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+    df.insert(0, "#", np.arange(1, len(df) + 1))
+    return df
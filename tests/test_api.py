@@ -0,0 +1,149 @@
+import asyncio
+import gzip
+import threading
+import time
+
+import pytest
+
+from kuali import api
+
+
+async def pedir(lector, escritor, ruta, metodo="GET", cabeceras=None):
+    extra = "".join(f"{n}: {v}\r\n" for n, v in (cabeceras or {}).items())
+    escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: prueba\r\n{extra}\r\n".encode("latin-1"))
+    await escritor.drain()
+    return await leer(lector, metodo == "HEAD")
+
+
+async def leer(lector, sin_cuerpo=False):
+    bloque = await lector.readuntil(b"\r\n\r\n")
+    linea, *resto = bloque.decode("latin-1").split("\r\n")
+    cabeceras = {n.strip().lower(): v.strip() for n, _, v in (c.partition(":") for c in resto) if n}
+    largo = int(cabeceras.get("content-length", 0))
+    cuerpo = b"" if sin_cuerpo else await lector.readexactly(largo)
+    return int(linea.split(" ")[1]), cabeceras, cuerpo
+
+
+def con_servidor(prueba):
+    async def correr():
+        servidor = await api.iniciar(puerto=0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        try:
+            return await prueba(lambda: asyncio.open_connection("127.0.0.1", puerto))
+        finally:
+            servidor.close()
+            await servidor.wait_closed()
+    return asyncio.run(correr())
+
+
+@pytest.fixture(autouse=True)
+def respuestas_vacias():
+    api.respuestas.limpiar()
+    yield
+    api.respuestas.limpiar()
+
+
+def test_keep_alive_atiende_varias_consultas_en_una_conexion():
+    async def prueba(conectar):
+        lector, escritor = await conectar()
+        primera = await pedir(lector, escritor, "/api/inversion")
+        segunda = await pedir(lector, escritor, "/api/kpis?paquetes=30")
+        escritor.close()
+        return primera, segunda
+
+    (e1, c1, _), (e2, c2, cuerpo) = con_servidor(prueba)
+    assert (e1, e2) == (200, 200)
+    assert c1["connection"] == c2["connection"] == "keep-alive"
+    assert b"vpn" in cuerpo
+
+
+def test_head_no_manda_cuerpo_y_la_conexion_sigue_alineada():
+    async def prueba(conectar):
+        lector, escritor = await conectar()
+        cabeza = await pedir(lector, escritor, "/api/inversion", metodo="HEAD")
+        completa = await pedir(lector, escritor, "/api/inversion")
+        escritor.close()
+        return cabeza, completa
+
+    (e1, c1, cuerpo1), (e2, c2, cuerpo2) = con_servidor(prueba)
+    assert (e1, e2) == (200, 200)
+    assert cuerpo1 == b""
+    assert int(c1["content-length"]) == len(cuerpo2) > 0
+    assert c1["etag"] == c2["etag"]
+
+
+def test_if_none_match_responde_304_sin_cuerpo():
+    async def prueba(conectar):
+        lector, escritor = await conectar()
+        _, cabeceras, _ = await pedir(lector, escritor, "/api/proyeccion")
+        repetida = await pedir(lector, escritor, "/api/proyeccion", cabeceras={"If-None-Match": cabeceras["etag"]})
+        escritor.close()
+        return cabeceras["etag"], repetida
+
+    etag, (estado, cabeceras, cuerpo) = con_servidor(prueba)
+    assert estado == 304
+    assert cuerpo == b"" and "content-length" not in cabeceras
+    assert cabeceras["etag"] == etag
+
+
+def test_gzip_solo_si_el_cliente_lo_acepta():
+    ruta = "/api/bandas?plataforma=BOOKING&inicio=2025-01-01&fin=2025-03-31"
+
+    async def prueba(conectar):
+        lector, escritor = await conectar()
+        comprimida = await pedir(lector, escritor, ruta, cabeceras={"Accept-Encoding": "br, gzip"})
+        rechazada = await pedir(lector, escritor, ruta, cabeceras={"Accept-Encoding": "gzip;q=0"})
+        plana = await pedir(lector, escritor, ruta)
+        escritor.close()
+        return comprimida, rechazada, plana
+
+    (e1, c1, gz), (e2, c2, sin_gzip), (e3, c3, plano) = con_servidor(prueba)
+    assert (e1, e2, e3) == (200, 200, 200)
+    assert c1["content-encoding"] == "gzip" and c1["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in c2 and "content-encoding" not in c3
+    assert gzip.decompress(gz) == sin_gzip == plano
+    assert len(gz) < len(plano)
+
+
+def test_consultas_iguales_simultaneas_esperan_un_solo_calculo(monkeypatch):
+    llamadas = []
+    lock = threading.Lock()
+
+    def construir(valor):
+        with lock:
+            llamadas.append(valor)
+        time.sleep(0.2)
+        return {"valor": valor}
+
+    monkeypatch.setitem(api.ENDPOINTS, "/api/prueba", api.Endpoint(
+        "Prueba", {}, lambda consulta: {"valor": int(consulta.get("valor", 0))}, construir,
+    ))
+
+    async def prueba(conectar):
+        async def una():
+            lector, escritor = await conectar()
+            resultado = await pedir(lector, escritor, "/api/prueba?valor=7")
+            escritor.close()
+            return resultado
+        resultados = await asyncio.gather(*(una() for _ in range(8)))
+        return resultados, dict(api._en_curso)
+
+    resultados, en_curso = con_servidor(prueba)
+    assert all(estado == 200 and cuerpo == b'{"valor":7}' for estado, _, cuerpo in resultados)
+    assert llamadas == [7]
+    assert en_curso == {}
+
+
+def test_content_length_negativo_responde_400_y_cierra():
+    async def prueba(conectar):
+        lector, escritor = await conectar()
+        respuesta = await pedir(lector, escritor, "/api/inversion", cabeceras={"Content-Length": "-5"})
+        cerrada = await lector.read() == b""
+        escritor.close()
+        return respuesta, cerrada
+
+    (estado, cabeceras, cuerpo), cerrada = con_servidor(prueba)
+    assert estado == 400
+    assert cabeceras["connection"] == "close"
+    assert b"mal formada" in cuerpo
+    assert cerrada
@@ -0,0 +1,231 @@
+import gzip
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kuali import cotizaciones
+from kuali.cotizaciones import AlmacenCotizaciones
+from kuali.ventanas import VentanaMovil
+
+VENTANA_S = 6 * 3600
+
+
+def filas(n, semilla=0, desde="2025-10-01T00:00:00"):
+    rng = np.random.default_rng(semilla)
+    instantes = np.datetime64(desde, "s") + np.cumsum(rng.integers(60, 1800, n))
+    plataformas = rng.choice(["booking", "DESPEGAR", " Expedia "], n)
+    precios = np.round(rng.normal(3000, 400, n), 2)
+    return [(p, f"{t}Z", f"{x:.2f}") for p, t, x in zip(plataformas, instantes, precios)]
+
+
+def escribir(ruta, lineas, modo="w"):
+    abrir = gzip.open if ruta.endswith(".gz") else open
+    with abrir(ruta, modo + "t", encoding="utf-8", newline="") as f:
+        if modo == "w" and ".csv" in ruta:
+            f.write("plataforma,ruta,timestamp,precio\n")
+        for p, t, x in lineas:
+            if ".csv" in ruta:
+                f.write(f"{p},CDMX-OAX,{t},{x}\n")
+            else:
+                f.write(f'{{"plataforma": "{p}", "ruta": "CDMX-OAX", "timestamp": "{t}", "precio": {x}}}\n')
+
+
+def leido_completo(rutas, tamano_trozo=1000):
+    almacen = AlmacenCotizaciones(ventana_s=VENTANA_S, tamano_trozo=tamano_trozo)
+    almacen.actualizar(rutas)
+    return almacen
+
+
+def assert_igual(incremental, completo):
+    pd.testing.assert_frame_equal(incremental.horario, completo.horario)
+    pd.testing.assert_frame_equal(incremental.diario, completo.diario)
+    assert incremental.observaciones == completo.observaciones
+    for plataforma in completo.ventanas:
+        assert incremental.estadisticas_moviles(plataforma) == pytest.approx(completo.estadisticas_moviles(plataforma))
+
+
+def forzar_mtime(ruta):
+    # Sistemas de archivos con mtime grueso: una reescritura inmediata debe notarse
+    estado = os.stat(ruta)
+    os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+
+
+def test_ventana_movil_coincide_con_recalcular_la_ventana():
+    rng = np.random.default_rng(1)
+    instantes = np.cumsum(rng.integers(1, 50, 2000))
+    valores = rng.normal(100, 15, 2000)
+    ventana = VentanaMovil(300)
+    for i, (t, x) in enumerate(zip(instantes, valores)):
+        ventana.agregar(int(t), float(x))
+        dentro = valores[: i + 1][instantes[: i + 1] > t - 300]
+        assert ventana.n == len(dentro)
+        assert ventana.minimo == dentro.min() and ventana.maximo == dentro.max()
+        assert ventana.media == pytest.approx(dentro.mean())
+        assert ventana.varianza == pytest.approx(dentro.var(ddof=1) if len(dentro) > 1 else 0.0, abs=1e-6)
+    ventana.agregar(int(instantes[-1]) - 10, 0.0)
+    assert ventana.tardias == 1 and ventana.minimo > 0
+
+
+@pytest.mark.parametrize("nombre", ["volcado.csv", "volcado.jsonl", "volcado.csv.gz", "volcado.jsonl.gz"])
+def test_ingesta_por_trozos_no_depende_del_tamano_del_trozo(tmp_path, nombre):
+    ruta = str(tmp_path / nombre)
+    escribir(ruta, filas(3000))
+    pd.testing.assert_frame_equal(cotizaciones.ingerir([ruta], tamano_trozo=37), cotizaciones.ingerir([ruta]))
+    horario = cotizaciones.ingerir([ruta])
+    assert horario["conteo"].sum() == 3000
+    assert set(horario["plataforma"]) == {"BOOKING", "DESPEGAR", "EXPEDIA"}
+
+
+@pytest.mark.parametrize("nombre", ["volcado.csv", "volcado.jsonl"])
+def test_timestamp_invalido_se_descarta(tmp_path, nombre):
+    ruta = str(tmp_path / nombre)
+    lineas = filas(50, semilla=10)
+    lineas[20] = (lineas[20][0], "not-a-date", lineas[20][2])
+    escribir(ruta, lineas)
+    assert cotizaciones.ingerir([ruta])["conteo"].sum() == 49
+    almacen = AlmacenCotizaciones(ventana_s=VENTANA_S)
+    assert almacen.actualizar([ruta]) == 49
+
+
+@pytest.mark.parametrize("nombre", ["volcado.csv", "volcado.jsonl"])
+def test_agregar_al_volcado_equivale_a_releerlo_completo(tmp_path, nombre):
+    ruta = str(tmp_path / nombre)
+    todas = filas(4000, semilla=2)
+    escribir(ruta, todas[:2500])
+    almacen = AlmacenCotizaciones(ventana_s=VENTANA_S, tamano_trozo=1000)
+    assert almacen.actualizar([ruta]) == 2500
+
+    escribir(ruta, todas[2500:], modo="a")
+    assert almacen.actualizar([ruta]) == 1500
+    assert almacen.lecturas[ruta].desplazamiento == os.path.getsize(ruta)
+    assert_igual(almacen, leido_completo([ruta]))
+    # Sin cambios no se lee nada
+    assert almacen.actualizar([ruta]) == 0
+
+
+def test_linea_a_medio_escribir_se_lee_cuando_se_completa(tmp_path):
+    ruta = str(tmp_path / "volcado.csv")
+    todas = filas(100, semilla=3)
+    escribir(ruta, todas[:99])
+    p, t, x = todas[99]
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(f"{p},CDMX-OAX,{t},")
+    almacen = AlmacenCotizaciones(ventana_s=VENTANA_S)
+    assert almacen.actualizar([ruta]) == 99
+
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(f"{x}\n")
+    assert almacen.actualizar([ruta]) == 1
+    assert_igual(almacen, leido_completo([ruta]))
+
+
+def test_estado_persistido_continua_donde_se_quedo(tmp_path):
+    ruta, estado = str(tmp_path / "volcado.jsonl"), str(tmp_path / "estado.pkl")
+    todas = filas(3000, semilla=4)
+    escribir(ruta, todas[:1000])
+    AlmacenCotizaciones(ventana_s=VENTANA_S).actualizar([ruta])
+    primero = AlmacenCotizaciones(ventana_s=VENTANA_S)
+    primero.actualizar([ruta])
+    primero.guardar(estado)
+
+    escribir(ruta, todas[1000:], modo="a")
+    segundo = AlmacenCotizaciones.cargar(estado, ventana_s=VENTANA_S)
+    assert segundo.actualizar([ruta]) == 2000
+    assert_igual(segundo, leido_completo([ruta]))
+
+
+def test_volcado_truncado_se_relee_completo(tmp_path):
+    ruta = str(tmp_path / "volcado.csv")
+    escribir(ruta, filas(2000, semilla=5))
+    almacen = leido_completo([ruta])
+
+    escribir(ruta, filas(500, semilla=5))
+    assert almacen.actualizar([ruta]) == 500
+    assert_igual(almacen, leido_completo([ruta]))
+
+
+def test_volcado_rotado_se_relee_completo(tmp_path):
+    # Otro archivo con el mismo nombre y al menos el mismo tamaño: lo detecta la huella del inicio
+    ruta = str(tmp_path / "volcado.csv")
+    escribir(ruta, filas(2000, semilla=6))
+    almacen = leido_completo([ruta])
+
+    escribir(ruta, filas(2500, semilla=7, desde="2025-11-01T00:00:00"))
+    forzar_mtime(ruta)
+    assert almacen.actualizar([ruta]) == 2500
+    assert_igual(almacen, leido_completo([ruta]))
+    # Nada del volcado anterior (octubre) sobrevive a la rotación
+    assert not len(almacen.bandas("BOOKING", pd.Timestamp("2025-10-01").date(), pd.Timestamp("2025-10-31").date()).fechas)
+
+
+def test_volcado_gz_modificado_o_eliminado_reinicia(tmp_path):
+    gz, csv = str(tmp_path / "a.jsonl.gz"), str(tmp_path / "b.csv")
+    escribir(gz, filas(800, semilla=8))
+    escribir(csv, filas(600, semilla=9))
+    almacen = leido_completo([gz, csv])
+    assert almacen.observaciones == 1400
+
+    # Un .gz no se puede leer desde la mitad: cualquier cambio lo vuelve a leer todo
+    escribir(gz, filas(900, semilla=8))
+    forzar_mtime(gz)
+    assert almacen.actualizar([gz, csv]) == 1500
+    assert_igual(almacen, leido_completo([gz, csv]))
+
+    assert almacen.actualizar([csv]) == 600
+    assert_igual(almacen, leido_completo([csv]))
+
+
+def test_leer_mientras_otra_sesion_ingiere(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "volcado.csv")
+    monkeypatch.setattr(cotizaciones, "RUTA_COTIZACIONES", ruta)
+    monkeypatch.setattr(cotizaciones, "RUTA_ESTADO", str(tmp_path / "estado.pkl"))
+    monkeypatch.setattr(cotizaciones, "_almacen", AlmacenCotizaciones(ventana_s=VENTANA_S, tamano_trozo=200))
+    todas = filas(6000, semilla=11)
+    escribir(ruta, todas[:500])
+    cotizaciones.recargar()
+    inicio, fin = pd.Timestamp("2025-10-01").date(), pd.Timestamp("2026-12-31").date()
+    errores, listo = [], threading.Event()
+
+    def ingerir():
+        try:
+            for i in range(500, len(todas), 250):
+                escribir(ruta, todas[i:i + 250], modo="a")
+                cotizaciones.recargar()
+        except Exception as e:
+            errores.append(e)
+        finally:
+            listo.set()
+
+    def leer():
+        try:
+            while not listo.is_set():
+                b = cotizaciones.bandas("BOOKING", inicio, fin)
+                assert len(b.fechas) == b.precio_prom.shape[1]
+                assert (b.precio_bajo <= b.precio_prom + 1e-9).all() and (b.precio_prom <= b.precio_alto + 1e-9).all()
+                movil = cotizaciones.estadisticas_moviles("BOOKING")
+                assert movil["minimo"] - 1e-9 <= movil["media"] <= movil["maximo"] + 1e-9
+        except Exception as e:
+            errores.append(e)
+
+    # Las lecturas esperan a que termine la actualización en curso (almacen() no toma el lock aquí)
+    with monkeypatch.context() as m:
+        m.setattr(cotizaciones, "almacen", lambda: cotizaciones._almacen)
+        for leer_una in (lambda: cotizaciones.bandas("BOOKING", inicio, fin),
+                         lambda: cotizaciones.estadisticas_moviles("BOOKING")):
+            with cotizaciones._lock:
+                lector = threading.Thread(target=leer_una)
+                lector.start()
+                lector.join(0.2)
+                assert lector.is_alive()
+            lector.join()
+
+    hilos = [threading.Thread(target=ingerir)] + [threading.Thread(target=leer) for _ in range(3)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert not errores
+    assert_igual(cotizaciones.almacen(), leido_completo([ruta]))
@@ -0,0 +1,61 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from kuali import demanda
+
+
+def dias(desde, hasta):
+    return np.arange(np.datetime64(desde, "D"), np.datetime64(hasta, "D") + 1)
+
+
+def test_pascua_de_anios_conocidos():
+    anios = np.array([2000, 2019, 2024, 2025, 2026, 2038])
+    esperadas = np.array(["2000-04-23", "2019-04-21", "2024-03-31", "2025-04-20", "2026-04-05", "2038-04-25"],
+                         dtype="datetime64[D]")
+    np.testing.assert_array_equal(demanda._pascua(anios), esperadas)
+
+
+def test_semana_santa_y_vacaciones_de_2025():
+    fechas = dias("2025-01-01", "2025-12-31")
+    santa = demanda.TEMPORADAS["semana santa"](fechas)
+    # Domingo de Ramos (13 de abril) al domingo siguiente a Pascua (27 de abril)
+    np.testing.assert_array_equal(fechas[santa], dias("2025-04-13", "2025-04-27"))
+
+    vacaciones = demanda.TEMPORADAS["vacaciones"](fechas)
+    assert vacaciones.sum() == 15 + 62 + 17 + 6   # Semana Santa, julio-agosto, 15-31 dic, 1-6 ene
+    assert not vacaciones[fechas == np.datetime64("2025-04-12")].any()
+
+
+def test_puentes_de_2025():
+    fechas = dias("2025-01-01", "2025-12-31")
+    puentes = fechas[demanda.TEMPORADAS["puentes"](fechas)]
+    # Lunes 3 de feb, 17 de mar y 17 de nov con su fin de semana; fechas fijas
+    esperados = np.concatenate([
+        dias("2025-02-01", "2025-02-03"), dias("2025-03-15", "2025-03-17"), dias("2025-05-01", "2025-05-01"),
+        dias("2025-09-16", "2025-09-16"), dias("2025-11-01", "2025-11-02"), dias("2025-11-15", "2025-11-17"),
+    ])
+    np.testing.assert_array_equal(puentes, esperados)
+
+
+def test_parsear_textos_de_la_matriz():
+    perfiles = demanda.parsear(
+        ["+45% (Navidad/Verano)", "+30% (Semana Santa, Puentes)", "Sin temporada", None, "+45% (verano / navidad)"],
+        ["20% Familias Norte (Ticket Alto)", "Familias Tradicionales", "35% Familias Norte (Ticket Alto)", None, ""],
+    )
+    np.testing.assert_allclose(perfiles.incremento, [0.45, 0.30, 0.0, 0.0, 0.45])
+    combinaciones = [perfiles.combinaciones[g] for g in perfiles.grupo]
+    assert combinaciones[0] == combinaciones[4] == ("navidad", "verano")
+    assert combinaciones[1] == ("puentes", "semana santa")
+    np.testing.assert_allclose(perfiles.participacion, [0.20, np.nan, 0.35, np.nan, np.nan])
+    assert perfiles.segmentos[perfiles.segmento[0]] == perfiles.segmentos[perfiles.segmento[2]] == "Familias Norte (Ticket Alto)"
+
+
+def test_totales_sin_cubo_coinciden_con_el_cubo():
+    p = demanda.pronostico(datetime.date(2026, 1, 1), datetime.date(2026, 12, 31))
+    cubo = demanda.cubo(p)
+    np.testing.assert_allclose(demanda.total_por_ruta(p), cubo.sum(axis=(1, 2)))
+    np.testing.assert_allclose(demanda.total_por_dia(p), cubo.sum(axis=(0, 2)))
+    np.testing.assert_allclose(demanda.total_por_segmento(p), cubo.sum(axis=(0, 1)))
+    assert demanda.estacionalidad_mensual(p).mean() == pytest.approx(1.0)
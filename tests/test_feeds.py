@@ -0,0 +1,211 @@
+import asyncio
+import datetime
+import gzip
+import json
+import time
+
+import pytest
+
+from kuali import feeds
+
+INICIO = datetime.date(2025, 10, 10)
+FIN = datetime.date(2025, 10, 12)
+PLATAFORMAS = ("BOOKING", "DESPEGAR", "EXPEDIA", "PRICETRAVEL")
+
+
+def cuerpo_feed(nivel=1000):
+    fechas = ["2025-10-10", "2025-10-11", "2025-10-12"]
+    return json.dumps({
+        "fechas": fechas,
+        "precio_bajo": [nivel - 100] * 3, "precio_prom": [nivel] * 3, "precio_alto": [nivel + 100] * 3,
+    }).encode("utf-8")
+
+
+def respuesta(estado=200, cuerpo=b"", cabeceras=None, chunked=False):
+    cabeceras = dict(cabeceras or {})
+    if chunked:
+        cabeceras["Transfer-Encoding"] = "chunked"
+        mitad = len(cuerpo) // 2
+        cuerpo = b"".join(f"{len(p):x}\r\n".encode() + p + b"\r\n" for p in (cuerpo[:mitad], cuerpo[mitad:]) if p)
+        cuerpo += b"0\r\n\r\n"
+    elif estado != 304:
+        cabeceras["Content-Length"] = str(len(cuerpo))
+    linea = f"HTTP/1.1 {estado} {'OK' if estado == 200 else 'Not Modified'}\r\n"
+    extra = "".join(f"{n}: {v}\r\n" for n, v in cabeceras.items())
+    return (linea + extra + "\r\n").encode("latin-1") + cuerpo
+
+
+class Servidor:
+    """Servidor HTTP de prueba: `responder(ruta, cabeceras)` -> (segundos de espera, bytes, cerrar)."""
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.pedidos = []
+        self.conexiones = 0
+
+    async def atender(self, lector, escritor):
+        self.conexiones += 1
+        try:
+            while True:
+                bloque = await lector.readuntil(b"\r\n\r\n")
+                linea, *resto = bloque.decode("latin-1").split("\r\n")
+                cabeceras = {n.strip().lower(): v.strip() for n, _, v in (c.partition(":") for c in resto) if n}
+                ruta = linea.split(" ")[1]
+                self.pedidos.append((ruta, cabeceras))
+                espera, datos, cerrar = self.responder(ruta, cabeceras)
+                await asyncio.sleep(espera)
+                escritor.write(datos)
+                await escritor.drain()
+                if cerrar:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self):
+        self.servidor = await asyncio.start_server(self.atender, "127.0.0.1", 0)
+        self.puerto = self.servidor.sockets[0].getsockname()[1]
+        return self
+
+
+@pytest.fixture
+def feed(monkeypatch, tmp_path):
+    # Feeds activos contra un servidor local que corre en el bucle de los feeds
+    monkeypatch.setattr(feeds, "RUTA_ESTADO", str(tmp_path / "feeds.pkl"))
+    monkeypatch.setattr(feeds, "TIEMPO_LIMITE_S", 0.5)
+    feeds.olvidar()
+    servidores = []
+
+    def levantar(responder):
+        servidor = feeds._en_bucle(Servidor(responder).iniciar())
+        servidores.append(servidor)
+        monkeypatch.setattr(feeds, "URL_FEEDS", f"http://127.0.0.1:{servidor.puerto}/{{plataforma}}")
+        return servidor
+
+    yield levantar
+    feeds.olvidar()
+
+    async def cerrar():
+        for servidor in servidores:
+            servidor.servidor.close()
+
+    feeds._en_bucle(cerrar())
+
+
+def test_feeds_concurrentes_tardan_lo_del_mas_lento(feed):
+    feed(lambda ruta, _: (0.3, respuesta(cuerpo=cuerpo_feed()), False))
+    inicio = time.perf_counter()
+    resultado = feeds.cargar(PLATAFORMAS, INICIO, FIN)
+    transcurrido = time.perf_counter() - inicio
+    assert all(b is not None and b.precio_prom[0, 0] == 1000 for b in resultado.values())
+    # En serie serían 4 x 0.3 s
+    assert 0.3 <= transcurrido < 0.8
+
+
+def test_tiempo_limite_usa_la_ultima_instantanea(feed):
+    lento = {"activo": False}
+    servidor = feed(lambda ruta, _: (5.0 if lento["activo"] else 0.0, respuesta(cuerpo=cuerpo_feed(1234)), False))
+    assert feeds.bandas("BOOKING", INICIO, FIN).precio_prom[0, 0] == 1234
+
+    # Instantánea vencida y feed que no responde a tiempo
+    clave = ("BOOKING", INICIO, FIN, "D")
+    vieja = feeds._estado()[clave]
+    feeds._estado()[clave] = vieja._replace(obtenida=vieja.obtenida - 2 * feeds.OBSOLETO_S)
+    lento["activo"] = True
+    inicio = time.perf_counter()
+    bandas = feeds.bandas("BOOKING", INICIO, FIN)
+    assert time.perf_counter() - inicio < feeds.TIEMPO_LIMITE_S + 0.5
+    assert bandas.precio_prom[0, 0] == 1234
+    assert feeds.resumen()[0]["error"] == "TimeoutError"
+    assert len(servidor.pedidos) == 2
+
+
+def test_revalidacion_con_etag_responde_304(feed):
+    def responder(ruta, cabeceras):
+        if cabeceras.get("if-none-match") == '"v1"':
+            return 0.0, respuesta(304, cabeceras={"ETag": '"v1"'}), False
+        return 0.0, respuesta(cuerpo=cuerpo_feed(), cabeceras={"ETag": '"v1"'}), False
+
+    servidor = feed(responder)
+    primera = feeds.bandas("EXPEDIA", INICIO, FIN)
+    clave = ("EXPEDIA", INICIO, FIN, "D")
+    vieja = feeds._estado()[clave]
+    feeds._estado()[clave] = vieja._replace(obtenida=vieja.obtenida - 2 * feeds.OBSOLETO_S)
+
+    segunda = feeds.bandas("EXPEDIA", INICIO, FIN)
+    assert servidor.pedidos[-1][1]["if-none-match"] == '"v1"'
+    assert segunda is primera  # 304: la misma instantánea, solo se renueva su edad
+    assert feeds._estado()[clave].obtenida > vieja.obtenida
+
+
+async def _con_servidor(responder, prueba):
+    servidor = await Servidor(responder).iniciar()
+    cliente = feeds.ClienteHTTP()
+    try:
+        return await prueba(cliente, f"http://127.0.0.1:{servidor.puerto}/feed", servidor)
+    finally:
+        cliente.cerrar()
+        servidor.servidor.close()
+
+
+def test_respuesta_chunked_y_gzip():
+    comprimido = gzip.compress(cuerpo_feed())
+
+    async def prueba(cliente, url, _):
+        return await cliente.get(url)
+
+    estado, cabeceras, cuerpo = asyncio.run(_con_servidor(
+        lambda ruta, _: (0.0, respuesta(cuerpo=comprimido, cabeceras={"Content-Encoding": "gzip"}, chunked=True), False),
+        prueba,
+    ))
+    assert estado == 200
+    assert cuerpo == cuerpo_feed()
+
+
+def test_keep_alive_reutiliza_la_conexion_y_el_cupo():
+    async def prueba(cliente, url, servidor):
+        await cliente.get(url)
+        cupo = cliente._cupos[("http", "127.0.0.1", servidor.puerto)]
+        await cliente.get(url)
+        assert cliente._cupos[("http", "127.0.0.1", servidor.puerto)] is cupo
+        return cliente.abiertas, servidor.conexiones
+
+    assert asyncio.run(_con_servidor(lambda ruta, _: (0.0, respuesta(cuerpo=b"{}"), False), prueba)) == (1, 1)
+
+
+def test_conexion_keep_alive_cerrada_por_el_servidor_se_reabre():
+    # El servidor cierra la conexión inactiva sin avisar (sin Connection: close)
+    async def prueba(cliente, url, servidor):
+        assert (await cliente.get(url))[0] == 200
+        await asyncio.sleep(0.05)
+        assert (await cliente.get(url))[0] == 200
+        return cliente.abiertas, len(servidor.pedidos)
+
+    assert asyncio.run(_con_servidor(lambda ruta, _: (0.0, respuesta(cuerpo=b"{}"), True), prueba)) == (2, 2)
+
+
+def test_tiempo_limite_al_conectar_cierra_la_conexion(monkeypatch):
+    cerradas = []
+
+    class Escritor:
+        def close(self):
+            cerradas.append(self)
+
+    async def abrir_lento(host, puerto, ssl=None):
+        # La conexión termina de abrirse aunque el pedido ya se haya cancelado
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            pass
+        return None, Escritor()
+
+    monkeypatch.setattr(asyncio, "open_connection", abrir_lento)
+
+    async def prueba():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(feeds.ClienteHTTP().get("http://127.0.0.1:9/feed"), 0.05)
+        await asyncio.sleep(0)
+
+    asyncio.run(prueba())
+    assert len(cerradas) == 1
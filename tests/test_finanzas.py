@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from kuali import escenarios, finanzas
+
+
+@pytest.mark.parametrize("meses", [36, 60, 120])
+def test_vpn_rapido_coincide_con_indicadores(meses):
+    # Tasas distintas por juego (ruta einsum) y una sola tasa (ruta matriz-vector)
+    for tasa in ([0.08, 0.12, 0.20, 0.12], 0.12):
+        p = finanzas.parametros(
+            inversion=[2.0e6, 3.5e6, 5.0e6, 3.5e6], paquetes=[80, 150, 300, 150], ticket=[9000, 12000, 15000, 12000],
+            costo_pp=[-5, 0, 8, 0], crecimiento=[0.0, 0.05, 0.10, 0.05], tasa_descuento=tasa,
+        )
+        completo = finanzas.indicadores(p, meses, con_tir=False).vpn
+        np.testing.assert_allclose(finanzas.vpn(p, meses), completo, rtol=1e-10, atol=1e-4)
+
+
+def test_vpn_de_la_proyeccion_descontada_a_mano():
+    p = finanzas.desde_escenarios([escenarios.Escenario()])
+    flujos = finanzas.proyectar(p, 60).flujos[0]
+    tasa = (1.12) ** (1.0 / 12.0) - 1.0
+    directo = sum(f / (1.0 + tasa) ** t for t, f in enumerate(flujos))
+    assert finanzas.vpn(p, 60)[0] == pytest.approx(directo, rel=1e-10)
+
+
+def test_tir_anula_el_vpn_mensual():
+    p = finanzas.parametros(paquetes=[150, 300])
+    ind = finanzas.indicadores(p, 60)
+    flujos = finanzas.proyectar(p, 60).flujos
+    for fila, tir in zip(flujos, ind.tir):
+        mensual = (1.0 + tir) ** (1.0 / 12.0) - 1.0
+        assert sum(f / (1.0 + mensual) ** t for t, f in enumerate(fila)) == pytest.approx(0.0, abs=1e-3)
+
+
+def test_horizonte_fuera_de_rango():
+    with pytest.raises(ValueError):
+        finanzas.vpn(finanzas.parametros(), finanzas.MESES_MAX + 1)
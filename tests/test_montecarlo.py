@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from kuali import montecarlo
+
+
+def test_tir_de_flujos_conocidos():
+    flujos = np.array([
+        [-100.0, 110.0, 0.0],          # 10 %
+        [-100.0, 60.0, 60.0],          # raíz de 100(1+r)^2 = 60(1+r) + 60
+        [-100.0, 10.0, 10.0],          # nunca se recupera: TIR negativa
+        [-100.0, -10.0, -10.0],        # el VPN no cambia de signo: NaN
+    ])
+    tir = montecarlo.tir(flujos)
+    assert tir[0] == pytest.approx(0.10)
+    assert tir[1] == pytest.approx((0.6 + np.sqrt(0.36 + 2.4)) / 2.0 - 1.0)
+    assert tir[2] < 0 and montecarlo.vpn(flujos[2:3], tir[2:3])[0] == pytest.approx(0.0, abs=1e-8)
+    assert np.isnan(tir[3])
+
+
+def test_vpn_y_tir_coinciden_con_el_modelo_por_escenario():
+    rng = np.random.default_rng(0)
+    flujos = np.column_stack([-rng.uniform(500, 1000, 50), rng.uniform(50, 400, (50, 6))])
+    tir = montecarlo.tir(flujos)
+    for fila, r in zip(flujos, tir):
+        directo = sum(f / (1.0 + 0.12) ** t for t, f in enumerate(fila))
+        assert montecarlo.vpn(fila[None], np.array([0.12]))[0] == pytest.approx(directo)
+        if np.isfinite(r):
+            assert sum(f / (1.0 + r) ** t for t, f in enumerate(fila)) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_misma_semilla_mismo_resultado_con_cualquier_numero_de_procesos(monkeypatch):
+    monkeypatch.setattr(montecarlo, "UMBRAL_PARALELO", 1_000)
+    supuestos = montecarlo.supuestos_base()
+    serie = montecarlo.simular(4_000, semilla=3, supuestos=supuestos, procesos=1)
+    paralelo = montecarlo.simular(4_000, semilla=3, supuestos=supuestos, procesos=2)
+    for a, b in zip(serie, paralelo):
+        np.testing.assert_array_equal(a, b)
+    assert len(serie.vpn) == 4_000
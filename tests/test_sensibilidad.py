@@ -0,0 +1,35 @@
+import pytest
+
+from kuali import escenarios, finanzas, sensibilidad
+
+
+def vpn_directo(meses=60, **valores):
+    # Un solo juego por el modelo completo, sin broadcasting
+    base = escenarios.Escenario()._asdict()
+    base.update(valores)
+    return float(finanzas.indicadores(finanzas.parametros(**base), meses, con_tir=False).vpn[0])
+
+
+@pytest.mark.parametrize("x, y", [("ticket", "paquetes"), ("inversion", "tasa_descuento")])
+def test_celdas_de_la_rejilla_coinciden_con_evaluarlas_una_por_una(x, y):
+    mapa = sensibilidad.mapa_calor(sensibilidad.rejilla_completa(x, y))
+    assert mapa.vpn.shape == (len(mapa.ys), len(mapa.xs))
+    for i, j in [(0, 0), (17, 123), (199, 199), (120, 5)]:
+        esperado = vpn_directo(**{x: mapa.xs[j], y: mapa.ys[i]})
+        assert mapa.vpn[i, j] == pytest.approx(esperado, rel=1e-9, abs=1e-3)
+
+
+def test_tornado_coincide_con_mover_cada_variable_sola():
+    base, barras = sensibilidad.tornado()
+    assert base == pytest.approx(vpn_directo(), rel=1e-9)
+    for barra in barras:
+        variable = sensibilidad.VARIABLES[barra.variable]
+        assert barra.bajo == pytest.approx(vpn_directo(**{barra.variable: variable.minimo}), rel=1e-9, abs=1e-3)
+        assert barra.alto == pytest.approx(vpn_directo(**{barra.variable: variable.maximo}), rel=1e-9, abs=1e-3)
+    rangos = [abs(b.alto - b.bajo) for b in barras]
+    assert rangos == sorted(rangos, reverse=True)
+
+
+def test_rejilla_con_la_misma_variable_en_ambos_ejes():
+    with pytest.raises(ValueError):
+        sensibilidad.mapa_calor(sensibilidad.rejilla_completa("ticket", "ticket"))
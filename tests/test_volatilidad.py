@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kuali import volatilidad
+
+
+@pytest.mark.parametrize("ventana", [2, 5, 24])
+def test_desviacion_movil_coincide_con_pandas_rolling(ventana):
+    rng = np.random.default_rng(0)
+    precios = rng.normal(3000, 300, (4, 200))
+    precios[1, 40:60] = np.nan          # hueco largo
+    precios[2, rng.integers(0, 200, 30)] = np.nan
+    precios[3] += 1e6                   # nivel alto: no debe perder precisión
+    esperado = np.stack([
+        (s.rolling(ventana, min_periods=2).std() / s.rolling(ventana, min_periods=2).mean()).to_numpy()[ventana - 1:]
+        for s in map(pd.Series, precios)
+    ])
+    np.testing.assert_allclose(volatilidad.desviacion_movil(precios, ventana), esperado, rtol=1e-7, equal_nan=True)
+
+
+def test_indicadores_de_una_serie_conocida():
+    fechas = np.arange(np.datetime64("2025-10-27"), np.datetime64("2025-11-06"))   # lunes a miércoles
+    precios = np.array([[100, 100, 100, 100, 200, 200, 200, 100, 100, 100],
+                        [100, np.nan, 120, 100, 100, 100, 100, 100, 100, 100]], dtype=np.float64)
+    ind = volatilidad.analizar(fechas, precios)
+    # 31 oct-2 nov es Día de Muertos; días normales: lunes a jueves fuera del festivo
+    assert ind.alza_festiva[0] == pytest.approx(2.0)
+    assert ind.pico_valle[0] == pytest.approx(1.0)
+    assert ind.saltos.tolist() == [1, 0]   # el hueco no cuenta como salto